@@ -0,0 +1,78 @@
+"""
+Avatar URLs for users, shared by the comment feeds and profile views.
+
+Building profile.image.url goes through the storage backend (a URL
+signature with Cloudinary), so the result is cached per user id and
+lists resolve all their authors with one get_many. The Profile signals
+in auth_profil/models.py drop a user's entry when their picture changes
+or the profile is deleted. Load users with select_related('profile')
+(or 'user__profile') so a cold cache doesn't cost a query per user.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.templatetags.static import static
+
+DEFAULT_AVATAR = 'img/default.png'
+CACHE_PREFIX = 'avatar-url:'
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(user_id):
+    return f"{CACHE_PREFIX}{user_id}"
+
+
+def profile_image_url(user):
+    """The user's uploaded avatar URL from storage, or '' if they have none."""
+    profile = getattr(user, 'profile', None)
+    if profile is None or not profile.image:
+        return ''
+    try:
+        return profile.image.url
+    except Exception:
+        return ''
+
+
+def avatar_urls(users):
+    """{user id: avatar URL or ''} for the distinct users in `users`, cached per user."""
+    users = {user.pk: user for user in users}
+    cached = cache.get_many([_cache_key(user_id) for user_id in users])
+    urls = {}
+    missing = {}
+    for user_id, user in users.items():
+        url = cached.get(_cache_key(user_id))
+        if url is None:
+            url = missing[_cache_key(user_id)] = profile_image_url(user)
+        urls[user_id] = url
+    if missing:
+        cache.set_many(missing, getattr(settings, 'AVATAR_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return urls
+
+
+def avatar_url(user):
+    """Cached avatar URL of one user, or ''."""
+    return avatar_urls([user])[user.pk]
+
+
+def absolute_avatar_url(request, url):
+    """
+    Absolute https URL of an avatar for the mobile app; the default
+    picture when `url` is empty.
+    """
+    if not url:
+        url = static(DEFAULT_AVATAR)
+    if not url.startswith('http'):
+        url = request.build_absolute_uri(url)
+    if url.startswith('http:'):
+        url = url.replace('http:', 'https:', 1)
+    return url
+
+
+def forget_avatar(user_id):
+    """
+    Drops the cached URL now and again after the transaction commits, so
+    a request reading the old profile meanwhile can't keep it cached.
+    """
+    key = _cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
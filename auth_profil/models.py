@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
+from auth_profil.avatars import forget_avatar
 # Create your models here.
 
 class Profile(models.Model):
@@ -22,6 +23,7 @@ def save_user_profile(sender, instance, **kwargs):
 
 @receiver(pre_save, sender=Profile)
 def delete_old_image_on_change(sender, instance, **kwargs):
+    forget_avatar(instance.user_id)
     if not instance.pk:
         return
     try:
@@ -37,6 +39,7 @@ def delete_old_image_on_change(sender, instance, **kwargs):
 
 @receiver(post_delete, sender=Profile)
 def delete_image_on_delete(sender, instance, **kwargs):
+    forget_avatar(instance.user_id)
     if instance.image and instance.image.name:
         try:
             instance.image.storage.delete(instance.image.name)
@@ -17,6 +17,7 @@ from django.utils.crypto import get_random_string
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from .models import Profile
+from .avatars import DEFAULT_AVATAR, avatar_url
 import base64
 from django.core.files.base import ContentFile
 
@@ -78,12 +79,7 @@ def edit_profile_view(request):
             u_form.save()
             p_form.save()
 
-            new_url = ''
-            try:
-                if request.user.profile.image:
-                    new_url = request.user.profile.image.url
-            except Exception:
-                new_url = ''
+            new_url = avatar_url(request.user)
 
             return JsonResponse({
                 'status': 'success',
@@ -99,13 +95,7 @@ def edit_profile_view(request):
     u_form = UserUpdateForm(instance=request.user)
     p_form = ProfileUpdateForm(instance=request.user.profile)
 
-    if getattr(request.user.profile, "image", None):
-        try:
-            current_avatar_url = request.user.profile.image.url
-        except Exception:
-            current_avatar_url = static('img/default.png')
-    else:
-        current_avatar_url = static('img/default.png')
+    current_avatar_url = avatar_url(request.user) or static(DEFAULT_AVATAR)
 
     return render(
         request, 'edit_profile.html',
@@ -319,7 +309,7 @@ def get_user_profile(request):
             'first_name': user.first_name,
             'last_name': user.last_name,
             # Mengembalikan URL gambar jika ada di database Django
-            'image_url': profile.image.url if profile.image else None, 
+            'image_url': avatar_url(user) or None, 
         }
         return JsonResponse({'status': True, 'data': data}, status=200)
     return JsonResponse({'status': False, 'message': 'Belum login'}, status=401)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HighlightConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'highlight'
+
+    def ready(self):
+        from . import signals
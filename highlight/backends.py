@@ -1,7 +1,84 @@
-from embed_video.backends import YoutubeBackend
+import requests
+from urllib.parse import urlsplit, urlunsplit
+from embed_video.backends import YoutubeBackend, detect_backend, EmbedVideoException
 
 class SecureYoutubeBackend(YoutubeBackend):
     """A YouTube backend that forces HTTPS embeds."""
     def get_embed_url(self):
         # Always use https, even if library tries http
         return f"https://www.youtube.com/embed/{self.code}"
+
+    def get_default_thumbnail_url(self):
+        """hqdefault exists for every video, so it needs no HEAD probe."""
+        return f"https://img.youtube.com/vi/{self.code}/hqdefault.jpg"
+
+
+def force_https(url):
+    if isinstance(url, str) and url.startswith("http://"):
+        return url.replace("http://", "https://", 1)
+    return url
+
+
+def embed_metadata(url, probe_thumbnail=True):
+    """
+    Detects the embed backend for `url` once and returns the values stored
+    on Highlight: backend name, video code, HTTPS embed URL and thumbnail.
+    The library's thumbnail lookup issues HEAD requests to pick the best
+    resolution; pass probe_thumbnail=False to skip that (bulk imports).
+    Returns empty strings when the URL isn't embeddable.
+    """
+    empty = {'embed_backend': '', 'video_code': '', 'embed_url': '', 'thumbnail_url': ''}
+    if not url:
+        return empty
+
+    try:
+        backend = detect_backend(url)
+        code = backend.code
+        embed_url = force_https(str(backend.url))
+    except EmbedVideoException:
+        return empty
+
+    thumbnail_url = ''
+    if probe_thumbnail or not hasattr(backend, 'get_default_thumbnail_url'):
+        try:
+            thumbnail_url = backend.thumbnail or ''
+        except (requests.RequestException, EmbedVideoException):
+            thumbnail_url = ''
+    if not thumbnail_url and hasattr(backend, 'get_default_thumbnail_url'):
+        thumbnail_url = backend.get_default_thumbnail_url()
+
+    return {
+        'embed_backend': backend.backend,
+        'video_code': code or '',
+        'embed_url': embed_url,
+        'thumbnail_url': force_https(thumbnail_url),
+    }
+
+
+def video_url_key(url, embed_backend='', video_code=''):
+    """
+    Identity of a video URL, used to de-duplicate highlights.
+    Embeddable URLs become '<provider>:<video code>', so youtu.be/x and
+    youtube.com/watch?v=x&t=10 share a key. Other URLs are normalized:
+    http and https treated alike, host lower-cased, 'www.' and the
+    fragment dropped, no trailing slash.
+    """
+    if not url:
+        return None
+    if embed_backend and video_code:
+        provider = embed_backend.lower().removeprefix('secure').removesuffix('backend')
+        return f"{provider}:{video_code}"
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme in ('', 'http'):
+        scheme = 'https'
+    host = parts.netloc.lower().removeprefix('www.')
+    path = parts.path.rstrip('/')
+    return urlunsplit((scheme, host, path, parts.query, ''))
+
+
+def url_key_for(url):
+    """video_url_key() for a raw URL, detecting the backend without network calls."""
+    metadata = embed_metadata(url, probe_thumbnail=False)
+    return video_url_key(url, metadata['embed_backend'], metadata['video_code'])
@@ -0,0 +1,164 @@
+"""
+Set-based deletion of highlights and everything that depends on them.
+
+Model.delete()/QuerySet.delete() loads every highlight (and any related
+row that has delete signals or relations of its own) into Python before
+deleting. Here each batch of highlights is removed with one
+DELETE ... WHERE highlight_id IN (...) per dependent table, inside one
+short transaction per batch, and the deleted row counts are returned
+per model the same way QuerySet.delete() reports them.
+
+Large deletes are recorded as a HighlightDeleteJob and run a batch per
+request: the request that starts the job deletes the first batch and
+every status poll the next one (see start_delete_job/run_delete_job).
+Any worker can answer a poll, and a worker dying mid-batch only rolls
+that batch back.
+"""
+from collections import Counter
+from itertools import islice
+from django.conf import settings
+from django.db import DatabaseError, connections, models, router, transaction
+from django.db.models import signals
+from highlight.models import Highlight, HighlightDeleteJob
+from highlight.search import unindex_highlights
+from kick_chronicle.caching import bump_version
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_BACKGROUND_THRESHOLD = 200
+
+
+def _has_delete_signals(model):
+    return any(
+        signal.has_listeners(model)
+        for signal in (signals.pre_delete, signals.post_delete)
+    )
+
+
+def _delete_rows(queryset):
+    """
+    Deletes the rows of `queryset` with a plain DELETE ... WHERE pk IN
+    (SELECT ...) and returns how many went. QuerySet.delete() would run
+    the collector, which loads every row of a model that still has
+    relations into Python; callers only get here once every reference
+    to the rows is gone and the model has no delete signals, so there
+    is nothing left for the collector to do.
+    """
+    using = queryset.db
+    connection = connections[using]
+    meta = queryset.model._meta
+    subquery, params = queryset.values('pk').query.get_compiler(using).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {connection.ops.quote_name(meta.db_table)} "
+            f"WHERE {connection.ops.quote_name(meta.pk.column)} IN ({subquery})",
+            params,
+        )
+        return cursor.rowcount
+
+
+def _delete_dependents(queryset, counts, path):
+    """
+    Deletes rows that reference `queryset` through CASCADE foreign keys,
+    deepest first, and nulls SET_NULL references. Models with delete
+    signals or PROTECT/RESTRICT rules go through the ORM so their
+    behaviour is unchanged.
+    """
+    model = queryset.model
+    using = queryset.db
+    for relation in model._meta.related_objects:
+        if relation.many_to_many:
+            continue
+        related_model = relation.related_model
+        field = relation.field
+        # Self references (and cycles) live inside the set being deleted;
+        # the deferred FK check at commit catches anything that doesn't.
+        if related_model in path:
+            continue
+        related = related_model._base_manager.using(using).filter(**{f"{field.name}__in": queryset})
+
+        on_delete = field.remote_field.on_delete
+        if on_delete is models.DO_NOTHING:
+            continue
+        if on_delete is models.SET_NULL:
+            related.update(**{field.name: None})
+        elif on_delete is models.CASCADE and not _has_delete_signals(related_model):
+            _delete_dependents(related, counts, path | {related_model})
+            counts[related_model._meta.label] += _delete_rows(related)
+        else:
+            deleted, per_model = related.delete()
+            counts.update(per_model)
+
+
+def _delete_batch(batch, using, counts):
+    highlights = Highlight._base_manager.using(using).filter(pk__in=batch)
+    _delete_dependents(highlights, counts, {Highlight})
+    counts[Highlight._meta.label] += _delete_rows(highlights)
+    # Bypassing delete() skips the post_delete signal that unindexes
+    # and invalidates cached responses.
+    unindex_highlights(batch)
+    bump_version('highlight')
+
+
+def _batch_size(batch_size):
+    return batch_size or getattr(settings, 'HIGHLIGHT_DELETE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+
+def delete_highlights(highlight_ids, batch_size=None, progress=None):
+    """
+    Deletes the given highlights and their comments, ratings, favorites
+    etc. in batches. Returns {model label: deleted rows}; `progress`, if
+    given, is called with the running totals after every batch.
+    """
+    batch_size = _batch_size(batch_size)
+    using = router.db_for_write(Highlight)
+    counts = Counter()
+
+    highlight_ids = iter(highlight_ids)
+    while batch := list(islice(highlight_ids, batch_size)):
+        with transaction.atomic(using=using):
+            _delete_batch(batch, using, counts)
+        if progress:
+            progress(dict(counts))
+    return dict(counts)
+
+
+def should_delete_in_background(highlight_ids):
+    threshold = getattr(settings, 'HIGHLIGHT_DELETE_BACKGROUND_THRESHOLD', DEFAULT_BACKGROUND_THRESHOLD)
+    return len(highlight_ids) > threshold
+
+
+def start_delete_job(highlight_ids, batch_size=None):
+    """Records a delete job for the highlights, runs its first batch and returns the job."""
+    highlight_ids = [str(pk) for pk in highlight_ids]
+    job = HighlightDeleteJob.objects.create(total=len(highlight_ids), remaining=highlight_ids)
+    return run_delete_job(job.pk, batch_size)
+
+
+def run_delete_job(job_id, batch_size=None):
+    """
+    Deletes the next batch of a running job, in the transaction that
+    records it, and returns the job (None if there is no such job).
+    The row lock makes concurrent polls take turns.
+    """
+    batch_size = _batch_size(batch_size)
+    using = router.db_for_write(HighlightDeleteJob)
+    with transaction.atomic(using=using):
+        job = HighlightDeleteJob.objects.using(using).select_for_update().filter(pk=job_id).first()
+        if job is None or job.status != 'running':
+            return job
+        batch = job.remaining[:batch_size]
+        counts = Counter(job.deleted)
+        try:
+            with transaction.atomic(using=using):
+                _delete_batch(batch, using, counts)
+        except DatabaseError as e:
+            # Batches committed before this one stay deleted.
+            job.status = 'error'
+            job.message = str(e)
+        else:
+            job.remaining = job.remaining[batch_size:]
+            job.deleted = dict(counts)
+            if not job.remaining:
+                job.status = 'done'
+        job.save()
+    return job
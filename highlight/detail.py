@@ -0,0 +1,47 @@
+"""
+Loader for the highlight detail page and its mobile JSON twin.
+
+Everything the page header needs (both standings, rating average and
+count, comment count, and the current user's favorite flag and rating)
+comes back from one SELECT: the standings are joined, the rating totals
+are columns of the highlight and the rest are correlated subqueries
+annotated onto the highlight row. The first page of comments is one
+more query (komen_like_rate.comments).
+"""
+from django.db.models import BooleanField, Count, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from highlight.models import Highlight
+from komen_like_rate.models import Comment, Favorite, Rating
+
+
+def _aggregate(model, function):
+    # One-row subquery: GROUP BY highlight_id for the outer highlight.
+    return Subquery(
+        model.objects.filter(highlight=OuterRef('pk'))
+        .order_by()
+        .values('highlight')
+        .annotate(result=function)
+        .values('result')
+    )
+
+
+def highlight_detail_queryset(user):
+    """
+    Highlights annotated with comment_count, is_favorited and user_rating
+    (the last two for `user`); avg_rating and rating_count are columns.
+    """
+    queryset = Highlight.objects.select_related('home_standing', 'away_standing').annotate(
+        comment_count=Coalesce(_aggregate(Comment, Count('id')), 0),
+    )
+
+    if user is not None and user.is_authenticated:
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(highlight=OuterRef('pk'), user=user)),
+            user_rating=Subquery(
+                Rating.objects.filter(highlight=OuterRef('pk'), user=user).values('value')[:1]
+            ),
+        )
+    return queryset.annotate(
+        is_favorited=Value(False, output_field=BooleanField()),
+        user_rating=Value(None, output_field=IntegerField()),
+    )
@@ -1,6 +1,6 @@
 from django.forms import ModelForm
 from django import forms
-from highlight.models import Highlight
+from highlight.models import Highlight, find_duplicate_highlight
 
 from django.utils.html import strip_tags
 
@@ -13,6 +13,13 @@ class HighlightForm(ModelForm):
         name = self.cleaned_data["name"]
         return strip_tags(name)
 
+    def clean_url(self):
+        url = self.cleaned_data["url"]
+        duplicate = find_duplicate_highlight(url, exclude_pk=self.instance.pk)
+        if duplicate:
+            raise forms.ValidationError(f'This video has already been posted as "{duplicate.name}".')
+        return url
+
     def clean_description(self):
         description = self.cleaned_data["description"]
         return strip_tags(description)
@@ -0,0 +1,225 @@
+"""
+Streaming CSV ingestion for highlights, shared by the web and Flutter
+upload views.
+
+The upload is decoded line by line, rows are validated in a generator
+and upserted in chunks of HIGHLIGHT_IMPORT_CHUNK_SIZE, one transaction
+per chunk, so memory stays flat no matter how large the file is.
+Rows are keyed on Highlight.url_key, so importing the same file twice
+updates the existing highlights instead of duplicating them.
+
+Expected columns: Name, URL, Description, Manual Thumbnail URL, Season.
+"""
+import codecs
+import csv
+from itertools import islice
+from django.conf import settings
+from django.db import transaction
+from highlight.models import Highlight, build_standing_index
+from highlight.search import index_highlights
+from kick_chronicle.caching import bump_version
+from tim.models import Standing
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Columns a CSV row can change on an existing highlight.
+IMPORT_FIELDS = ['name', 'url', 'description', 'manual_thumbnail_url', 'season']
+UPSERT_FIELDS = IMPORT_FIELDS + Highlight.TEAM_FIELDS + Highlight.EMBED_FIELDS + ['updated_at']
+
+SEASON_MAPPING = {
+    '2022/2023': '22/23',
+    '2023/2024': '23/24',
+    '2024/2025': '24/25',
+}
+
+
+class ImportReport:
+    """Per-import counters plus the first MAX_REPORTED_ERRORS row errors."""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': message})
+
+    @property
+    def imported(self):
+        return self.created + self.updated + self.unchanged
+
+    @property
+    def summary(self):
+        summary = (f"Imported {self.imported} highlights: {self.created} created, "
+                   f"{self.updated} updated, {self.unchanged} unchanged.")
+        if self.duplicates:
+            summary += f" {self.duplicates} repeated rows were replaced by a later row."
+        return summary
+
+    @property
+    def skipped_messages(self):
+        messages = [f"Row {e['row']}: {e['error']}" if e['row'] else e['error'] for e in self.errors]
+        if self.error_count > len(self.errors):
+            messages.append(f"...and {self.error_count - len(self.errors)} more.")
+        return messages
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'duplicates': self.duplicates,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def iter_csv_rows(uploaded_file, encoding='utf-8-sig'):
+    """
+    Yields (row_number, row) for every data row of an uploaded CSV,
+    skipping the header. Django's File iterates line by line over
+    64 KB chunks, so the file is never read into memory at once.
+    """
+    reader = csv.reader(codecs.iterdecode(uploaded_file, encoding))
+    next(reader, None)  # Skip header row
+    for row_number, row in enumerate(reader, start=2):
+        yield row_number, row
+
+
+def parse_highlight_rows(rows, report, require_season=True):
+    """
+    Validates CSV rows and yields unsaved Highlight instances. Invalid
+    rows are recorded on `report` and skipped. With require_season=False
+    an unknown season is stored as None instead of skipping the row.
+    """
+    allowed_seasons = set(SEASON_MAPPING.values())
+
+    for row_number, row in rows:
+        # Skip empty lines (common at the end of CSV exports)
+        if not any(cell.strip() for cell in row):
+            continue
+        report.rows += 1
+
+        if len(row) < 2:
+            report.add_error(row_number, "Too few columns (Need at least Name and URL).")
+            continue
+
+        name = row[0].strip()
+        url = row[1].strip()
+        if not name or not url:
+            report.add_error(row_number, "Missing name or URL")
+            continue
+        if len(name) > 255 or len(url) > 2000:
+            report.add_error(row_number, "Name or URL too long")
+            continue
+
+        description = row[2].strip() if len(row) > 2 else ""
+        manual_thumbnail_url = row[3].strip() if len(row) > 3 else ""
+
+        season_raw = row[4].strip() if len(row) > 4 else ""
+        season = SEASON_MAPPING.get(season_raw, season_raw if season_raw in allowed_seasons else None)
+        if season is None and require_season:
+            report.add_error(row_number, f"Invalid season format '{season_raw}'")
+            continue
+
+        yield Highlight(
+            name=name,
+            url=url,
+            description=description,
+            manual_thumbnail_url=manual_thumbnail_url or None,
+            season=season,
+        )
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _import_values(highlight):
+    return tuple(getattr(highlight, field) or None for field in IMPORT_FIELDS)
+
+
+def upsert_highlights(highlights, standing_index, report):
+    """
+    Writes one chunk of parsed highlights with a single INSERT ... ON
+    CONFLICT (url_key) DO UPDATE. When the same video appears twice in
+    the chunk the later row wins and the earlier one counts as a
+    duplicate. Existing rows are fetched in one query first, to tell
+    created/updated/unchanged apart against the database and leave
+    unchanged rows out of the write.
+    """
+    latest = {}
+    for highlight in highlights:
+        highlight.refresh_embed_metadata(probe_thumbnail=False)
+        if latest.pop(highlight.url_key, None) is not None:
+            report.duplicates += 1
+        latest[highlight.url_key] = highlight
+
+    existing = {
+        h.url_key: h
+        for h in Highlight.objects.filter(
+            url_key__in=latest.keys()
+        ).only('id', 'url_key', 'created_at', *IMPORT_FIELDS)
+    }
+
+    pending = {}
+    for url_key, highlight in latest.items():
+        current = existing.get(url_key)
+        if current is None:
+            report.created += 1
+        elif _import_values(current) == _import_values(highlight):
+            report.unchanged += 1
+            continue
+        else:
+            highlight.pk = current.pk
+            highlight.created_at = current.created_at
+            report.updated += 1
+        pending[url_key] = highlight
+
+    rows = list(pending.values())
+    if not rows:
+        return
+    for highlight in rows:
+        highlight.resolve_teams(standing_index)
+    with transaction.atomic():
+        Highlight.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['url_key'],
+            update_fields=UPSERT_FIELDS,
+        )
+        index_highlights(rows)
+        bump_version('highlight')
+
+
+def import_highlights_csv(uploaded_file, require_season=True, chunk_size=None):
+    """
+    Imports highlights from an uploaded CSV file and returns an ImportReport.
+    Each chunk is committed on its own, so a decoding error halfway through
+    keeps the rows before it and is reported as a file-level error.
+    """
+    chunk_size = chunk_size or getattr(settings, 'HIGHLIGHT_IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    report = ImportReport()
+    # Only a few seasons exist, so one index covers every row of the file.
+    standing_index = build_standing_index(season for season, _ in Standing.SEASON_CHOICES)
+
+    rows = parse_highlight_rows(iter_csv_rows(uploaded_file), report, require_season)
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            upsert_highlights(chunk, standing_index, report)
+    except UnicodeDecodeError:
+        report.add_error(None, "Error reading file. Please ensure it is UTF-8 encoded.")
+    except csv.Error as e:
+        report.add_error(None, f"Error processing CSV file structure: {e}")
+
+    return report
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from highlight.models import Highlight
+from kick_chronicle.caching import bump_version
+
+
+class Command(BaseCommand):
+    help = "Computes the stored embed backend, video code, embed URL and thumbnail for existing highlights."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--probe-thumbnails',
+            action='store_true',
+            help="Probe YouTube for the best thumbnail resolution (one or more HEAD requests per video).",
+        )
+        parser.add_argument('--only-missing', action='store_true', help="Skip highlights that already have a backend.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        highlights = Highlight.objects.only('id', 'url', *Highlight.EMBED_FIELDS).order_by('pk')
+        if options['only_missing']:
+            highlights = highlights.filter(embed_backend='')
+
+        batch_size = options['batch_size']
+        batch = []
+        updated = 0
+        for highlight in highlights.iterator(chunk_size=batch_size):
+            highlight.refresh_embed_metadata(probe_thumbnail=options['probe_thumbnails'])
+            highlight.updated_at = timezone.now()  # thumbnails changed, re-render cached cards
+            batch.append(highlight)
+            if len(batch) >= batch_size:
+                Highlight.objects.bulk_update(batch, Highlight.EMBED_FIELDS + ['updated_at'])
+                updated += len(batch)
+                batch = []
+        if batch:
+            Highlight.objects.bulk_update(batch, Highlight.EMBED_FIELDS + ['updated_at'])
+            updated += len(batch)
+
+        bump_version('highlight')
+        self.stdout.write(self.style.SUCCESS(f"Updated embed metadata for {updated} highlights."))
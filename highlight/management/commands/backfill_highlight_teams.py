@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from highlight.models import Highlight, resolve_highlight_teams
+from kick_chronicle.caching import bump_version
+
+
+class Command(BaseCommand):
+    help = "Parses team names and links home/away standings for existing highlights."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--season', help="Only backfill highlights of this season (e.g. 24/25).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        highlights = Highlight.objects.only('id', 'name', 'season').order_by('pk')
+        if options['season']:
+            highlights = highlights.filter(season=options['season'])
+
+        batch_size = options['batch_size']
+        batch = []
+        updated = 0
+        for highlight in highlights.iterator(chunk_size=batch_size):
+            batch.append(highlight)
+            if len(batch) >= batch_size:
+                updated += self._flush(batch)
+                batch = []
+        if batch:
+            updated += self._flush(batch)
+
+        bump_version('highlight')
+        self.stdout.write(self.style.SUCCESS(f"Resolved teams for {updated} highlights."))
+
+    def _flush(self, batch):
+        resolve_highlight_teams(batch)
+        Highlight.objects.bulk_update(batch, Highlight.TEAM_FIELDS)
+        return len(batch)
@@ -0,0 +1,102 @@
+import csv
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from highlight.importers import ImportReport, import_highlights_csv, parse_highlight_rows
+from highlight.models import Highlight, resolve_highlight_teams
+from highlight.search import index_highlights
+
+TEAMS = ['Arsenal', 'Chelsea', 'Liverpool', 'Everton', 'Fulham', 'Brentford', 'Burnley', 'Wolves']
+SEASONS = ['2022/2023', '2023/2024', '2024/2025']
+VIDEO_ID_CHARS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_'
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Times a CSV import of synthetic highlights with the chunked importer "
+        "against the old read-everything-then-bulk_create path. Every run is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000)
+        parser.add_argument('--chunk-size', type=int, default=None, help="Defaults to HIGHLIGHT_IMPORT_CHUNK_SIZE.")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--trace-memory', action='store_true',
+            help="Also report peak Python memory (tracemalloc makes the runs several times slower).",
+        )
+
+    def handle(self, *args, **options):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                self._write_csv(f, options['rows'], random.Random(options['seed']))
+            size_mb = os.path.getsize(path) / 2 ** 20
+            self.stdout.write(f"{options['rows']} rows ({size_mb:.1f} MB):")
+
+            for name, run in (
+                ('read whole file, one bulk_create', self._import_at_once),
+                ('chunked import', lambda upload: import_highlights_csv(upload, chunk_size=options['chunk_size'])),
+            ):
+                seconds, peak = self._measure(path, run, options['trace_memory'])
+                line = f"  {name}: {seconds:.1f}s ({options['rows'] / seconds:.0f} rows/s)"
+                if peak is not None:
+                    line += f", peak {peak / 2 ** 20:.1f} MB"
+                self.stdout.write(line)
+        finally:
+            os.remove(path)
+
+    def _write_csv(self, f, rows, rng):
+        writer = csv.writer(f)
+        writer.writerow(['Name', 'URL', 'Description', 'Manual Thumbnail URL', 'Season'])
+        for i in range(rows):
+            home, away = rng.sample(TEAMS, 2)
+            video_id = ''.join(rng.choices(VIDEO_ID_CHARS, k=11))
+            writer.writerow([
+                f"{home} vs {away}",
+                f"https://www.youtube.com/watch?v={video_id}",
+                f"Benchmark highlight {i}",
+                '',
+                rng.choice(SEASONS),
+            ])
+
+    def _import_at_once(self, upload):
+        # What both upload views did before highlight.importers
+        report = ImportReport()
+        rows = csv.reader(io.StringIO(upload.read().decode('utf-8-sig')))
+        next(rows, None)
+        highlights = list(parse_highlight_rows(enumerate(rows, start=2), report))
+        resolve_highlight_teams(highlights)
+        for highlight in highlights:
+            highlight.refresh_embed_metadata(probe_thumbnail=False)
+        Highlight.objects.bulk_create(highlights, ignore_conflicts=True)
+        index_highlights(highlights)
+
+    def _measure(self, path, run, trace_memory):
+        """Runs `run(upload)` in a rolled-back transaction; returns (seconds, peak traced bytes or None)."""
+        peak = None
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            with open(path, 'rb') as f, transaction.atomic():
+                started = time.perf_counter()
+                run(File(f, name='benchmark.csv'))
+                elapsed = time.perf_counter() - started
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            if trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        return elapsed, peak
@@ -0,0 +1,73 @@
+import statistics
+import time
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+from highlight.models import Highlight
+from highlight.views import show_main_page
+
+# A private cache, so clearing it for the cold runs can't touch a shared one;
+# response caching is forced on since it is per process
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-main-page',
+    }
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Median render time of the main page per page number, with a cold and a warm "
+        "cache, for anonymous visitors (whole-page cache) and staff (card fragments)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=20, help="Page numbers to render.")
+
+    def handle(self, *args, **options):
+        total = Highlight.objects.count()
+        if not total:
+            raise CommandError("No highlights to render.")
+        pages = list(range(1, min(options['pages'], Paginator(range(total), 12).num_pages) + 1))
+
+        self.stdout.write(f"{total} highlights, median over pages 1-{pages[-1]}:")
+        try:
+            with transaction.atomic(), override_settings(CACHES=BENCHMARK_CACHES, RESPONSE_CACHE_ENABLED=True):
+                staff = User.objects.create_user('benchmark-staff', is_staff=True)
+                for name, user in (('anonymous', AnonymousUser()), ('staff', staff)):
+                    cold, warm, same = self._measure(user, pages)
+                    self.stdout.write(
+                        f"  {name}: cold {cold:.1f} ms, warm {warm:.1f} ms"
+                        f"{'' if same else ' (cold and warm HTML differ!)'}"
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _render(self, user, page):
+        request = RequestFactory().get('/', {'page': page})
+        request.user = user
+        request.session = SessionBase()
+        started = time.perf_counter()
+        response = show_main_page(request)
+        return (time.perf_counter() - started) * 1000, response.content
+
+    def _measure(self, user, pages):
+        cold, warm, same = [], [], True
+        for page in pages:
+            cache.clear()
+            elapsed, cold_html = self._render(user, page)
+            cold.append(elapsed)
+            elapsed, warm_html = self._render(user, page)
+            warm.append(elapsed)
+            same = same and cold_html == warm_html
+        return statistics.median(cold), statistics.median(warm), same
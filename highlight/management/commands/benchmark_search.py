@@ -0,0 +1,81 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from highlight.models import Highlight
+from highlight.search import index_highlights, search_backend, search_highlights
+
+TEAMS = [
+    'Arsenal', 'Aston Villa', 'Bournemouth', 'Brentford', 'Brighton', 'Burnley', 'Chelsea',
+    'Crystal Palace', 'Everton', 'Fulham', 'Liverpool', 'Luton', 'Manchester City',
+    'Manchester United', 'Newcastle', 'Nottingham Forest', 'Sheffield United', 'Tottenham',
+    'West Ham', 'Wolves',
+]
+WORDS = ['goal', 'penalty', 'save', 'header', 'volley', 'derby', 'comeback', 'late', 'winner', 'live']
+DEFAULT_QUERIES = ['chel live', 'burnley wolves', 'chelsea', 'late winner']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the first page of highlight search against the icontains scan it "
+        "replaced, on synthetic highlights added for the run. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--highlights', type=int, default=100000, help="Synthetic highlights to add.")
+        parser.add_argument('--query', action='append', dest='queries', help="Query to time (repeatable).")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per query; the median is reported.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or DEFAULT_QUERIES
+        try:
+            with transaction.atomic():
+                self._add_highlights(options['highlights'], random.Random(options['seed']))
+                self.stdout.write(
+                    f"{Highlight.objects.count()} highlights, search backend: {search_backend() or 'icontains'} "
+                    f"({connection.vendor}), median of {options['repeat']} runs, first page of 10:"
+                )
+                for query in queries:
+                    before = self._time(lambda: self._icontains(query), options['repeat'])
+                    after = self._time(lambda: search_highlights(Highlight.objects.all(), query), options['repeat'])
+                    self.stdout.write(f"  {query!r}: icontains {before:.1f} ms, indexed search {after:.1f} ms")
+                raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(self.style.SUCCESS("Done; the synthetic highlights were rolled back."))
+
+    def _icontains(self, query):
+        # The scan show_main_page and highlight_json ran before the search index
+        return Highlight.objects.filter(Q(name__icontains=query)).order_by('-created_at')
+
+    def _time(self, build_queryset, repeat):
+        # Building the queryset is timed too: the SQLite search counts matches first
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(build_queryset()[:10])
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def _add_highlights(self, count, rng, batch_size=2000):
+        for start in range(0, count, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, count)):
+                home, away = rng.sample(TEAMS, 2)
+                batch.append(Highlight(
+                    name=f"{home} vs {away} {rng.choice(WORDS)}",
+                    url=f"https://example.com/benchmark-search/{i}.mp4",
+                    description=' '.join(rng.choices(WORDS, k=8)),
+                ))
+            # bulk_create skips the signals that index single saves
+            index_highlights(Highlight.objects.bulk_create(batch))
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE highlight_highlight")
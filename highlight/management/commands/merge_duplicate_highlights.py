@@ -0,0 +1,81 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from highlight.backends import url_key_for
+from highlight.models import Highlight
+from komen_like_rate.favorites import recompute_favorite_counts
+from komen_like_rate.models import Comment, Favorite, Rating
+from komen_like_rate.leaderboard import update_leaderboard_entry
+from komen_like_rate.ratings import rebuild_daily_buckets, recompute_rating_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Merges highlights that point at the same video into the oldest one, "
+        "moving their comments, ratings and favorites, and fills in url_key."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report the duplicates.")
+
+    def handle(self, *args, **options):
+        groups = defaultdict(list)
+        highlights = Highlight.objects.only('id', 'url', 'url_key').order_by('created_at', 'id')
+        for highlight in highlights.iterator(chunk_size=2000):
+            key = url_key_for(highlight.url)
+            if key:
+                groups[key].append((highlight.pk, highlight.url_key))
+
+        duplicates = {key: rows for key, rows in groups.items() if len(rows) > 1}
+        removed = sum(len(rows) - 1 for rows in duplicates.values())
+        if options['dry_run']:
+            self.stdout.write(f"{len(duplicates)} videos have duplicates, {removed} highlights would be merged.")
+            return
+
+        moved = defaultdict(int)
+        for key, rows in duplicates.items():
+            # Keep the row that already owns the key, otherwise the oldest.
+            keeper_id = next((pk for pk, url_key in rows if url_key == key), rows[0][0])
+            duplicate_ids = [pk for pk, _ in rows if pk != keeper_id]
+            with transaction.atomic():
+                moved['comments'] += Comment.objects.filter(highlight_id__in=duplicate_ids).update(highlight_id=keeper_id)
+                moved['ratings'] += self._move_per_user(Rating, keeper_id, duplicate_ids)
+                moved['favorites'] += self._move_per_user(Favorite, keeper_id, duplicate_ids)
+                # Signals drop the deleted rows from the search index.
+                Highlight.objects.filter(pk__in=duplicate_ids).delete()
+                Highlight.objects.filter(pk=keeper_id).update(url_key=key)
+                recompute_rating_totals(Highlight.objects.filter(pk=keeper_id))
+                rebuild_daily_buckets(Highlight.objects.filter(pk=keeper_id))
+                update_leaderboard_entry(keeper_id)
+                recompute_favorite_counts(Highlight.objects.filter(pk=keeper_id))
+
+        # Highlights without duplicates whose key was never stored.
+        missing = [
+            Highlight(pk=rows[0][0], url_key=key)
+            for key, rows in groups.items()
+            if len(rows) == 1 and rows[0][1] != key
+        ]
+        Highlight.objects.bulk_update(missing, ['url_key'], batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Merged {removed} duplicate highlights into {len(duplicates)} "
+            f"(moved {moved['comments']} comments, {moved['ratings']} ratings, "
+            f"{moved['favorites']} favorites); set url_key on {len(missing)} more."
+        ))
+
+    def _move_per_user(self, model, keeper_id, duplicate_ids):
+        """
+        Re-points rows of a one-per-user model (Rating, Favorite) to the
+        keeper. A user who already has one on the keeper keeps that row;
+        otherwise their most recent row on a duplicate is moved.
+        """
+        taken = set(model.objects.filter(highlight_id=keeper_id).values_list('user_id', flat=True))
+        move, drop = [], []
+        for pk, user_id in model.objects.filter(highlight_id__in=duplicate_ids).order_by('-pk').values_list('pk', 'user_id'):
+            if user_id in taken:
+                drop.append(pk)
+            else:
+                taken.add(user_id)
+                move.append(pk)
+        model.objects.filter(pk__in=drop).delete()
+        return model.objects.filter(pk__in=move).update(highlight_id=keeper_id)
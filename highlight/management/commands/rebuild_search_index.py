@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from highlight.models import Highlight
+from highlight.search import clear_search_index, index_highlights, search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the highlight full-text search index from the highlight table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if search_backend() is None:
+            self.stdout.write(self.style.WARNING("No full-text index on this database; search uses icontains."))
+            return
+
+        clear_search_index()
+        batch_size = options['batch_size']
+        highlights = Highlight.objects.only('id', 'name', 'description').order_by('pk')
+        batch = []
+        indexed = 0
+        for highlight in highlights.iterator(chunk_size=batch_size):
+            batch.append(highlight)
+            if len(batch) >= batch_size:
+                index_highlights(batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            index_highlights(batch)
+            indexed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} highlights."))
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from highlight.models import normalize_team_name, parse_team_names
+
+TEAM_FIELDS = ['home_team_name', 'away_team_name', 'home_standing', 'away_standing']
+
+
+def populate_team_standings(apps, schema_editor):
+    # Same resolution as Highlight.resolve_teams, against the historical models.
+    Highlight = apps.get_model('highlight', 'Highlight')
+    Standing = apps.get_model('tim', 'Standing')
+    standings = {}
+    for pk, season, team in Standing.objects.order_by('season', 'position').values_list('pk', 'season', 'team'):
+        standings.setdefault((season, normalize_team_name(team)), pk)
+
+    def standing_id(season, team_name):
+        return standings.get((season, normalize_team_name(team_name))) if team_name else None
+
+    batch = []
+    for highlight in Highlight.objects.only('id', 'name', 'season').iterator(chunk_size=1000):
+        home_name, away_name = parse_team_names(highlight.name)
+        highlight.home_team_name = (home_name or '')[:100]
+        highlight.away_team_name = (away_name or '')[:100]
+        highlight.home_standing_id = standing_id(highlight.season, home_name)
+        highlight.away_standing_id = standing_id(highlight.season, away_name)
+        batch.append(highlight)
+        if len(batch) >= 1000:
+            Highlight.objects.bulk_update(batch, TEAM_FIELDS)
+            batch = []
+    if batch:
+        Highlight.objects.bulk_update(batch, TEAM_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0007_alter_highlight_season'),
+        ('tim', '0002_standing_position_1_20'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='highlight',
+            name='away_standing',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='away_highlights', to='tim.standing'),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='away_team_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='home_standing',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='home_highlights', to='tim.standing'),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='home_team_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(populate_team_standings, migrations.RunPython.noop),
+    ]
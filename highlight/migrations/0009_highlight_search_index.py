@@ -0,0 +1,59 @@
+from django.db import migrations, OperationalError
+
+from highlight.search import FTS_TABLE, SEARCH_CONFIG, fts_rowid
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE highlight_highlight ADD COLUMN search_vector tsvector")
+        schema_editor.execute(
+            "UPDATE highlight_highlight SET search_vector = "
+            "setweight(to_tsvector(%s, coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector(%s, coalesce(description, '')), 'B')",
+            [SEARCH_CONFIG, SEARCH_CONFIG],
+        )
+        schema_editor.execute(
+            "CREATE INDEX highlight_search_vector_gin ON highlight_highlight USING GIN (search_vector)"
+        )
+
+    elif vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "highlight_id UNINDEXED, name, description, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5: search falls back to icontains.
+            return
+
+        Highlight = apps.get_model('highlight', 'Highlight')
+        rows = Highlight.objects.values_list('id', 'name', 'description').iterator(chunk_size=2000)
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, highlight_id, name, description) VALUES (%s, %s, %s, %s)",
+                ((fts_rowid(pk), pk.hex, name, description) for pk, name, description in rows),
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS highlight_search_vector_gin")
+        schema_editor.execute("ALTER TABLE highlight_highlight DROP COLUMN IF EXISTS search_vector")
+    elif vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0008_highlight_team_standings'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:51
+
+from django.db import migrations, models
+
+from highlight.backends import embed_metadata
+
+EMBED_FIELDS = ['embed_backend', 'video_code', 'embed_url', 'thumbnail_url']
+
+
+def populate_embed_metadata(apps, schema_editor):
+    # No thumbnail probing here; run backfill_highlight_embeds --probe-thumbnails for that.
+    Highlight = apps.get_model('highlight', 'Highlight')
+    batch = []
+    for highlight in Highlight.objects.only('id', 'url').iterator(chunk_size=1000):
+        for field, value in embed_metadata(highlight.url, probe_thumbnail=False).items():
+            setattr(highlight, field, value)
+        batch.append(highlight)
+        if len(batch) >= 1000:
+            Highlight.objects.bulk_update(batch, EMBED_FIELDS)
+            batch = []
+    if batch:
+        Highlight.objects.bulk_update(batch, EMBED_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0009_highlight_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='highlight',
+            name='embed_backend',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='embed_url',
+            field=models.URLField(blank=True, default='', editable=False, max_length=2000),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='thumbnail_url',
+            field=models.URLField(blank=True, default='', editable=False, max_length=2000),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='video_code',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(populate_embed_metadata, migrations.RunPython.noop),
+    ]
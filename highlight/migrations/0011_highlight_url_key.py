@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+from highlight.backends import url_key_for
+
+
+def populate_url_key(apps, schema_editor):
+    # The oldest highlight of each video gets the key; later copies stay NULL
+    # until merge_duplicate_highlights folds them into it.
+    Highlight = apps.get_model('highlight', 'Highlight')
+    seen = set()
+    batch = []
+    highlights = Highlight.objects.only('id', 'url').order_by('created_at', 'id')
+    for highlight in highlights.iterator(chunk_size=1000):
+        key = url_key_for(highlight.url)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        highlight.url_key = key
+        batch.append(highlight)
+        if len(batch) >= 1000:
+            Highlight.objects.bulk_update(batch, ['url_key'])
+            batch = []
+    if batch:
+        Highlight.objects.bulk_update(batch, ['url_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0010_highlight_embed_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='highlight',
+            name='url_key',
+            field=models.CharField(blank=True, editable=False, max_length=2000, null=True),
+        ),
+        migrations.RunPython(populate_url_key, migrations.RunPython.noop),
+    ]
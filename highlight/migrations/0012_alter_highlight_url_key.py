@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0011_highlight_url_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='highlight',
+            name='url_key',
+            field=models.CharField(blank=True, editable=False, max_length=2000, null=True, unique=True),
+        ),
+    ]
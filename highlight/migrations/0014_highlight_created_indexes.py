@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0013_highlight_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='highlight',
+            index=models.Index(fields=['created_at', 'id'], name='highlight_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='highlight',
+            index=models.Index(fields=['season', 'created_at', 'id'], name='highlight_season_created_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:13
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_rating_totals(apps, schema_editor):
+    Highlight = apps.get_model('highlight', 'Highlight')
+    Rating = apps.get_model('komen_like_rate', 'Rating')
+
+    def total(function):
+        return Coalesce(Subquery(
+            Rating.objects.filter(highlight=OuterRef('pk'))
+            .order_by().values('highlight').annotate(result=function).values('result')
+        ), 0)
+
+    Highlight.objects.update(rating_count=total(Count('id')), rating_sum=total(Sum('value')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0014_highlight_created_indexes'),
+        ('komen_like_rate', '0003_remove_rating_created'),
+        ('tim', '0002_standing_position_1_20'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='highlight',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='avg_rating',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(rating_count=0, then=models.Value(0.0)), default=django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('rating_sum', models.FloatField()), '/', django.db.models.functions.comparison.Cast('rating_count', models.FloatField()))), output_field=models.FloatField()),
+        ),
+        migrations.RunPython(populate_rating_totals, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='highlight',
+            index=models.Index(fields=['avg_rating', 'id'], name='highlight_avg_rating_idx'),
+        ),
+    ]
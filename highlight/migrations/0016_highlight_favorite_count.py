@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_favorite_count(apps, schema_editor):
+    Highlight = apps.get_model('highlight', 'Highlight')
+    Favorite = apps.get_model('komen_like_rate', 'Favorite')
+    Highlight.objects.update(favorite_count=Coalesce(Subquery(
+        Favorite.objects.filter(highlight=OuterRef('pk'))
+        .order_by().values('highlight').annotate(result=Count('id')).values('result')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0015_highlight_rating_totals'),
+        ('komen_like_rate', '0006_comment_highlight_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='highlight',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_favorite_count, migrations.RunPython.noop),
+    ]
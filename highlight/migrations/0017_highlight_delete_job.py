@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:17
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0016_highlight_favorite_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HighlightDeleteJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done'), ('error', 'Error')], default='running', max_length=10)),
+                ('total', models.PositiveIntegerField()),
+                ('remaining', models.JSONField(default=list)),
+                ('deleted', models.JSONField(default=dict)),
+                ('message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
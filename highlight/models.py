@@ -1,8 +1,11 @@
 import re
 import uuid
 from django.db import models
+from django.db.models import Case, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast
 from django.utils import timezone
-from embed_video.backends import detect_backend,UnknownBackendException
+from highlight.backends import embed_metadata, url_key_for, video_url_key
+from kick_chronicle.caching import bump_version
 from tim.models import Standing
 
 class Highlight(models.Model):
@@ -17,6 +20,8 @@ class Highlight(models.Model):
     )
     description = models.TextField()
     created_at = models.DateTimeField(default=timezone.now)
+    # Modification stamp, part of the cache key of rendered cards.
+    updated_at = models.DateTimeField(auto_now=True)
     season = models.CharField(
         max_length=10,
         choices=Standing.SEASON_CHOICES, # Borrows choices from Standing
@@ -24,23 +29,93 @@ class Highlight(models.Model):
         blank=True,
         help_text="Select the season this highlight belongs to."
     )
+    # Parsed from 'name' and resolved against Standing on save, so list
+    # endpoints can join the standings instead of re-parsing every row.
+    home_team_name = models.CharField(max_length=100, blank=True, default='', db_index=True, editable=False)
+    away_team_name = models.CharField(max_length=100, blank=True, default='', db_index=True, editable=False)
+    home_standing = models.ForeignKey(
+        Standing,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='home_highlights',
+    )
+    away_standing = models.ForeignKey(
+        Standing,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='away_highlights',
+    )
+
+    # Computed from 'url' on save/import so rendering a card doesn't run
+    # backend detection and thumbnail lookups.
+    embed_backend = models.CharField(max_length=50, blank=True, default='', editable=False)
+    video_code = models.CharField(max_length=100, blank=True, default='', editable=False)
+    embed_url = models.URLField(max_length=2000, blank=True, default='', editable=False)
+    thumbnail_url = models.URLField(max_length=2000, blank=True, default='', editable=False)
+    # Normalized identity of 'url' (YouTube id etc.), so the same video
+    # can only be posted once and CSV re-imports update in place.
+    url_key = models.CharField(max_length=2000, unique=True, null=True, blank=True, editable=False)
+
+    # Running totals of the highlight's ratings, moved in the same
+    # transaction as every vote (komen_like_rate.ratings), so rankings
+    # sort on an indexed column instead of aggregating the Rating table.
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    avg_rating = models.GeneratedField(
+        expression=Case(
+            When(rating_count=0, then=Value(0.0)),
+            default=Cast('rating_sum', models.FloatField()) / Cast('rating_count', models.FloatField()),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+    # Moved by every favorite toggle (komen_like_rate.favorites).
+    favorite_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # Newest-first lists and their keyset cursor on (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='highlight_created_idx'),
+            # The same, filtered by season
+            models.Index(fields=['season', 'created_at', 'id'], name='highlight_season_created_idx'),
+            # Top rated rankings and their cursor on (avg_rating, id)
+            models.Index(fields=['avg_rating', 'id'], name='highlight_avg_rating_idx'),
+        ]
+
+    TEAM_FIELDS = ['home_team_name', 'away_team_name', 'home_standing', 'away_standing']
+    EMBED_FIELDS = ['embed_backend', 'video_code', 'embed_url', 'thumbnail_url']
+    RATING_FIELDS = ['rating_count', 'rating_sum']
+    COUNTER_FIELDS = RATING_FIELDS + ['favorite_count']
 
     def __str__(self):
         return self.name
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored URL so save() only re-detects the embed when it changes.
+        instance._loaded_url = instance.__dict__.get('url')
+        return instance
+
     @property
     def is_embeddable(self):
         """
         Checks if the URL is from a service recognized
-        by django-embed-video.
+        by django-embed-video (detected on save).
         """
-        try:
-            detect_backend(self.url)
-            return True
-        except UnknownBackendException:
-            # If this exception is raised, no backend was found.
-            return False
-    
+        return bool(self.embed_backend)
+
+    def refresh_embed_metadata(self, probe_thumbnail=True):
+        """Recomputes the stored embed fields and url_key from 'url'."""
+        for field, value in embed_metadata(self.url, probe_thumbnail).items():
+            setattr(self, field, value)
+        self.url_key = video_url_key(self.url, self.embed_backend, self.video_code)
+        self._loaded_url = self.url
+
     @property
     def _match_teams(self):
         """
@@ -51,69 +126,164 @@ class Highlight(models.Model):
         if hasattr(self, '_cached_team_names'):
             return self._cached_team_names
 
-        match = re.match(r'^(.*?)(\s+(vs|v|v\.)\s+)(.*)$', self.name, re.IGNORECASE)
-        
-        if match:
-            home_name = match.group(1).strip()
-            away_name = match.group(4).strip()
-            self._cached_team_names = (home_name, away_name)
-            return (home_name, away_name)
-        
-        self._cached_team_names = (None, None)
-        return (None, None)
+        self._cached_team_names = parse_team_names(self.name)
+        return self._cached_team_names
+
+    def resolve_teams(self, standing_index=None):
+        """
+        Parses the team names from 'name' and links the matching Standing
+        rows for this season. Pass a `build_standing_index` result to
+        resolve many highlights without a query per row.
+        """
+        self.__dict__.pop('_cached_team_names', None)
+        home_name, away_name = self._match_teams
+        self.home_team_name = (home_name or '')[:100]
+        self.away_team_name = (away_name or '')[:100]
+
+        if standing_index is None:
+            standing_index = build_standing_index([self.season])
+        self.home_standing = standing_index.get((self.season, normalize_team_name(home_name))) if home_name else None
+        self.away_standing = standing_index.get((self.season, normalize_team_name(away_name))) if away_name else None
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.resolve_teams()
+        elif {'name', 'season'} & set(update_fields):
+            self.resolve_teams()
+            kwargs['update_fields'] = set(kwargs['update_fields']) | set(self.TEAM_FIELDS)
+
+        url_changed = self.url != getattr(self, '_loaded_url', None) or not self.embed_backend
+        if url_changed and (update_fields is None or 'url' in update_fields):
+            self.refresh_embed_metadata()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | set(self.EMBED_FIELDS) | {'url_key'}
+        if update_fields is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'updated_at'}
+        elif not self._state.adding and not kwargs.get('force_insert'):
+            # The rating totals and favorite count may have moved since this
+            # instance was loaded (e.g. while an edit form was open); never
+            # write them back.
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated
+                and field.name not in self.COUNTER_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
 
     @property
     def home(self):
         """
-        Returns the Standing object for the Home team,
-        based on the 'name' field and linked 'season' string.
+        Returns the Standing object for the Home team, resolved on save.
+        Use select_related('home_standing') when listing highlights.
         """
-        home_name, _ = self._match_teams
-        
-        # Exit if name couldn't be parsed or season string isn't set
-        if not home_name or not self.season:
-            return None
-            
-        current_season_str = self.season
-        
-        try:
-            home_team_standing = Standing.objects.get(
-                season=current_season_str,
-                team__iexact=home_name
-            )
-            return home_team_standing
-        except Standing.DoesNotExist:
-            return None
-        except Standing.MultipleObjectsReturned:
-             return Standing.objects.filter(
-                season=current_season_str,
-                team__iexact=home_name
-            ).first()
+        return self.home_standing
 
     @property
     def away(self):
         """
-        Returns the Standing object for the Away team,
-        based on the 'name' field and linked 'season' string.
+        Returns the Standing object for the Away team, resolved on save.
+        Use select_related('away_standing') when listing highlights.
         """
-        _, away_name = self._match_teams
-        
-        # Exit if name couldn't be parsed or season string isn't set
-        if not away_name or not self.season:
-            return None
-            
-        current_season_str = self.season
-        
-        try:
-            away_team_standing = Standing.objects.get(
-                season=current_season_str,
-                team__iexact=away_name
-            )
-            return away_team_standing
-        except Standing.DoesNotExist:
-            return None
-        except Standing.MultipleObjectsReturned:
-             return Standing.objects.filter(
-                season=current_season_str,
-                team__iexact=away_name
-            ).first()
\ No newline at end of file
+        return self.away_standing
+
+
+def parse_team_names(name):
+    """(home name, away name) from a "Home vs Away" title, or (None, None)."""
+    match = re.match(r'^(.*?)(\s+(vs|v|v\.)\s+)(.*)$', name, re.IGNORECASE)
+    if match:
+        return (match.group(1).strip(), match.group(4).strip())
+    return (None, None)
+
+
+def normalize_team_name(name):
+    """Normalizes a team name the way `team__iexact` compares it."""
+    return (name or '').strip().casefold()
+
+
+def build_standing_index(seasons):
+    """
+    Loads every Standing for the given seasons in one query and returns
+    a dict mapping (season, normalized team name) -> Standing.
+    When a team appears twice in a season the best position wins,
+    matching the ordering of Standing.Meta.
+    """
+    index = {}
+    seasons = {season for season in seasons if season}
+    if not seasons:
+        return index
+
+    for standing in Standing.objects.filter(season__in=seasons).order_by('season', 'position'):
+        index.setdefault((standing.season, normalize_team_name(standing.team)), standing)
+    return index
+
+
+def resolve_highlight_teams(highlights):
+    """
+    Resolves teams for a batch of highlights that bypass save(), e.g.
+    before bulk_create/bulk_update. Runs one Standing query in total.
+    """
+    highlights = list(highlights)
+    standing_index = build_standing_index(h.season for h in highlights)
+    for highlight in highlights:
+        highlight.resolve_teams(standing_index)
+    return highlights
+
+
+def find_duplicate_highlight(url, exclude_pk=None):
+    """Returns the highlight already posted for the same video as `url`, or None."""
+    key = url_key_for(url)
+    if not key:
+        return None
+    return Highlight.objects.filter(url_key=key).exclude(pk=exclude_pk).only('id', 'name').first()
+
+
+def relink_standings(queryset):
+    """
+    Re-points home/away standings for every highlight in `queryset` from
+    the stored team names with a single UPDATE. Used after a season's
+    standings are replaced.
+    """
+    def standing_for(team_field):
+        return Subquery(
+            Standing.objects.filter(
+                season=OuterRef('season'),
+                team__iexact=OuterRef(team_field),
+            ).order_by('position').values('pk')[:1]
+        )
+
+    updated = queryset.update(
+        home_standing=standing_for('home_team_name'),
+        away_standing=standing_for('away_team_name'),
+    )
+    bump_version('highlight')
+    return updated
+
+
+class HighlightDeleteJob(models.Model):
+    """
+    A bulk delete of highlights run a batch at a time (highlight.deletion).
+    `remaining` holds the ids not deleted yet and moves in the same
+    transaction as each batch, so the row always matches the database.
+    """
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('error', 'Error'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    total = models.PositiveIntegerField()
+    remaining = models.JSONField(default=list)
+    deleted = models.JSONField(default=dict)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def as_dict(self):
+        job = {'status': self.status, 'total': self.total, 'deleted': self.deleted}
+        if self.message:
+            job['message'] = self.message
+        return job
@@ -0,0 +1,181 @@
+"""
+Full-text search for highlights.
+
+PostgreSQL keeps a weighted `search_vector` tsvector column (GIN indexed)
+on highlight_highlight; SQLite keeps an FTS5 table `highlight_search`.
+Both are created by migration 0009 and kept in sync by the signals in
+highlight/signals.py plus explicit calls from the bulk import paths,
+which skip signals. Any other backend falls back to icontains.
+
+On SQLite, FTS5 computes bm25 for every match before a LIMIT applies,
+so relevance order only pays off for selective queries. Past
+HIGHLIGHT_SEARCH_RANK_LIMIT matches the results come newest first
+instead: the planner walks highlight_created_idx and looks each row up
+among the matching FTS rowids, stopping once the page is full.
+"""
+import re
+import uuid
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'simple'
+FTS_TABLE = 'highlight_search'
+MAX_QUERY_TERMS = 8
+DEFAULT_RANK_LIMIT = 1000
+FTS_ROWID_FUNCTION = 'highlight_fts_rowid'
+
+_token_re = re.compile(r'\w+', re.UNICODE)
+_fts_available = {}
+
+
+def fts_rowid(highlight_id):
+    """Stable 64-bit FTS5 rowid for a highlight UUID, so updates/deletes hit the rowid index."""
+    if not isinstance(highlight_id, uuid.UUID):
+        highlight_id = uuid.UUID(str(highlight_id))
+    return int.from_bytes(highlight_id.bytes[:8], 'big', signed=True)
+
+
+def _fts_rowid_from_hex(value, _half=1 << 63, _full=1 << 64):
+    # fts_rowid() of a stored (32 hex digits) id; runs per scanned row
+    if value is None:
+        return None
+    rowid = int(value[:16], 16)
+    return rowid - _full if rowid >= _half else rowid
+
+
+def register_search_functions(db_connection):
+    """Adds the SQL functions the SQLite search uses; called for every new connection."""
+    if db_connection.vendor == 'sqlite':
+        db_connection.connection.create_function(FTS_ROWID_FUNCTION, 1, _fts_rowid_from_hex, deterministic=True)
+
+
+def search_backend():
+    """Returns 'postgresql', 'sqlite' or None when no full-text index is available."""
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite':
+        key = connection.settings_dict['NAME']
+        if key not in _fts_available:
+            _fts_available[key] = FTS_TABLE in connection.introspection.table_names()
+        if _fts_available[key]:
+            return 'sqlite'
+    return None
+
+
+def _terms(query):
+    return _token_re.findall((query or '').lower())[:MAX_QUERY_TERMS]
+
+
+def search_highlights(queryset, query):
+    """
+    Filters `queryset` to highlights whose name or description match every
+    word of `query` (prefix match, so it works while the user is typing)
+    and orders them by relevance, best first (on SQLite, newest first
+    when the query matches more than HIGHLIGHT_SEARCH_RANK_LIMIT).
+    """
+    terms = _terms(query)
+    backend = search_backend()
+
+    if not terms or backend is None:
+        return queryset.filter(
+            Q(name__icontains=query) | Q(description__icontains=query)
+        )
+
+    if backend == 'postgresql':
+        tsquery = ' & '.join(f"{term}:*" for term in terms)
+        return queryset.filter(
+            RawSQL(
+                "highlight_highlight.search_vector @@ to_tsquery(%s, %s)",
+                (SEARCH_CONFIG, tsquery),
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                "ts_rank(highlight_highlight.search_vector, to_tsquery(%s, %s))",
+                (SEARCH_CONFIG, tsquery),
+                output_field=FloatField(),
+            )
+        ).order_by('-search_rank', '-created_at')
+
+    fts_query = ' '.join('"%s"*' % term.replace('"', '""') for term in terms)
+    rank_limit = getattr(settings, 'HIGHLIGHT_SEARCH_RANK_LIMIT', DEFAULT_RANK_LIMIT)
+    if _count_matches(fts_query, rank_limit + 1) > rank_limit:
+        return queryset.extra(
+            where=[
+                f"{FTS_ROWID_FUNCTION}(highlight_highlight.id) IN "
+                f"(SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)",
+            ],
+            params=[fts_query],
+        ).order_by('-created_at', '-id')
+
+    # FTS5: join the virtual table so MATCH drives the plan and each match is
+    # looked up by primary key. FTS5 rank is bm25, lower is better.
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f"{FTS_TABLE}.highlight_id = highlight_highlight.id",
+            f"{FTS_TABLE} MATCH %s",
+        ],
+        params=[fts_query],
+        select={'search_rank': f"-{FTS_TABLE}.rank"},
+    ).order_by('-search_rank', '-created_at')
+
+
+def _count_matches(fts_query, limit):
+    """Matching rows, counted up to `limit`; rowids only, so no bm25 and no content reads."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT count(*) FROM (SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT %s)",
+            [fts_query, limit],
+        )
+        return cursor.fetchone()[0]
+
+
+def index_highlights(highlights):
+    """(Re)indexes the given Highlight instances."""
+    highlights = [h for h in highlights if h.pk]
+    backend = search_backend()
+    if not highlights or backend is None:
+        return
+
+    with connection.cursor() as cursor:
+        if backend == 'postgresql':
+            cursor.execute(
+                "UPDATE highlight_highlight SET search_vector = "
+                "setweight(to_tsvector(%s, coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector(%s, coalesce(description, '')), 'B') "
+                "WHERE id = ANY(%s)",
+                [SEARCH_CONFIG, SEARCH_CONFIG, [h.pk for h in highlights]],
+            )
+            return
+
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(fts_rowid(h.pk),) for h in highlights],
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, highlight_id, name, description) VALUES (%s, %s, %s, %s)",
+            [(fts_rowid(h.pk), h.pk.hex, h.name, h.description) for h in highlights],
+        )
+
+
+def clear_search_index():
+    """Empties the SQLite FTS table before a full rebuild."""
+    if search_backend() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+
+def unindex_highlights(highlight_ids):
+    """Removes deleted highlights from the index (PostgreSQL drops them with the row)."""
+    highlight_ids = list(highlight_ids)
+    if not highlight_ids or search_backend() != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(fts_rowid(pk),) for pk in highlight_ids],
+        )
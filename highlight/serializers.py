@@ -0,0 +1,46 @@
+"""
+JSON shapes of highlights for the Flutter endpoints.
+
+The payload is described field by field (see kick_chronicle.fieldsets)
+so endpoints can honour ?fields= / ?include= and load only the columns
+they send.
+"""
+from kick_chronicle.fieldsets import serialize_fieldset
+
+STANDING_COLUMNS = ['team', 'played', 'won', 'drawn', 'lost']
+
+
+def standing_json(standing):
+    if standing is None:
+        return None
+    return {column: getattr(standing, column) for column in STANDING_COLUMNS}
+
+
+HIGHLIGHT_ATTRIBUTES = {
+    'id': (['id'], lambda highlight: highlight.pk),
+    'name': (['name'], lambda highlight: highlight.name),
+    'url': (['url'], lambda highlight: highlight.url),
+    'description': (['description'], lambda highlight: highlight.description),
+    'season': (['season'], lambda highlight: highlight.season),
+    'manual_thumbnail_url': (['manual_thumbnail_url'], lambda highlight: highlight.manual_thumbnail_url),
+    'thumbnail_url': (['thumbnail_url'], lambda highlight: highlight.thumbnail_url),
+    'embed_url': (['embed_url'], lambda highlight: highlight.embed_url),
+    'created_at': (['created_at'], lambda highlight: highlight.created_at.isoformat()),
+}
+
+HIGHLIGHT_RELATIONS = {
+    'home_standing': ('home_standing', STANDING_COLUMNS, standing_json),
+    'away_standing': ('away_standing', STANDING_COLUMNS, standing_json),
+}
+
+FULL_FIELDSET = (list(HIGHLIGHT_ATTRIBUTES), list(HIGHLIGHT_RELATIONS))
+
+
+def highlight_attributes(*names):
+    """A subset of HIGHLIGHT_ATTRIBUTES, for endpoints with a smaller payload."""
+    return {name: HIGHLIGHT_ATTRIBUTES[name] for name in names}
+
+
+def serialize_highlight(highlight, fieldset=FULL_FIELDSET):
+    """JSON shape of a highlight shared by the list and detail endpoints."""
+    return serialize_fieldset(highlight, fieldset, HIGHLIGHT_ATTRIBUTES, HIGHLIGHT_RELATIONS)
@@ -0,0 +1,23 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from highlight.models import Highlight
+from highlight.search import index_highlights, register_search_functions, unindex_highlights
+from kick_chronicle.caching import bump_version
+
+
+@receiver(post_save, sender=Highlight)
+def index_highlight_on_save(sender, instance, **kwargs):
+    index_highlights([instance])
+    bump_version('highlight')
+
+
+@receiver(post_delete, sender=Highlight)
+def unindex_highlight_on_delete(sender, instance, **kwargs):
+    unindex_highlights([instance.pk])
+    bump_version('highlight')
+
+
+@receiver(connection_created)
+def add_search_functions(sender, connection, **kwargs):
+    register_search_functions(connection)
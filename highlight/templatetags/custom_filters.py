@@ -1,10 +1,9 @@
 from django import template
+from highlight.backends import force_https as _force_https
 
 register = template.Library()
 
 @register.filter
 def force_https(value):
     """Replace http:// with https:// at the start of a URL"""
-    if isinstance(value, str) and value.startswith("http://"):
-        return value.replace("http://", "https://", 1)
-    return value
\ No newline at end of file
+    return _force_https(value)
\ No newline at end of file
@@ -1,3 +1,315 @@
-from django.test import TestCase
+from unittest import skipUnless
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from kick_chronicle.caching import response_caching_enabled
+from kick_chronicle.dates import date_range_filter
+from kick_chronicle.pagination import InvalidCursor, decode_cursor, encode_cursor
+from komen_like_rate.favorites import toggle_highlight_favorite
+from komen_like_rate.models import Comment, Rating
+from komen_like_rate.ratings import rate_highlight
+from tim.models import Standing
+from .deletion import run_delete_job, start_delete_job
+from .importers import import_highlights_csv
+from .search import search_backend, search_highlights
+from .models import Highlight
+from .views import HIGHLIGHT_SORTS
 
-# Create your tests here.
+
+def make_highlights(count):
+    return [
+        Highlight.objects.create(name=f"Highlight {i}", url=f"https://example.com/{i}.mp4", description="")
+        for i in range(count)
+    ]
+
+
+def make_match_highlights(count, user):
+    """`count` "Home vs Away" highlights with both standings, rated and favorited by `user`."""
+    teams = [f"Team {i}" for i in range(2 * count)]
+    for position, team in enumerate(teams, start=1):
+        Standing.objects.create(
+            season='24/25', position=position, team=team, played=1, won=1, drawn=0, lost=0,
+            goals_for=1, goals_against=0, goal_difference=1, points=3, uploaded_by=user,
+        )
+    highlights = []
+    for i in range(count):
+        highlight = Highlight.objects.create(
+            name=f"{teams[2 * i]} vs {teams[2 * i + 1]}", url=f"https://example.com/match-{i}.mp4",
+            description="", season='24/25',
+        )
+        rate_highlight(user, highlight, 4)
+        toggle_highlight_favorite(user, highlight.pk)
+        highlights.append(highlight)
+    return highlights
+
+
+class ListQueryCountTests(TestCase):
+    """The Flutter lists run a fixed number of queries however many highlights they send."""
+
+    def assert_queries_per_list(self, count, url, expected, login=False):
+        Highlight.objects.all().delete()
+        Standing.objects.all().delete()
+        user = User.objects.create_user(f"fan-{count}")
+        highlights = make_match_highlights(count, user)
+        self.assertTrue(all(h.home_standing_id and h.away_standing_id for h in highlights))
+        if login:
+            self.client.force_login(user)
+        cache.clear()
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_highlight_json(self):
+        for count in (1, 8):
+            with self.subTest(count=count):
+                data = self.assert_queries_per_list(count, reverse('highlight:highlight_json'), 2)
+                self.assertTrue(all(item['home_standing'] and item['away_standing'] for item in data))
+
+    def test_top_rated_mobile(self):
+        for count in (1, 8):
+            with self.subTest(count=count):
+                data = self.assert_queries_per_list(
+                    count, reverse('komen_like_rate:mobile_top_rated') + '?include=home_standing,away_standing', 2,
+                )
+                self.assertEqual(len(data['highlights']), count)
+
+    def test_favorite_list_mobile(self):
+        for count in (1, 8):
+            with self.subTest(count=count):
+                data = self.assert_queries_per_list(
+                    count, reverse('komen_like_rate:mobile_favorite_list') + '?include=home_standing,away_standing',
+                    3, login=True,
+                )
+                self.assertEqual(len(data['favorites']), count)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_highlights(2)
+
+    def get_names(self):
+        response = self.client.get(reverse('highlight:highlight_json'))
+        return response['X-Cache'], [item['name'] for item in response.json()]
+
+    def test_off_with_a_per_process_cache(self):
+        self.assertFalse(response_caching_enabled())
+        self.assertEqual(self.get_names()[0], 'BYPASS')
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}):
+            self.assertTrue(response_caching_enabled())
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    def test_a_write_changes_the_next_response(self):
+        status, names = self.get_names()
+        self.assertEqual((status, self.get_names()), ('MISS', ('HIT', names)))
+        with self.captureOnCommitCallbacks(execute=True):
+            Highlight.objects.create(name="Fresh", url="https://example.com/fresh.mp4", description="")
+        status, fresh_names = self.get_names()
+        self.assertEqual(status, 'MISS')
+        self.assertEqual(fresh_names, ["Fresh"] + names)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    def test_main_page_follows_highlight_edits(self):
+        url = reverse('highlight:show_main_page')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        highlight = Highlight.objects.first()
+        highlight.name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            highlight.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, "Renamed")
+
+    def test_main_page_not_cached_with_a_per_process_cache(self):
+        self.assertEqual(self.client.get(reverse('highlight:show_main_page'))['X-Cache'], 'BYPASS')
+
+
+class CursorValidationTests(TestCase):
+    TAMPERED = [["x", "y"], ["a", "b"], [None, None], [[], {}], ["x"], []]
+
+    @classmethod
+    def setUpTestData(cls):
+        make_highlights(3)
+
+    def test_tampered_cursors_are_rejected(self):
+        url = reverse('highlight:highlight_json')
+        for sort in ('newest', 'oldest', 'top_rated'):
+            for values in self.TAMPERED:
+                with self.subTest(sort=sort, values=values):
+                    response = self.client.get(url, {'sort': sort, 'cursor': encode_cursor(values)})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json()['message'], 'Invalid cursor')
+        # Numbers where the date belongs
+        response = self.client.get(url, {'sort': 'newest', 'cursor': encode_cursor([1, 2])})
+        self.assertEqual(response.status_code, 400)
+
+    def test_garbage_cursor_is_rejected(self):
+        response = self.client.get(reverse('highlight:highlight_json'), {'cursor': '!!not-base64'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_tampered_cursors_on_mobile_lists(self):
+        for name in ('komen_like_rate:mobile_top_rated', 'komen_like_rate:mobile_top_rated_window'):
+            for values in self.TAMPERED:
+                with self.subTest(name=name, values=values):
+                    response = self.client.get(reverse(name), {'cursor': encode_cursor(values)})
+                    self.assertEqual(response.status_code, 400)
+
+    def test_cursor_from_a_page_still_works(self):
+        url = reverse('highlight:highlight_json')
+        first = self.client.get(url, {'cursor': '', 'limit': 2}).json()
+        second = self.client.get(url, {'cursor': first['next_cursor'], 'limit': 2})
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(second.json()['results']), 1)
+
+    def test_decode_converts_values(self):
+        created_at = Highlight._meta.get_field('created_at')
+        highlight_id = Highlight._meta.get_field('id')
+        highlight = Highlight.objects.first()
+        token = encode_cursor([highlight.created_at, highlight.pk])
+        self.assertEqual(decode_cursor(token, [created_at, highlight_id]), [highlight.created_at, highlight.pk])
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(encode_cursor(["x", "y"]), [created_at, highlight_id])
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        names = ["Chelsea vs Everton", "Chelsea vs Fulham late winner", "Arsenal vs Wolves", "Chelsea vs Burnley"]
+        cls.highlights = [
+            Highlight.objects.create(name=name, url=f"https://example.com/search-{i}.mp4", description="")
+            for i, name in enumerate(names)
+        ]
+
+    def names(self, query):
+        return [h.name for h in search_highlights(Highlight.objects.all(), query)]
+
+    def test_matches_every_word_by_prefix(self):
+        self.assertCountEqual(
+            self.names("chel"), ["Chelsea vs Everton", "Chelsea vs Fulham late winner", "Chelsea vs Burnley"],
+        )
+        self.assertEqual(self.names("chel late"), ["Chelsea vs Fulham late winner"])
+        self.assertEqual(self.names("liverpool"), [])
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite FTS5")
+    def test_many_matches_come_newest_first(self):
+        self.assertEqual(search_backend(), 'sqlite')
+        with override_settings(HIGHLIGHT_SEARCH_RANK_LIMIT=2):
+            self.assertEqual(self.names("chel"), ["Chelsea vs Burnley", "Chelsea vs Fulham late winner", "Chelsea vs Everton"])
+            # Under the limit: ranked as before
+            self.assertEqual(self.names("chel late"), ["Chelsea vs Fulham late winner"])
+
+
+class IndexUsageTests(TestCase):
+    """The highlight_json list queries are answered from the created_at indexes, without a sort."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(50):
+            Highlight.objects.create(
+                name=f"Highlight {i}", url=f"https://example.com/{i}.mp4", description="",
+                season='24/25' if i % 2 else '23/24',
+            )
+
+    def page(self, sort, **filters):
+        return Highlight.objects.filter(**filters).order_by(*HIGHLIGHT_SORTS[sort])[:11]
+
+    def plans(self):
+        return [
+            (self.page('newest', **date_range_filter('created_at', '2024-01-01', '2030-12-31')), 'highlight_created_idx'),
+            (self.page('newest', season='24/25'), 'highlight_season_created_idx'),
+            (self.page('oldest'), 'highlight_created_idx'),
+        ]
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite plan format")
+    def test_sqlite_plans(self):
+        for queryset, index in self.plans():
+            plan = queryset.explain()
+            with self.subTest(index=index, plan=plan):
+                self.assertIn(f"USING INDEX {index}", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+    @skipUnless(connection.vendor == 'postgresql', "Needs PostgreSQL")
+    def test_postgres_plans(self):
+        with connection.cursor() as cursor:
+            # A table this small would otherwise be read sequentially
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        for queryset, index in self.plans():
+            plan = queryset.explain()
+            with self.subTest(index=index, plan=plan):
+                self.assertIn(index, plan)
+                self.assertNotIn("Sort", plan)
+
+
+class CsvImportTests(TestCase):
+    CSV = (
+        "Name,URL,Description,Manual Thumbnail URL,Season\n"
+        "Arsenal vs Chelsea,https://www.youtube.com/watch?v=aaaaaaaaaaa,First,,2024/2025\n"
+        "Everton vs Fulham,https://www.youtube.com/watch?v=bbbbbbbbbbb,Only,,2024/2025\n"
+        "Arsenal vs Chelsea,https://youtu.be/aaaaaaaaaaa,Second,,2024/2025\n"
+    )
+
+    def import_csv(self):
+        return import_highlights_csv(ContentFile(self.CSV.encode(), name='highlights.csv'))
+
+    def test_repeated_video_keeps_the_last_row(self):
+        report = self.import_csv()
+        self.assertEqual((report.created, report.updated, report.unchanged, report.duplicates), (2, 0, 0, 1))
+        self.assertEqual(Highlight.objects.count(), 2)
+        self.assertEqual(Highlight.objects.get(name="Arsenal vs Chelsea").description, "Second")
+
+    def test_importing_the_same_file_again_changes_nothing(self):
+        self.import_csv()
+        updated_at = dict(Highlight.objects.values_list('pk', 'updated_at'))
+        report = self.import_csv()
+        self.assertEqual((report.created, report.updated, report.unchanged), (0, 0, 2))
+        self.assertEqual(dict(Highlight.objects.values_list('pk', 'updated_at')), updated_at)
+
+
+class DeleteJobTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='x')
+        self.highlights = make_highlights(5)
+        for highlight in self.highlights:
+            Comment.objects.create(user=self.admin, highlight=highlight, content="Nice")
+            rate_highlight(self.admin, highlight, 5)
+
+    def test_a_batch_per_run(self):
+        job = start_delete_job([h.pk for h in self.highlights], batch_size=2)
+        self.assertEqual((job.status, len(job.remaining), Highlight.objects.count()), ('running', 3, 3))
+        run_delete_job(job.pk, batch_size=2)
+        job = run_delete_job(job.pk, batch_size=2)
+        self.assertEqual((job.status, job.remaining), ('done', []))
+        self.assertEqual(
+            {label: rows for label, rows in job.deleted.items() if rows},
+            {
+                'highlight.Highlight': 5, 'komen_like_rate.Comment': 5,
+                'komen_like_rate.LeaderboardEntry': 5, 'komen_like_rate.Rating': 5,
+                'komen_like_rate.RatingDailyBucket': 5,
+            },
+        )
+        self.assertFalse(Highlight.objects.exists() or Comment.objects.exists() or Rating.objects.exists())
+        # A finished job is left alone
+        self.assertEqual(run_delete_job(job.pk).deleted, job.deleted)
+
+    @override_settings(HIGHLIGHT_DELETE_BACKGROUND_THRESHOLD=2, HIGHLIGHT_DELETE_BATCH_SIZE=2)
+    def test_polling_finishes_the_job(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse('highlight:admin_highlight_flutter'),
+            {'ids': [str(h.pk) for h in self.highlights]}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 202)
+        polls = [self.client.get(response.json()['status_url']).json()['job'] for _ in range(2)]
+        self.assertEqual([job['status'] for job in polls], ['running', 'done'])
+        self.assertEqual(polls[-1]['deleted']['highlight.Highlight'], 5)
+        self.assertFalse(Highlight.objects.exists())
+
+    def test_unknown_job(self):
+        self.client.force_login(self.admin)
+        url = reverse('highlight:delete_job_status_flutter', args=['00000000-0000-0000-0000-000000000000'])
+        self.assertEqual(self.client.get(url).status_code, 404)
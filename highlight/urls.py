@@ -1,6 +1,7 @@
 from django.urls import path
 from highlight.views import show_highlight, show_main_page, add_highlight, edit_highlight, delete_highlight, add_highlights_csv
 from highlight.views import highlight_json, edit_highlight_flutter, add_highlight_flutter, delete_highlight_flutter, add_highlights_csv_flutter, admin_highlight_flutter
+from highlight.views import delete_job_status_flutter, response_cache_stats, highlight_detail_json
 
 app_name = 'highlight'
 
@@ -12,9 +13,12 @@ urlpatterns = [
     path('<uuid:id>/edit',edit_highlight,name='edit_highlight'),
     path('<uuid:id>/delete',delete_highlight,name='delete_highlight'),
     path('highlights-json/',highlight_json,name='highlight_json'),
+    path('highlights-json/<uuid:id>/',highlight_detail_json,name='highlight_detail_json'),
     path('edit-highlight-flutter/<uuid:id>/', edit_highlight_flutter, name='edit_highlight_flutter'),
     path('add-highlight-flutter/', add_highlight_flutter, name='add_highlight_flutter'),
     path('delete-highlight-flutter/<uuid:id>/', delete_highlight_flutter, name='delete_highlight_flutter'),
     path('add-highlights-csv-flutter/', add_highlights_csv_flutter, name='add_highlights_csv_flutter'),
     path('admin-highlight-flutter/', admin_highlight_flutter, name='admin_highlight_flutter'),
+    path('cache-stats/', response_cache_stats, name='response_cache_stats'),
+    path('admin-highlight-flutter/delete-jobs/<uuid:job_id>/', delete_job_status_flutter, name='delete_job_status_flutter'),
 ]
\ No newline at end of file
@@ -1,26 +1,46 @@
-import csv
-import io
 import json
+import uuid
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import user_passes_test
 from django.http import HttpResponseRedirect, HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from highlight.models import Highlight
+from highlight.models import Highlight, find_duplicate_highlight
 from highlight.forms import HighlightForm, HiglightFormCsv
+from highlight.detail import highlight_detail_queryset
+from highlight.deletion import delete_highlights, run_delete_job, should_delete_in_background, start_delete_job
+from highlight.importers import import_highlights_csv
+from highlight.search import search_highlights
+from highlight.serializers import HIGHLIGHT_ATTRIBUTES, HIGHLIGHT_RELATIONS, serialize_highlight
+from tim.models import Standing
+from komen_like_rate.comments import comment_page
+from komen_like_rate.user_state import user_highlight_states
 from django.contrib import messages
-from django.db import transaction
-from komen_like_rate.models import Favorite
 from django.core.paginator import Paginator
+from kick_chronicle.caching import cache_stats, cached_response
+from kick_chronicle.dates import date_range_filter
+from kick_chronicle.fieldsets import InvalidFieldset, apply_fieldset, parse_fieldset
+from kick_chronicle.pagination import InvalidCursor, get_page_size, paginate_by_cursor
+from kick_chronicle.streaming import stream_json_array
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 
 def show_main_page(request):
+    # Anonymous visitors all see the same page, so it is cached whole until
+    # a highlight changes (only with a shared cache, see
+    # kick_chronicle.caching); logged-in users still get cached cards.
+    if not request.user.is_authenticated:
+        params = [(name, request.GET[name]) for name in ('q', 'page') if name in request.GET]
+        return cached_response('highlight_main_page', ('highlight',), params, lambda: _render_main_page(request))
+    return _render_main_page(request)
+
+def _render_main_page(request):
     query = request.GET.get('q')
 
     if query:
-        highlight_list = Highlight.objects.filter(name__icontains=query).order_by('-id')
+        highlight_list = search_highlights(Highlight.objects.all(), query)
     else:
-        highlight_list = Highlight.objects.all().order_by('-id')
+        highlight_list = Highlight.objects.all().order_by('-created_at', '-id')
     
     paginator = Paginator(highlight_list, 12)  # <-- Show 12 highlights per page
     page_number = request.GET.get('page')
@@ -33,25 +53,38 @@ def show_main_page(request):
     return render(request, "highlight_main.html", context)
 
 def show_highlight(request, id):
-    highlight = get_object_or_404(Highlight, pk=id)
+    # Standings, rating/comment counts and the user's favorite in one query
+    highlight = get_object_or_404(highlight_detail_queryset(request.user), pk=id)
+
+    # First page of comments; the rest load with "Load more comments"
+    comments, next_cursor = comment_page(highlight, user=request.user)
 
     # Ambil param "from" dari URL, misalnya ?from=favorite
     from_page = request.GET.get('from')
 
-    is_favorited = False
-    if request.user.is_authenticated:
-        is_favorited = Favorite.objects.filter(
-            user=request.user,
-            highlight=highlight
-        ).exists()
-
     context = {
         'highlight': highlight,
-        'is_favorited': is_favorited,
+        'comments': comments,
+        'next_cursor': next_cursor,
+        'is_favorited': highlight.is_favorited,
         'from_page': from_page,  # supaya bisa ditampilkan di template
     }
     return render(request, "highlight_detail.html", context)
 
+def highlight_detail_json(request, id):
+    highlight = get_object_or_404(highlight_detail_queryset(request.user), pk=id)
+
+    data = serialize_highlight(highlight)
+    data.update({
+        "avg_rating": round(highlight.avg_rating, 2) if highlight.rating_count else None,
+        "rating_count": highlight.rating_count,
+        "comment_count": highlight.comment_count,
+        "favorite_count": highlight.favorite_count,
+        "is_favorited": highlight.is_favorited,
+        "user_rating": highlight.user_rating,
+    })
+    return JsonResponse(data)
+
 def add_highlight(request):
     if (request.user.is_authenticated and request.user.is_staff):
         form = HighlightForm(request.POST or None)
@@ -74,6 +107,10 @@ def add_highlight_flutter(request):
         try:
             data = json.loads(request.body)
 
+            duplicate = find_duplicate_highlight(data['url'])
+            if duplicate:
+                return JsonResponse({"status": "error", "message": f'This video has already been posted as "{duplicate.name}".'}, status=400)
+
             new_highlight = Highlight.objects.create(
                 name=data['name'],
                 url=data['url'],
@@ -82,8 +119,6 @@ def add_highlight_flutter(request):
                 season=data['season'],
                 # created_at is usually auto_now_add=True in models, so no need to set it manually
             )
-            
-            new_highlight.save()
 
             return JsonResponse({"status": "success", "message": "Highlight created!"}, status=201)
         except Exception as e:
@@ -120,6 +155,10 @@ def edit_highlight_flutter(request, id):
             highlight.manual_thumbnail_url = data.get('manual_thumbnail_url', highlight.manual_thumbnail_url)
             highlight.description = data.get('description', highlight.description)
             highlight.season = data.get('season', highlight.season)
+
+            duplicate = find_duplicate_highlight(highlight.url, exclude_pk=highlight.pk)
+            if duplicate:
+                return JsonResponse({"status": "error", "message": f'This video has already been posted as "{duplicate.name}".'}, status=400)
             
             highlight.save()
 
@@ -131,8 +170,8 @@ def edit_highlight_flutter(request, id):
 
 def delete_highlight(request, id):
     if (request.user.is_authenticated and request.user.is_staff):
-        highlight = get_object_or_404(Highlight, pk=id)
-        highlight.delete()
+        highlight = get_object_or_404(Highlight.objects.only('id'), pk=id)
+        delete_highlights([highlight.pk])
         return HttpResponseRedirect(reverse('highlight:show_main_page'))
     else:
         return HttpResponseForbidden("403 FORBIDDEN")
@@ -142,9 +181,9 @@ def delete_highlight(request, id):
 def delete_highlight_flutter(request, id):
     if request.method == 'POST':
         try:
-            highlight = get_object_or_404(Highlight, pk=id)
-            highlight.delete()
-            return JsonResponse({"status": "success", "message": "Highlight deleted!"}, status=200)
+            highlight = get_object_or_404(Highlight.objects.only('id'), pk=id)
+            deleted = delete_highlights([highlight.pk])
+            return JsonResponse({"status": "success", "message": "Highlight deleted!", "deleted": deleted}, status=200)
         except Exception as e:
             return JsonResponse({"status": "error", "message": str(e)}, status=500)
     
@@ -163,91 +202,18 @@ def add_highlights_csv(request):
                     messages.error(request, 'Invalid file format. Please upload a .csv file.')
                     return redirect('highlight:add_highlight_csv') # Adjust URL name
 
-                # try:
-                # Decode file and prepare for CSV reader
-                decoded_file = csv_file.read().decode('utf-8')
-                io_string = io.StringIO(decoded_file)
-                reader = csv.reader(io_string)
-                header = next(reader) # Skip header row
-
-                highlights_to_create = []
-                skipped_rows = []
-
-                with transaction.atomic():
-                    for row_idx, row in enumerate(reader, start=2):
-                        # try:
-                        # --- Map CSV Columns to Highlight Model Fields ---
-                        # Check if essential columns exist
-                        if len(row) < 2:
-                            skipped_rows.append(f"Row {row_idx}: Too few columns (Need at least Name and URL).")
-                            continue
-
-                        name_val = row[0].strip()
-                        url_val = row[1].strip()
-
-                        # Optional fields (check if columns exist before accessing)
-                        description_val = row[2].strip() if len(row) > 2 and row[2] else "" # Default to empty string
-                        thumbnail_url_val = row[3].strip() if len(row) > 3 and row[3] else None # Default to None
-                        
-                        season_val = row[4].strip()
-                        season_mapping = {
-                            '2022/2023': '22/23',
-                            '2023/2024': '23/24',
-                            '2024/2025': '24/25',
-                        }
-
-                        if season_val in season_mapping:
-                            season_val = season_mapping[season_val]
-                        elif season_val not in season_mapping.values():
-                            season_val = None
-
-                        # Basic Validation
-                        # if not name_val:
-                        #     skipped_rows.append(f"Row {row_idx}: Name is missing.")
-                        #     continue
-                        # if not url_val:
-                        #     skipped_rows.append(f"Row {row_idx}: URL is missing.")
-                        #     continue
-
-                        # Add Highlight instance to list for bulk creation
-                        highlights_to_create.append(
-                            Highlight(
-                                name=name_val,
-                                url=url_val,
-                                description=description_val,
-                                manual_thumbnail_url=thumbnail_url_val,
-                                season=season_val
-                                # created_at is handled automatically by the model's default
-                            )
-                        )
-                    # except IndexError:
-                    #     skipped_rows.append(f"Row {row_idx}: Error reading columns (IndexError).")
-                    #     continue
-                    # except Exception as e: # Catch other potential errors per row
-                    #     skipped_rows.append(f"Row {row_idx}: Unexpected error ({e}).")
-                    #     continue
-
-                # Bulk create highlights
-                # if highlights_to_create:
-                created_objects = Highlight.objects.bulk_create(highlights_to_create)
-                messages.success(request, f"Successfully imported {len(created_objects)} highlights.")
-                # else:
-                #     messages.info(request, "No new highlights found to import.")
+                # Unknown seasons are imported without a season here.
+                report = import_highlights_csv(csv_file, require_season=False)
+                messages.success(request, report.summary)
 
                 # Report skipped rows
-                # if skipped_rows:
-                #     messages.warning(request, "Some rows were skipped:")
-                #     for skipped in skipped_rows[:10]:
-                #         messages.warning(request, skipped)
-                #     if len(skipped_rows) > 10:
-                #         messages.warning(request, f"...and {len(skipped_rows) - 10} more.")
-
-                # except UnicodeDecodeError:
-                #     messages.error(request, 'Error reading file. Please ensure it is UTF-8 encoded.')
-                # except csv.Error as e:
-                #     messages.error(request, f'Error processing CSV file structure: {e}')
-                # except Exception as e:
-                #     messages.error(request, f'An unexpected error occurred during import: {e}')
+                if report.error_count:
+                    messages.warning(request, "Some rows were skipped:")
+                    skipped = report.skipped_messages
+                    for message in skipped[:10]:
+                        messages.warning(request, message)
+                    if report.error_count > 10:
+                        messages.warning(request, f"...and {report.error_count - 10} more.")
 
                 return redirect('highlight:show_main_page')
         else: # GET request
@@ -271,78 +237,27 @@ def add_highlights_csv_flutter(request):
             if not csv_file.name.endswith('.csv'):
                 return JsonResponse({"status": "error", "message": "File is not a CSV"}, status=400)
 
-            # 3. Read and Decode
-            file_data = csv_file.read().decode('utf-8')
-            io_string = io.StringIO(file_data)
-            reader = csv.reader(io_string)
-            
-            # Skip header (assuming 1st row is header based on your screenshot logic)
-            next(reader, None) 
-
-            highlights_to_create = []
-            skipped_rows = []
-
-            # 4. Parse Rows
+            # 3. Stream, validate and insert in chunks
             # row[0] -> Name
             # row[1] -> URL
             # row[2] -> Description (optional)
             # row[3] -> Manual Thumbnail URL (optional)
             # row[4] -> Season (e.g., '2024/2025')
+            report = import_highlights_csv(csv_file, require_season=True)
 
-            season_mapping = {
-                '2022/2023': '22/23',
-                '2023/2024': '23/24',
-                '2024/2025': '24/25',
-            }
-
-            for row_idx, row in enumerate(reader, start=2):
-                if len(row) < 2: # Need at least Name and URL
-                    skipped_rows.append(f"Row {row_idx}: Too few columns")
-                    continue
-
-                name = row[0].strip()
-                url = row[1].strip()
-                
-                if not name or not url:
-                    skipped_rows.append(f"Row {row_idx}: Missing name or URL")
-                    continue
-
-                description = row[2].strip() if len(row) > 2 else ""
-                manual_thumbnail_url = row[3].strip() if len(row) > 3 else None
-                if manual_thumbnail_url == "":
-                    manual_thumbnail_url = None
-                
-                season_raw = row[4].strip() if len(row) > 4 else ""
-                season_val = season_mapping.get(season_raw) 
-                
-                # If season not found, fallback or skip? 
-                # For simplicity, let's default to None or handle it.
-                # Your screenshot shows strict checking, but let's be lenient for the flutter test.
-                if not season_val:
-                     skipped_rows.append(f"Row {row_idx}: Invalid season format '{season_raw}'")
-                     continue
-
-                highlights_to_create.append(Highlight(
-                    name=name,
-                    url=url,
-                    description=description,
-                    manual_thumbnail_url=manual_thumbnail_url,
-                    season=season_val
-                ))
-
-            # 5. Bulk Create
-            if highlights_to_create:
-                Highlight.objects.bulk_create(highlights_to_create)
+            if report.imported:
                 return JsonResponse({
                     "status": "success", 
-                    "message": f"Successfully imported {len(highlights_to_create)} highlights.",
-                    "skipped": skipped_rows
+                    "message": report.summary,
+                    "skipped": report.skipped_messages,
+                    "report": report.as_dict(),
                 }, status=201)
             else:
                 return JsonResponse({
                     "status": "error", 
                     "message": "No valid rows found to import.",
-                    "skipped": skipped_rows
+                    "skipped": report.skipped_messages,
+                    "report": report.as_dict(),
                 }, status=400)
 
         except Exception as e:
@@ -350,71 +265,150 @@ def add_highlights_csv_flutter(request):
 
     return JsonResponse({"status": "error", "message": "Invalid method"}, status=401)
 
-def highlight_json(request):
-    highlight_list = Highlight.objects.all()
+# Tables the highlight_json payload is built from (standings are embedded).
+HIGHLIGHT_JSON_TABLES = ('highlight', 'standing')
+# ?include=user_state adds the user's favorite/rating to each item, after the cache
+USER_STATE = 'user_state'
+HIGHLIGHT_JSON_PARAMS = ('q', 'page', 'cursor', 'limit', 'season', 'sort', 'start_date', 'end_date', 'fields', 'include')
+# ?sort= values; newest/oldest are served by the (season,) created_at, id indexes
+HIGHLIGHT_SORTS = {
+    'newest': ['-created_at', '-id'],
+    'oldest': ['created_at', 'id'],
+    'top_rated': ['-avg_rating', '-id'],
+}
+CACHED_RESPONSES = ('highlight_json', 'highlight_main_page')
+
+def _highlight_json_cache_params(params):
+    # Same page for "?q=Arsenal%20 " and "?q=arsenal", unknown params ignored
+    cache_params = []
+    for name in HIGHLIGHT_JSON_PARAMS:
+        if name in params:
+            value = ' '.join(params[name].split())
+            cache_params.append((name, value.lower() if name == 'q' else value))
+    return cache_params
+
+def _split_user_state(params):
+    """
+    Takes 'user_state' out of ?include=, so the shared page is built and
+    cached without it. Returns (params, whether it was asked for); the ids
+    the states are looked up by are always sent along with them.
+    """
+    include = [name.strip() for name in params.get('include', '').split(',') if name.strip()]
+    if USER_STATE not in include:
+        return params, False
+    params = params.copy()
+    include.remove(USER_STATE)
+    if include:
+        params['include'] = ','.join(include)
+    else:
+        # ?include=user_state alone keeps the full payload
+        del params['include']
+    fields = [name.strip() for name in params.get('fields', '').split(',') if name.strip()]
+    if fields and 'id' not in fields:
+        params['fields'] = ','.join(['id'] + fields)
+    return params, True
+
+def _with_user_state(response, user):
+    # Per-user flags merged into the (possibly cached) shared page
+    data = json.loads(response.content)
+    items = data['results'] if isinstance(data, dict) else data
+    states = user_highlight_states(user, [uuid.UUID(item['id']) for item in items])
+    for item in items:
+        item[USER_STATE] = states[str(item['id'])]
+    merged = JsonResponse(data, safe=False)
+    merged['X-Cache'] = response['X-Cache']
+    patch_vary_headers(merged, ('Cookie',))
+    return merged
 
-    query = request.GET.get('q')
+def highlight_json(request):
+    params, with_user_state = _split_user_state(request.GET)
+    tables = HIGHLIGHT_JSON_TABLES
+    if params.get('sort') == 'top_rated':
+        tables += ('rating',)
+    response = cached_response(
+        'highlight_json',
+        tables,
+        _highlight_json_cache_params(params),
+        lambda: _build_highlight_json(request, params),
+    )
+    if with_user_state and response.status_code == 200:
+        response = _with_user_state(response, request.user)
+    return response
+
+def _build_highlight_json(request, params):
+    try:
+        fieldset = parse_fieldset(params, HIGHLIGHT_ATTRIBUTES, HIGHLIGHT_RELATIONS)
+    except InvalidFieldset as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    sort = params.get('sort')
+    if sort and sort not in HIGHLIGHT_SORTS:
+        return JsonResponse({"status": "error", "message": f"sort must be one of {', '.join(HIGHLIGHT_SORTS)}"}, status=400)
+    ordering = HIGHLIGHT_SORTS[sort or 'newest']
+
+    # Only the columns and standings the client asked for (?fields=/?include=),
+    # plus the sort columns the cursor is built from
+    highlight_list = apply_fieldset(
+        Highlight.objects.all(), fieldset, HIGHLIGHT_ATTRIBUTES, HIGHLIGHT_RELATIONS,
+        always=[order.lstrip('-') for order in ordering],
+    )
+
+    # Filters are plain column predicates so the indexes can serve them
+    season = params.get('season')
+    if season:
+        if season not in dict(Standing.SEASON_CHOICES):
+            return JsonResponse({"status": "error", "message": f"Unknown season '{season}'"}, status=400)
+        highlight_list = highlight_list.filter(season=season)
+
+    try:
+        highlight_list = highlight_list.filter(**date_range_filter(
+            'created_at', params.get('start_date'), params.get('end_date')
+        ))
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+    query = params.get('q')
     if query:
-        highlight_list = highlight_list.filter(name__icontains=query)
-
-    paginator = Paginator(highlight_list,10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        highlight_list = search_highlights(highlight_list, query)
 
-    data = []
-
-    for highlight in page_obj:
-        home_standing = None
-        if highlight.home: # checks if self.home returns a Standing object
-            home_standing = {
-                "team": highlight.home.team,    # Adjust field names to match your Standing model
-                "played": highlight.home.played,
-                "won": highlight.home.won,
-                "drawn": highlight.home.drawn,
-                "lost": highlight.home.lost,
-            }
-
-        # 2. Access the @property 'away'
-        away_standing = None
-        if highlight.away:
-            away_standing = {
-                "team": highlight.away.team,
-                "played": highlight.away.played,
-                "won": highlight.away.won,
-                "drawn": highlight.away.drawn,
-                "lost": highlight.away.lost,
-            }
-        
-        data.append({
-            "id": highlight.pk,
-            "name": highlight.name,
-            "url": highlight.url,
-            "description": highlight.description,
-            "season": highlight.season,
-            "manual_thumbnail_url": highlight.manual_thumbnail_url,
-            "created_at": highlight.created_at.isoformat(),
-            "home_standing": home_standing, 
-            "away_standing": away_standing,
-        })
+    # ?cursor= switches to keyset pagination on the sort columns: no COUNT(*)
+    # and no OFFSET, for the infinite scroll. ?page= keeps the old contract.
+    use_cursor = 'cursor' in params
+    if use_cursor:
+        try:
+            page_items, next_cursor = paginate_by_cursor(
+                highlight_list,
+                ordering,
+                cursor=params.get('cursor'),
+                page_size=get_page_size(request, default=10),
+            )
+        except InvalidCursor as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    else:
+        # Search results stay in relevance order unless a sort is asked for
+        if sort or not query:
+            highlight_list = highlight_list.order_by(*ordering)
+        paginator = Paginator(highlight_list,10)
+        page_number = params.get('page')
+        page_items = paginator.get_page(page_number)
 
+    data = [serialize_highlight(highlight, fieldset) for highlight in page_items]
 
+    if use_cursor:
+        return JsonResponse({"results": data, "next_cursor": next_cursor})
     return JsonResponse(data, safe=False)
 
 @csrf_exempt
 @user_passes_test(lambda u: u.is_superuser)
 def admin_highlight_flutter(request):
     if request.method == 'GET':
-        # Return all highlights for the admin list
-        highlights = Highlight.objects.all().order_by('-created_at')
-        data = []
-        for item in highlights:
-            data.append({
-                "id": item.pk,
-                "name": item.name,
-                "url": item.url,
-                "created_at": item.created_at.strftime("%Y-%m-%d %H:%M"), # Simple string format
-            })
-        return JsonResponse(data, safe=False)
+        # Return all highlights for the admin list, streamed in chunks
+        highlights = Highlight.objects.only('id', 'name', 'url', 'created_at').order_by('-created_at', '-id')
+        return stream_json_array(highlights, lambda item: {
+            "id": item.pk,
+            "name": item.name,
+            "url": item.url,
+            "created_at": item.created_at.strftime("%Y-%m-%d %H:%M"), # Simple string format
+        })
 
     elif request.method == 'POST':
         # Bulk Delete
@@ -425,16 +419,42 @@ def admin_highlight_flutter(request):
             if not ids_to_delete:
                 return JsonResponse({"status": "error", "message": "No IDs provided"}, status=400)
 
-            # Filter and delete
-            # Assuming IDs are UUIDs or ints, Django handles the list lookup
-            deleted_count, _ = Highlight.objects.filter(pk__in=ids_to_delete).delete()
+            # Only ids that exist, so the counts and the job size are real
+            highlight_ids = list(Highlight.objects.filter(pk__in=ids_to_delete).values_list('pk', flat=True))
+
+            # Large deletes run a batch per request; poll status_url until the job is done
+            if should_delete_in_background(highlight_ids):
+                job = start_delete_job(highlight_ids)
+                return JsonResponse({
+                    "status": "success",
+                    "message": f"Deleting {len(highlight_ids)} highlights in batches.",
+                    "job_id": job.pk,
+                    "job": job.as_dict(),
+                    "status_url": reverse('highlight:delete_job_status_flutter', args=[job.pk]),
+                }, status=202)
+
+            deleted = delete_highlights(highlight_ids)
+            deleted_count = deleted.get(Highlight._meta.label, 0)
             
             return JsonResponse({
                 "status": "success", 
-                "message": f"Successfully deleted {deleted_count} highlights."
+                "message": f"Successfully deleted {deleted_count} highlights.",
+                "deleted": deleted,
             }, status=200)
             
         except Exception as e:
             return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
-    return JsonResponse({"status": "error", "message": "Invalid method"}, status=401)
\ No newline at end of file
+    return JsonResponse({"status": "error", "message": "Invalid method"}, status=401)
+
+@user_passes_test(lambda u: u.is_superuser)
+def delete_job_status_flutter(request, job_id):
+    # Each poll deletes the job's next batch (highlight.deletion)
+    job = run_delete_job(job_id)
+    if job is None:
+        return JsonResponse({"status": "error", "message": "Unknown job"}, status=404)
+    return JsonResponse({"status": "success", "job": job.as_dict()})
+
+@user_passes_test(lambda u: u.is_staff)
+def response_cache_stats(request):
+    return JsonResponse({"status": "success", "stats": cache_stats(CACHED_RESPONSES)})
@@ -14,6 +14,7 @@ import pytz
 import csv
 import io
 import requests
+from kick_chronicle.streaming import stream_csv
 
 @staff_member_required
 def check_admin_status(request):
@@ -247,23 +248,17 @@ def import_schedule_csv(request):
 @staff_member_required
 @csrf_exempt
 def export_schedule_csv(request):
-    matches = Kalender.objects.all().order_by('date', 'time')
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="schedule_export_manual.csv"'
-    writer = csv.writer(response)
-    writer.writerow(['team_1', 'team_2', 'date', 'time', 'description', 'team_1_logo', 'team_2_logo'])
-    
-    for match in matches:
-        writer.writerow([
-            match.team_1,
-            match.team_2,
-            match.date.strftime('%Y-%m-%d'),
-            match.time.strftime('%H:%M'),
-            match.description,
-            match.team_1_logo,
-            match.team_2_logo  
-        ])
-    return response
+    matches = Kalender.objects.all().order_by('date', 'time', 'id')
+    header = ['team_1', 'team_2', 'date', 'time', 'description', 'team_1_logo', 'team_2_logo']
+    return stream_csv(matches, header, lambda match: [
+        match.team_1,
+        match.team_2,
+        match.date.strftime('%Y-%m-%d'),
+        match.time.strftime('%H:%M'),
+        match.description,
+        match.team_1_logo,
+        match.team_2_logo  
+    ], filename='schedule_export_manual.csv')
 
 @staff_member_required
 @csrf_exempt
@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+The live comment streams (komen_like_rate.comment_stream) need an ASGI
+server, e.g. gunicorn -k uvicorn.workers.UvicornWorker kick_chronicle.asgi.
 """
 
 import os
@@ -0,0 +1,128 @@
+"""
+Versioned response caching for list endpoints and anonymous pages.
+
+Every table a cached response depends on has a version number stored in
+the cache ('highlight', 'standing', ...). The versions are part of each
+response's cache key, so bumping one makes every response built from
+that table unreachable at once, without having to find and delete keys;
+the stale entries simply expire.
+
+Versions are bumped by model signals and by the bulk write paths that
+skip signals (imports, set-based deletes, standings uploads). Only the
+basic get/set/add/incr cache API is used, so it works with the
+file-based backend as well as Redis/Memcached.
+
+A bump only reaches the processes that share the cache, so responses
+are not cached at all with a per-process backend (local memory, the
+default) unless RESPONSE_CACHE_ENABLED says otherwise, e.g. for a
+single-process server.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+VERSION_PREFIX = 'table-version:'
+RESPONSE_PREFIX = 'response:'
+STATS_PREFIX = 'cache-stats:'
+DEFAULT_TIMEOUT = 300
+PER_PROCESS_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def _incr(key):
+    # incr() raises ValueError for a missing key; add() starts it at 1.
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, None):
+            return 1
+        return cache.incr(key)
+
+
+def get_versions(tables):
+    keys = [VERSION_PREFIX + table for table in tables]
+    stored = cache.get_many(keys)
+    for key in keys:
+        if key not in stored:
+            cache.add(key, 1, None)
+            stored[key] = cache.get(key, 1)
+    return [stored[key] for key in keys]
+
+
+def bump_version(*tables):
+    """
+    Invalidates every cached response built from `tables`. Deferred to
+    the end of the current transaction, so a request racing the write
+    can't cache the old rows under the new version.
+    """
+    def bump():
+        for table in tables:
+            _incr(VERSION_PREFIX + table)
+    transaction.on_commit(bump)
+
+
+def response_caching_enabled():
+    """RESPONSE_CACHE_ENABLED if set, otherwise whether the default cache is shared between processes."""
+    enabled = getattr(settings, 'RESPONSE_CACHE_ENABLED', None)
+    if enabled is None:
+        return settings.CACHES['default']['BACKEND'] not in PER_PROCESS_BACKENDS
+    return enabled
+
+
+def response_cache_key(name, tables, params):
+    """`params` is a sequence of (name, value) pairs, already normalized by the caller."""
+    versions = '.'.join(str(v) for v in get_versions(tables))
+    digest = hashlib.sha1(repr(sorted(params)).encode()).hexdigest()
+    return f"{RESPONSE_PREFIX}{name}:{versions}:{digest}"
+
+
+def cached_response(name, tables, params, build, timeout=None):
+    """
+    Returns the cached response for (name, params) while none of `tables`
+    changed, otherwise calls build() and caches it if it is a 200.
+    Sets an X-Cache: HIT/MISS header and counts hits and misses; with
+    response caching off, build() always runs and X-Cache is BYPASS.
+    """
+    if not response_caching_enabled():
+        response = build()
+        response['X-Cache'] = 'BYPASS'
+        return response
+
+    key = response_cache_key(name, tables, params)
+    cached = cache.get(key)
+    if cached is not None:
+        _incr(f"{STATS_PREFIX}{name}:hits")
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    _incr(f"{STATS_PREFIX}{name}:misses")
+    response = build()
+    if response.status_code == 200 and not response.streaming:
+        if timeout is None:
+            timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+        cache.set(key, (response.content, response['Content-Type']), timeout)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def cache_stats(names):
+    """Hit/miss counters for the given cached response names."""
+    keys = [f"{STATS_PREFIX}{name}:{kind}" for name in names for kind in ('hits', 'misses')]
+    values = cache.get_many(keys)
+    stats = {}
+    for name in names:
+        hits = values.get(f"{STATS_PREFIX}{name}:hits", 0)
+        misses = values.get(f"{STATS_PREFIX}{name}:misses", 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+    return stats
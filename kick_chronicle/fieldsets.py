@@ -0,0 +1,88 @@
+"""
+Sparse fieldsets (?fields= and ?include=) for the JSON endpoints.
+
+An endpoint describes its payload as two dicts:
+
+    attributes = {'name': (['name'], lambda obj: obj.name), ...}
+    relations  = {'home_standing': ('home_standing', ['team', ...], serialize), ...}
+
+Attributes list the model columns they read; relations name the foreign
+key to join, the columns read from the joined row and how to serialize
+the related object. ?fields=name,thumbnail_url sends only those keys and
+?include=home_standing adds nested objects (relation names are accepted
+in fields= too). Without either parameter the full payload is sent, as
+before; ?include= on its own keeps every attribute.
+
+The selection also shapes the query: only() the columns the chosen keys
+need and select_related() only the relations that were asked for, so a
+list screen showing a title and a thumbnail reads neither the
+description text nor the standings.
+"""
+
+
+class InvalidFieldset(ValueError):
+    pass
+
+
+def _names(value):
+    return [name for name in (part.strip() for part in value.split(',')) if name]
+
+
+def parse_fieldset(params, attributes, relations):
+    """
+    Returns (attribute names, relation names) selected by `params`
+    (request.GET), in the endpoint's payload order. Raises
+    InvalidFieldset for names the endpoint doesn't have.
+    """
+    wanted = set()
+    for param in ('fields', 'include'):
+        if param in params:
+            names = _names(params[param])
+            allowed = relations if param == 'include' else {**attributes, **relations}
+            unknown = [name for name in names if name not in allowed]
+            if unknown:
+                raise InvalidFieldset(f"Unknown {param}: {', '.join(unknown)}")
+            wanted.update(names)
+
+    if 'fields' in params:
+        selected = [name for name in attributes if name in wanted]
+    else:
+        selected = list(attributes)
+    if 'fields' in params or 'include' in params:
+        included = [name for name in relations if name in wanted]
+    else:
+        included = list(relations)
+    return selected, included
+
+
+def apply_fieldset(queryset, fieldset, attributes, relations, prefix='', always=()):
+    """
+    Restricts `queryset` to the columns `fieldset` needs and joins the
+    included relations. `prefix` ('highlight__') applies the fieldset to
+    a related model; `always` are columns of the queryset's own model
+    the view needs regardless (primary key, ordering columns).
+    """
+    selected, included = fieldset
+    columns = set()
+    for name in selected:
+        columns.update(attributes[name][0])
+    joins = []
+    for name in included:
+        field, related_columns, _ = relations[name]
+        joins.append(prefix + field)
+        columns.add(field)
+        columns.update(f"{field}__{column}" for column in related_columns)
+
+    queryset = queryset.only(*always, *(prefix + column for column in sorted(columns)))
+    if joins:
+        queryset = queryset.select_related(*joins)
+    return queryset
+
+
+def serialize_fieldset(obj, fieldset, attributes, relations):
+    selected, included = fieldset
+    data = {name: attributes[name][1](obj) for name in selected}
+    for name in included:
+        field, _, serialize = relations[name]
+        data[name] = serialize(getattr(obj, field))
+    return data
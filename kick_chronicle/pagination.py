@@ -0,0 +1,127 @@
+"""
+Keyset (cursor) pagination for the JSON list endpoints.
+
+A cursor is an opaque URL-safe token holding the ordering values of the
+last row that was sent. The next page is fetched with a range predicate
+on those values, so there is no COUNT(*) and no OFFSET, and page 500 of
+an infinite scroll costs the same as page 1.
+"""
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    # Full precision on purpose: DjangoJSONEncoder truncates datetimes to
+    # milliseconds, which would make keyset comparisons skip rows.
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, fields=None):
+    """
+    The values held by `token`. With `fields` (the model fields behind the
+    ordering) each value is converted by its field's to_python(), so a
+    tampered cursor fails here as InvalidCursor rather than in the query.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(values, list):
+        raise InvalidCursor("Invalid cursor")
+    if fields is None:
+        return values
+    if len(values) != len(fields) or None in values:
+        raise InvalidCursor("Invalid cursor")
+    try:
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValidationError, TypeError, ValueError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Reads ?limit= and clamps it to [1, maximum]."""
+    try:
+        size = int(request.GET.get('limit', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+def _ordering_fields(queryset, ordering):
+    """The model field (or annotation output field) behind each ordering entry."""
+    fields = []
+    for order in ordering:
+        name = order.lstrip('-')
+        if name in queryset.query.annotations:
+            fields.append(queryset.query.annotations[name].output_field)
+            continue
+        model = queryset.model
+        for part in name.split('__'):
+            field = model._meta.get_field(part)
+            model = field.related_model
+        fields.append(field)
+    return fields
+
+
+def _field_value(obj, field):
+    for attr in field.split('__'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _keyset_filter(ordering, values):
+    """
+    (a, b) after (x, y) in ['-a', '-b'] order becomes
+    a < x OR (a = x AND b < y).
+    """
+    condition = Q()
+    equal_prefix = Q()
+    for order, value in zip(ordering, values):
+        field = order.lstrip('-')
+        lookup = 'lt' if order.startswith('-') else 'gt'
+        condition |= equal_prefix & Q(**{f'{field}__{lookup}': value})
+        equal_prefix &= Q(**{field: value})
+    return condition
+
+
+def paginate_by_cursor(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns (items, next_cursor) for one page of `queryset` ordered by
+    `ordering`, e.g. ['-created_at', '-id']. The last ordering field must
+    be unique so the order is total. next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, _ordering_fields(queryset, ordering))
+        queryset = queryset.filter(_keyset_filter(ordering, values))
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor([_field_value(last, order.lstrip('-')) for order in ordering])
+    return items, next_cursor
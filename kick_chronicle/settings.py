@@ -144,6 +144,11 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # Writers take the lock at BEGIN, so concurrent writes wait out the
+            # busy timeout instead of failing to upgrade a read lock
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+            # A file rather than shared memory, so threaded tests get their own connections
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
     if os.getenv("SENDGRID_API_KEY"):
@@ -240,6 +245,65 @@ EMBED_VIDEO_BACKENDS = (
     'highlight.backends.SecureYoutubeBackend',
 )
 
+# Local memory by default; set CACHE_BACKEND/CACHE_LOCATION to share the
+# cache between workers, e.g. django.core.cache.backends.filebased.FileBasedCache
+# with a directory, or a Redis URL.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'kick-chronicle'),
+    }
+}
+
+# Cached responses are invalidated through the cache itself, so they are
+# only on with a shared backend (see kick_chronicle.caching). Set to true
+# or false to override, e.g. true for a single-process server.
+RESPONSE_CACHE_ENABLED = (
+    os.getenv('RESPONSE_CACHE_ENABLED').lower() == 'true' if os.getenv('RESPONSE_CACHE_ENABLED') else None
+)
+
+# Seconds a cached JSON list response is kept (it is also invalidated on writes)
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Above this many matches SQLite search results are newest first instead of
+# ranked by relevance (ranking scores every match; see highlight.search)
+HIGHLIGHT_SEARCH_RANK_LIMIT = int(os.getenv('HIGHLIGHT_SEARCH_RANK_LIMIT', 1000))
+
+# Rows per transaction when importing highlights from CSV
+HIGHLIGHT_IMPORT_CHUNK_SIZE = int(os.getenv('HIGHLIGHT_IMPORT_CHUNK_SIZE', 1000))
+
+# Highlights per transaction when bulk deleting, and the size above which
+# the admin bulk delete runs as a job, a batch per request
+HIGHLIGHT_DELETE_BATCH_SIZE = int(os.getenv('HIGHLIGHT_DELETE_BATCH_SIZE', 500))
+HIGHLIGHT_DELETE_BACKGROUND_THRESHOLD = int(os.getenv('HIGHLIGHT_DELETE_BACKGROUND_THRESHOLD', 200))
+
+# Seconds a user's avatar URL stays cached (dropped when the profile changes)
+AVATAR_CACHE_TIMEOUT = int(os.getenv('AVATAR_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Bayesian prior of the top rated leaderboard: every highlight is scored as
+# if it also had this many votes of this value. Run `manage.py
+# refresh_leaderboard` after changing either.
+LEADERBOARD_PRIOR_VOTES = int(os.getenv('LEADERBOARD_PRIOR_VOTES', 5))
+LEADERBOARD_PRIOR_MEAN = float(os.getenv('LEADERBOARD_PRIOR_MEAN', 3.0))
+
+# Most highlight ids one mobile/user-state/ request may ask about
+USER_STATE_MAX_IDS = int(os.getenv('USER_STATE_MAX_IDS', 100))
+
+# 'buffered' queues mobile votes per process and writes them in bulk
+# (komen_like_rate.rating_buffer) at most every RATING_BUFFER_FLUSH_MS
+# or RATING_BUFFER_MAX_ENTRIES votes; 'direct' writes each vote.
+RATING_WRITE_MODE = os.getenv('RATING_WRITE_MODE', 'direct')
+RATING_BUFFER_MAX_ENTRIES = int(os.getenv('RATING_BUFFER_MAX_ENTRIES', 500))
+RATING_BUFFER_FLUSH_MS = int(os.getenv('RATING_BUFFER_FLUSH_MS', 1000))
+
+# Live comment streams (served by kick_chronicle.asgi). The transport carries
+# events between workers: LocalTransport for one process, DatabaseTransport
+# (polls the CommentEvent table) for several.
+COMMENT_EVENT_TRANSPORT = os.getenv('COMMENT_EVENT_TRANSPORT', 'komen_like_rate.comment_events.LocalTransport')
+COMMENT_EVENT_POLL_MS = int(os.getenv('COMMENT_EVENT_POLL_MS', 500))
+COMMENT_EVENT_RETENTION = int(os.getenv('COMMENT_EVENT_RETENTION', 60 * 60))
+COMMENT_STREAM_HEARTBEAT = int(os.getenv('COMMENT_STREAM_HEARTBEAT', 15))
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 CSRF_COOKIE_SECURE = True
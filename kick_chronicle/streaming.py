@@ -0,0 +1,78 @@
+"""
+Streaming responses for full-table dumps (admin lists, CSV exports).
+
+Rows are read with QuerySet.iterator(chunk_size=...) and encoded while
+the response is being sent, so a worker holds one chunk of rows in
+memory instead of the whole table and the first bytes go out as soon
+as the first chunk is fetched.
+"""
+import csv
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+DEFAULT_CHUNK_SIZE = 2000
+# Encoded output is handed to the server in pieces of roughly this size.
+BUFFER_SIZE = 64 * 1024
+
+
+def _buffered(pieces, size=BUFFER_SIZE):
+    buffer = []
+    length = 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_json_array(items, encoder=DjangoJSONEncoder):
+    """Encodes an iterable of JSON-serializable items as one JSON array, piece by piece."""
+    encode = encoder().encode
+    yield '['
+    separator = ''
+    for item in items:
+        yield separator
+        yield encode(item)
+        separator = ', '
+    yield ']'
+
+
+def stream_json_array(queryset, serialize, chunk_size=DEFAULT_CHUNK_SIZE, **response_kwargs):
+    """
+    Returns a StreamingHttpResponse whose body is the JSON array
+    [serialize(obj) for obj in queryset], the same payload as
+    JsonResponse(data, safe=False).
+    """
+    items = (serialize(obj) for obj in queryset.iterator(chunk_size=chunk_size))
+    return StreamingHttpResponse(
+        _buffered(iter_json_array(items)),
+        content_type='application/json',
+        **response_kwargs,
+    )
+
+
+class _Echo:
+    """File-like object for csv.writer that returns the line instead of storing it."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, header, serialize, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Returns a StreamingHttpResponse CSV download with `header` as the
+    first row and serialize(obj) (a list of cells) for every object.
+    """
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(header)
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            yield writer.writerow(serialize(obj))
+
+    response = StreamingHttpResponse(_buffered(lines()), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
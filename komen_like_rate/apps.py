@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class KomenLikeRateConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'komen_like_rate'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,212 @@
+"""
+Live comment events for the SSE stream (views.comment_stream).
+
+The comment views publish an event after their transaction commits:
+
+    {'id': 42, 'type': 'created', 'highlight_id': '...', 'comment': {...}}
+    {'id': 43, 'type': 'deleted', 'highlight_id': '...', 'comment': {'id': 7}}
+
+Every worker process has one CommentBroker holding an asyncio queue per
+open stream, grouped by highlight. How an event gets from the worker
+that handled the write to the brokers of all workers is the transport,
+chosen with COMMENT_EVENT_TRANSPORT (a dotted path):
+
+- LocalTransport (default) hands it to this process's broker only,
+  enough for a single worker or the dev server.
+- DatabaseTransport stores it as a CommentEvent row; one thread per
+  worker polls the table every COMMENT_EVENT_POLL_MS while streams are
+  open. The row ids double as SSE event ids, so a reconnecting client
+  (Last-Event-ID) is sent what it missed.
+
+Anything with publish(event), replay(highlight_id, last_event_id) and
+start() can be plugged in the same way (Redis pub/sub, a local socket).
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSPORT = 'komen_like_rate.comment_events.LocalTransport'
+DEFAULT_POLL_MS = 500
+DEFAULT_RETENTION = 60 * 60
+# Events a slow client may fall behind by before its stream is reset
+QUEUE_SIZE = 100
+RESET = {'type': 'reset'}
+
+
+class CommentBroker:
+    """Fans events out to the open streams of this process."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, highlight_id):
+        """A queue receiving the highlight's events; call from the stream's event loop."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(QUEUE_SIZE))
+        with self._lock:
+            self._subscribers[str(highlight_id)].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, highlight_id, subscriber):
+        with self._lock:
+            queues = self._subscribers.get(str(highlight_id))
+            if queues is not None:
+                queues.discard(subscriber)
+                if not queues:
+                    del self._subscribers[str(highlight_id)]
+
+    def dispatch(self, event):
+        """Delivers `event` to the highlight's streams; safe to call from any thread."""
+        queues = defaultdict(list)
+        with self._lock:
+            for loop, queue in self._subscribers.get(event['highlight_id'], ()):
+                queues[loop].append(queue)
+        # One wake-up per event loop (normally one per worker), not per stream
+        for loop, loop_queues in queues.items():
+            try:
+                loop.call_soon_threadsafe(_offer, loop_queues, event)
+            except RuntimeError:
+                pass  # the loop is gone; its streams unsubscribe on their way out
+
+
+def _offer(queues, event):
+    for queue in queues:
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog and tell the client to reload.
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESET)
+
+
+class LocalTransport:
+    """Events only reach the streams of the process that published them."""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._ids = itertools.count(1)
+
+    def start(self):
+        pass
+
+    def publish(self, event):
+        self.broker.dispatch({**event, 'id': next(self._ids)})
+
+    def replay(self, highlight_id, last_event_id):
+        return []
+
+
+class DatabaseTransport:
+    """
+    Events go through the CommentEvent table. Rows are inserted in their
+    own short transactions, so ids become visible almost in order; the
+    poller still looks back POLL_LAG seconds for a row committed after a
+    higher id and skips the ones it already delivered.
+    """
+    POLL_LAG = timedelta(seconds=5)
+    PRUNE_EVERY = 60
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, name='comment-events', daemon=True)
+                self._thread.start()
+
+    def _keep_polling(self):
+        # Decided under the lock start() takes, so a stream opened while
+        # the poller is stopping starts a new one.
+        with self._lock:
+            if len(self.broker):
+                return True
+            self._thread = None
+            return False
+
+    def publish(self, event):
+        from .models import CommentEvent
+        CommentEvent.objects.create(highlight_id=event['highlight_id'], kind=event['type'], comment=event['comment'])
+
+    def replay(self, highlight_id, last_event_id):
+        from .models import CommentEvent
+        rows = CommentEvent.objects.filter(highlight_id=highlight_id, pk__gt=last_event_id).order_by('pk')
+        return [self._event(row) for row in rows[:QUEUE_SIZE]]
+
+    def _event(self, row):
+        return {'id': row.pk, 'type': row.kind, 'highlight_id': str(row.highlight_id), 'comment': row.comment}
+
+    def _poll(self):
+        from .models import CommentEvent
+        interval = getattr(settings, 'COMMENT_EVENT_POLL_MS', DEFAULT_POLL_MS) / 1000
+        retention = timedelta(seconds=getattr(settings, 'COMMENT_EVENT_RETENTION', DEFAULT_RETENTION))
+        seen = set()
+        pruned_at = 0
+        try:
+            # Only events from now on; reconnecting clients get theirs from replay()
+            floor = CommentEvent.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+            # Runs while this worker has open streams; start() restarts it.
+            while self._keep_polling():
+                close_old_connections()
+                now = timezone.now()
+                for row in CommentEvent.objects.filter(pk__gt=floor).order_by('pk'):
+                    if row.pk not in seen:
+                        seen.add(row.pk)
+                        self.broker.dispatch(self._event(row))
+                    if row.created_at < now - self.POLL_LAG:
+                        floor = max(floor, row.pk)
+                seen = {pk for pk in seen if pk > floor}
+                if time.monotonic() - pruned_at > self.PRUNE_EVERY:
+                    CommentEvent.objects.filter(created_at__lt=now - retention).delete()
+                    pruned_at = time.monotonic()
+                time.sleep(interval)
+        except Exception:
+            logger.exception("Comment event poller stopped")
+            with self._lock:
+                self._thread = None
+        finally:
+            connection.close()
+
+
+broker = CommentBroker()
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            path = getattr(settings, 'COMMENT_EVENT_TRANSPORT', DEFAULT_TRANSPORT)
+            _transport = import_string(path)(broker)
+        return _transport
+
+
+def publish_comment_event(kind, highlight_id, comment):
+    """Sends the event to the streams once the current transaction commits."""
+    event = {'type': kind, 'highlight_id': str(highlight_id), 'comment': comment}
+
+    def publish():
+        try:
+            get_transport().publish(event)
+        except Exception:
+            # The write itself succeeded; streams just miss this event.
+            logger.exception("Publishing comment event failed")
+    transaction.on_commit(publish)
@@ -0,0 +1,87 @@
+"""
+The live comment stream: server-sent events of one highlight's new and
+deleted comments, fed by komen_like_rate.comment_events.
+
+    retry: 3000
+
+    id: 42
+    event: comment.created
+    data: {"highlight_id": "...", "comment": {"id": 7, "user": "...", ...}}
+
+    id: 43
+    event: comment.deleted
+    data: {"highlight_id": "...", "comment": {"id": 7}}
+
+A ": ping" comment goes out every COMMENT_STREAM_HEARTBEAT seconds so
+proxies keep the connection open. "event: reset" means the client fell
+too far behind and should reload the comment list.
+
+The stream is an async view (komen_like_rate.views.comment_stream)
+returning a StreamingHttpResponse over comment_event_stream(), served by
+Django's ASGI handler behind the whole middleware stack. Each open
+stream is a task and a queue; the replay runs in the shared thread pool.
+Django's handler also keeps the request's thread-sensitive thread (used
+by the sync middleware hooks) until the response ends, so an open
+stream holds an idle thread too.
+"""
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from .comment_events import RESET, broker, get_transport
+
+STREAM_CONTENT_TYPE = 'text/event-stream; charset=utf-8'
+STREAM_HEADERS = [
+    ('Cache-Control', 'no-cache'),
+    # nginx: don't buffer the events
+    ('X-Accel-Buffering', 'no'),
+]
+DEFAULT_HEARTBEAT = 15
+
+
+def parse_last_event_id(value):
+    return int(value) if value and value.isdigit() else None
+
+
+def _sse(event):
+    if event is RESET:
+        return b"event: reset\ndata: {}\n\n"
+    # Every stream of the highlight gets the same dict; format it once
+    if '_sse' not in event:
+        data = json.dumps({"highlight_id": event["highlight_id"], "comment": event["comment"]})
+        event['_sse'] = f"id: {event['id']}\nevent: comment.{event['type']}\ndata: {data}\n\n".encode()
+    return event['_sse']
+
+
+def _replay(highlight_id, last_event_id):
+    close_old_connections()
+    return get_transport().replay(highlight_id, last_event_id)
+
+
+async def comment_event_stream(highlight_id, last_event_id=None):
+    """The stream's chunks (bytes); runs until the client disconnects (the task is cancelled)."""
+    transport = get_transport()
+    subscriber = broker.subscribe(highlight_id)
+    try:
+        transport.start()
+        yield b"retry: 3000\n\n"
+        # Subscribed first, so nothing falls between the replay and the queue
+        delivered = 0
+        if last_event_id is not None:
+            for event in await sync_to_async(_replay, thread_sensitive=False)(highlight_id, last_event_id):
+                delivered = event["id"]
+                yield _sse(event)
+
+        heartbeat = getattr(settings, "COMMENT_STREAM_HEARTBEAT", DEFAULT_HEARTBEAT)
+        queue = subscriber[1]
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if event is RESET or event["id"] > delivered:
+                yield _sse(event)
+    finally:
+        broker.unsubscribe(highlight_id, subscriber)
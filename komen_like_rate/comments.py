@@ -0,0 +1,103 @@
+"""
+Comment feeds (detail page and mobile), newest first or most liked,
+paged by a cursor on the sort columns; both orders are served by a
+partial (highlight, ...) index over the top-level comments. Authors and
+their profiles come in the same query, avatar URLs are resolved once
+per user on the page and the viewer's likes of the page are one more
+query.
+
+Replies (komen_like_rate.threads) are not part of the feed: each page
+carries the first few direct replies of its comments, all fetched with
+one windowed query, and a whole thread is read by path range with
+thread_page. Neither recurses per comment.
+"""
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from auth_profil.avatars import avatar_urls
+from kick_chronicle.pagination import paginate_by_cursor
+from .likes import liked_comment_ids
+from .models import Comment
+from .threads import subtree_range
+
+COMMENT_ORDERING = ['-created_at', '-id']
+# ?sort= values of the comment lists
+COMMENT_SORTS = {
+    'newest': COMMENT_ORDERING,
+    'most_liked': ['-like_count', '-created_at', '-id'],
+}
+COMMENT_PAGE_SIZE = 20
+# Replies shown under each comment of a feed page, oldest first
+REPLY_PREVIEW_SIZE = 3
+MAX_REPLY_PREVIEW_SIZE = 10
+# Depth first: replies follow their parent (see threads)
+THREAD_ORDERING = ['path']
+
+
+def _decorate(comments, user):
+    avatars = avatar_urls(comment.user for comment in comments)
+    liked = liked_comment_ids(user, comments) if user is not None else set()
+    for comment in comments:
+        comment.avatar_url = avatars[comment.user_id]
+        comment.liked = comment.pk in liked
+
+
+def reply_previews(comments, size=REPLY_PREVIEW_SIZE):
+    """
+    {comment id: its first `size` direct replies} for `comments`, from
+    one query numbering the replies per parent.
+    """
+    previews = {comment.pk: [] for comment in comments}
+    if not previews or size <= 0:
+        return previews
+    replies = Comment.objects.filter(parent__in=list(previews)).select_related('user__profile').annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=F('parent_id'),
+            order_by=[F('created_at').asc(), F('id').asc()],
+        ),
+    ).filter(position__lte=size).order_by('parent_id', 'position')
+    for reply in replies:
+        previews[reply.parent_id].append(reply)
+    return previews
+
+
+def comment_page(highlight, cursor=None, page_size=COMMENT_PAGE_SIZE, user=None, sort='newest',
+                 replies=REPLY_PREVIEW_SIZE):
+    """
+    Returns (comments, next_cursor) for one page of `highlight`'s
+    top-level comments in `sort` order, each with an `avatar_url`
+    attribute ('' when the author has no picture), `liked` (whether
+    `user` liked it) and `preview_replies`, its first `replies` direct
+    replies decorated the same way. Raises InvalidCursor for a malformed
+    cursor.
+    """
+    comments, next_cursor = paginate_by_cursor(
+        Comment.objects.filter(highlight=highlight, parent__isnull=True).select_related('user__profile'),
+        COMMENT_SORTS[sort],
+        cursor=cursor,
+        page_size=page_size,
+    )
+    previews = reply_previews(comments, replies)
+    _decorate(comments + [reply for page in previews.values() for reply in page], user)
+    for comment in comments:
+        comment.preview_replies = previews[comment.pk]
+    return comments, next_cursor
+
+
+def thread_page(comment, cursor=None, page_size=COMMENT_PAGE_SIZE, user=None, max_depth=None):
+    """
+    Returns (replies, next_cursor) for one page of the replies below
+    `comment` at any depth, depth first; they and `comment` are decorated
+    like comment_page.
+    With `max_depth` only replies up to that many levels below `comment`
+    are listed; a listed reply with a reply_count but no listed replies
+    is continued by a thread_page of its own. Raises InvalidCursor for a
+    malformed cursor.
+    """
+    start, end = subtree_range(comment.path)
+    replies = Comment.objects.filter(path__gt=start, path__lt=end).select_related('user__profile')
+    if max_depth is not None:
+        replies = replies.filter(depth__lte=comment.depth + max_depth)
+    replies, next_cursor = paginate_by_cursor(replies, THREAD_ORDERING, cursor=cursor, page_size=page_size)
+    _decorate([comment] + replies, user)
+    return replies, next_cursor
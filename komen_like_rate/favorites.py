@@ -0,0 +1,57 @@
+"""
+Favorite toggles that keep Highlight.favorite_count in step.
+
+A toggle is a conditional DELETE first: if it removed the user's row
+the highlight was favorited and now isn't. Otherwise the row is
+inserted inside a savepoint, and a unique_user_favorite violation means
+a concurrent toggle (a double tap) inserted it first, so the favorite
+already exists and the count was already moved. Either way the count
+moves with a single UPDATE ... SET favorite_count = favorite_count +/- 1
+in the same transaction, only for the request that actually changed the
+row, so parallel toggles can't raise IntegrityError or skew the count.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from highlight.models import Highlight
+from .models import Favorite
+
+
+def _move_count(highlights, delta):
+    return highlights.update(favorite_count=F('favorite_count') + delta)
+
+
+def toggle_highlight_favorite(user, highlight_id):
+    """
+    Adds or removes `user`'s favorite of the highlight. Returns True if
+    it is now favorited; raises Highlight.DoesNotExist (rolling back the
+    insert) for an unknown highlight.
+    """
+    with transaction.atomic():
+        # No signals or dependent rows on Favorite, so this is one DELETE.
+        removed, _ = Favorite.objects.filter(user=user, highlight_id=highlight_id).delete()
+        if removed:
+            _move_count(Highlight.objects.filter(pk=highlight_id), -1)
+            return False
+        try:
+            with transaction.atomic():
+                Favorite.objects.create(user=user, highlight_id=highlight_id)
+        except IntegrityError:
+            return True
+        # The foreign key is only checked at commit; no row to count means no highlight.
+        if not _move_count(Highlight.objects.filter(pk=highlight_id), 1):
+            raise Highlight.DoesNotExist(highlight_id)
+        return True
+
+
+def forget_user_favorites(user):
+    """Takes `user`'s favorites out of the highlight counts, before they are deleted."""
+    return _move_count(Highlight.objects.filter(favorited_by__user=user), -1)
+
+
+def recompute_favorite_counts(queryset):
+    """Recomputes favorite_count of `queryset` from the Favorite table in one UPDATE."""
+    return queryset.update(favorite_count=Coalesce(Subquery(
+        Favorite.objects.filter(highlight=OuterRef('pk'))
+        .order_by().values('highlight').annotate(result=Count('id')).values('result')
+    ), 0))
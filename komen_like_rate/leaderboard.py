@@ -0,0 +1,116 @@
+"""
+The top rated leaderboard: one LeaderboardEntry per rated highlight with
+its Bayesian score, so top_rated_mobile reads a page of an indexed table
+instead of scoring every highlight per request.
+
+    score = (prior_votes * prior_mean + rating_sum) / (prior_votes + rating_count)
+
+A single 5-star vote scores (5 * 3.0 + 5) / 6 = 3.33 with the default
+prior, below a highlight with ten 4-star votes (3.67).
+
+Each vote re-scores only its own highlight's entry, in the vote's
+transaction and under the highlight row lock ratings take first, so
+votes on different highlights never touch the same rows. Ranks are not
+stored: a page works out the rank of its entries on read by counting
+the entries above them on the (score, highlight) index.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Func, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast
+from highlight.models import Highlight
+from kick_chronicle.caching import bump_version
+from .models import LeaderboardEntry
+
+DEFAULT_PRIOR_VOTES = 5
+DEFAULT_PRIOR_MEAN = 3.0
+ORDERING = ['-score', '-highlight_id']
+
+
+def _prior():
+    return (
+        getattr(settings, 'LEADERBOARD_PRIOR_VOTES', DEFAULT_PRIOR_VOTES),
+        getattr(settings, 'LEADERBOARD_PRIOR_MEAN', DEFAULT_PRIOR_MEAN),
+    )
+
+
+def bayesian_score(rating_count, rating_sum):
+    prior_votes, prior_mean = _prior()
+    return (prior_votes * prior_mean + rating_sum) / (prior_votes + rating_count)
+
+
+def _ranked_above(score, highlight_id):
+    return Q(score__gt=score) | Q(score=score, highlight_id__gt=highlight_id)
+
+
+def update_leaderboard_entry(highlight_id):
+    """
+    Re-scores one highlight from its rating totals, adding or removing
+    its entry. Call inside the transaction that changed the totals.
+    Returns the new score, or None when the highlight has no votes left.
+    """
+    rating_count, rating_sum = Highlight.objects.values_list('rating_count', 'rating_sum').get(pk=highlight_id)
+    entries = LeaderboardEntry.objects.filter(pk=highlight_id)
+    if not rating_count:
+        entries.delete()
+        return None
+
+    score = bayesian_score(rating_count, rating_sum)
+    if not entries.update(score=score):
+        # First vote; a concurrent first vote (merge, buffer flush) may insert it first.
+        try:
+            with transaction.atomic():
+                LeaderboardEntry.objects.create(highlight_id=highlight_id, score=score)
+        except IntegrityError:
+            entries.update(score=score)
+    return score
+
+
+def _count_above(score, highlight_id):
+    return LeaderboardEntry.objects.filter(_ranked_above(score, highlight_id)).order_by().annotate(
+        above=Func(F('pk'), function='COUNT', output_field=IntegerField()),
+    ).values('above')
+
+
+def with_ranks(entries, contiguous=True):
+    """
+    Sets `rank` (1-based position on the whole board) on a page of
+    `entries` listed in ORDERING order, with one query. On a `contiguous`
+    page (nothing filtered out) only the first entry's rank is counted
+    and the rest follow it; otherwise each entry is counted.
+    """
+    if not entries:
+        return entries
+    if contiguous:
+        first = LeaderboardEntry.objects.filter(_ranked_above(entries[0].score, entries[0].highlight_id)).count() + 1
+        for offset, entry in enumerate(entries):
+            entry.rank = first + offset
+        return entries
+    ranks = dict(LeaderboardEntry.objects.filter(pk__in=[entry.pk for entry in entries]).annotate(
+        above=Subquery(_count_above(OuterRef('score'), OuterRef('highlight_id'))),
+    ).values_list('pk', 'above'))
+    for entry in entries:
+        entry.rank = ranks[entry.pk] + 1
+    return entries
+
+
+def refresh_leaderboard(chunk_size=2000):
+    """Rebuilds every entry from the highlights' rating totals. Returns the number of entries."""
+    prior_votes, prior_mean = _prior()
+    scored = Highlight.objects.filter(rating_count__gt=0).annotate(
+        score=(
+            Value(prior_votes * prior_mean) + Cast('rating_sum', FloatField())
+        ) / (
+            Value(float(prior_votes)) + Cast('rating_count', FloatField())
+        ),
+    ).values_list('id', 'score')
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        entries = (
+            LeaderboardEntry(highlight_id=highlight_id, score=score)
+            for highlight_id, score in scored.iterator(chunk_size=chunk_size)
+        )
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=chunk_size)
+        bump_version('rating')
+    return LeaderboardEntry.objects.count()
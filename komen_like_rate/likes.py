@@ -0,0 +1,60 @@
+"""
+Comment likes that keep Comment.like_count in step.
+
+Toggling works like favorites (komen_like_rate.favorites): a conditional
+DELETE, otherwise an INSERT inside a savepoint where a
+unique_user_comment_like violation means a concurrent tap already added
+the like, and a single UPDATE like_count = like_count +/- 1 by the
+request that changed the row. Lists sort by the column (see
+comments.COMMENT_SORTS) and look up the viewer's likes of a whole page
+with one IN query.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import Comment, CommentLike
+
+
+def _move_count(comments, delta):
+    return comments.update(like_count=F('like_count') + delta)
+
+
+def toggle_like(user, comment_id):
+    """
+    Likes or unlikes the comment for `user`. Returns (liked, like_count);
+    raises Comment.DoesNotExist (rolling back the insert) for an unknown
+    comment.
+    """
+    comments = Comment.objects.filter(pk=comment_id)
+    with transaction.atomic():
+        # No signals on CommentLike, so this is one DELETE.
+        removed, _ = CommentLike.objects.filter(user=user, comment_id=comment_id).delete()
+        if removed:
+            _move_count(comments, -1)
+            liked = False
+        else:
+            liked = True
+            try:
+                with transaction.atomic():
+                    CommentLike.objects.create(user=user, comment_id=comment_id)
+            except IntegrityError:
+                pass
+            else:
+                # The foreign key is only checked at commit; no row to count means no comment.
+                if not _move_count(comments, 1):
+                    raise Comment.DoesNotExist(comment_id)
+        return liked, comments.values_list('like_count', flat=True).get()
+
+
+def liked_comment_ids(user, comments):
+    """Ids among `comments` that `user` has liked, from one IN query."""
+    if not user.is_authenticated or not comments:
+        return set()
+    return set(CommentLike.objects.filter(
+        user=user, comment_id__in=[comment.pk for comment in comments],
+    ).values_list('comment_id', flat=True))
+
+
+def forget_user_likes(user):
+    """Takes `user`'s likes out of the comment counts, before they are deleted."""
+    return _move_count(Comment.objects.filter(likes__user=user), -1)
+
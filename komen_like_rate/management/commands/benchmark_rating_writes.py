@@ -0,0 +1,69 @@
+import random
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from highlight.models import Highlight
+from komen_like_rate.rating_buffer import RatingBuffer
+from komen_like_rate.ratings import rate_highlight
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures votes/sec of direct rating writes against the write-behind "
+        "buffer on the same simulated burst. Every run is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--votes', type=int, default=5000)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--highlights', type=int, default=20, help="Highlights the burst is spread over.")
+        parser.add_argument('--batch', type=int, default=500, help="Buffer size that triggers a flush.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        highlights = list(Highlight.objects.only('id').order_by('-created_at', '-id')[:options['highlights']])
+        if not highlights:
+            raise CommandError("No highlights to vote on.")
+        rng = random.Random(options['seed'])
+        burst = [
+            (rng.randrange(options['users']), rng.choice(highlights), rng.randint(1, 5))
+            for _ in range(options['votes'])
+        ]
+
+        direct = self._run(options['users'], lambda users: [
+            rate_highlight(users[user], highlight, value) for user, highlight, value in burst
+        ])
+        buffered = self._run(options['users'], lambda users: self._buffered(users, burst, options['batch']))
+
+        self.stdout.write(
+            f"{len(burst)} votes by {options['users']} users on {len(highlights)} highlights "
+            f"(commits excluded, so direct mode is measured at its best):"
+        )
+        for name, seconds in (('direct', direct), (f"buffered (flush every {options['batch']})", buffered)):
+            self.stdout.write(f"  {name}: {seconds:.2f}s, {len(burst) / seconds:.0f} votes/sec")
+        self.stdout.write(self.style.SUCCESS(f"Buffered is {direct / buffered:.1f}x faster."))
+
+    def _buffered(self, users, burst, batch):
+        # Flushes are triggered by size only; the timer thread would use its own connection.
+        buffer = RatingBuffer(max_entries=batch, flush_ms=10 ** 9)
+        for user, highlight, value in burst:
+            buffer.add(users[user].pk, highlight.pk, value)
+        buffer.flush()
+
+    def _run(self, user_count, vote):
+        """Times `vote(users)` against throwaway users, then rolls everything back."""
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(User(username=f"benchmark-rater-{i}") for i in range(user_count))
+                users = list(User.objects.filter(username__startswith='benchmark-rater-').order_by('pk'))
+                started = time.perf_counter()
+                vote(users)
+                elapsed = time.perf_counter() - started
+                raise Rollback
+        except Rollback:
+            return elapsed
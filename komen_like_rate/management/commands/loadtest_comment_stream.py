@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from highlight.models import Highlight
+from komen_like_rate.comment_events import broker, get_transport
+
+
+def _rss_kb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Opens many comment streams against kick_chronicle.asgi in this process "
+        "(no server or sockets involved), publishes events and reports connect "
+        "time, memory per stream and fan-out latency. Nothing is written to the "
+        "database unless the configured transport does."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=5)
+        parser.add_argument('--host', default='localhost', help="Host header; must be in ALLOWED_HOSTS.")
+
+    def handle(self, *args, **options):
+        highlight = Highlight.objects.only('id').first()
+        if highlight is None:
+            raise CommandError("No highlight to stream.")
+        asyncio.run(self._run(highlight.pk, options['subscribers'], options['events'], options['host']))
+
+    async def _run(self, highlight_id, count, events, host):
+        from kick_chronicle.asgi import application as app
+        path = reverse('komen_like_rate:comment_stream', args=[highlight_id])
+        stop = asyncio.Event()
+        connected = asyncio.Semaphore(0)
+        received = [0] * events
+        all_received = [asyncio.Event() for _ in range(events)]
+        statuses = []
+
+        async def client():
+            request_sent = False
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await stop.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+                    if message['status'] != 200:
+                        connected.release()
+                    return
+                body = message.get('body', b'')
+                if body.startswith(b'retry:'):
+                    connected.release()
+                elif b'"seq": ' in body:
+                    seq = int(body.split(b'"seq": ')[1].split(b'}')[0])
+                    received[seq] += 1
+                    if received[seq] == count:
+                        all_received[seq].set()
+
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+                'query_string': b'', 'root_path': '', 'headers': [(b'host', host.encode())],
+                'client': ('127.0.0.1', 0), 'server': (host, 80),
+            }
+            await app(scope, receive, send)
+
+        rss_before = _rss_kb()
+        threads_before = threading.active_count()
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(client()) for _ in range(count)]
+        for _ in range(count):
+            await connected.acquire()
+        connect_time = time.perf_counter() - started
+        rss_after = _rss_kb()
+        threads_open = threading.active_count()
+        if set(statuses) != {200}:
+            stop.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise CommandError(f"Streams answered {sorted(set(statuses))}; is the highlight there and the host allowed?")
+
+        transport = get_transport()
+        latencies = []
+        for seq in range(events):
+            event = {'type': 'created', 'highlight_id': str(highlight_id), 'comment': {'id': 0, 'seq': seq}}
+            published = time.perf_counter()
+            await sync_to_async(transport.publish)(event)
+            await all_received[seq].wait()
+            latencies.append(time.perf_counter() - published)
+
+        open_streams = len(broker)
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.stdout.write(f"{count} streams open in {connect_time:.2f}s ({count / connect_time:.0f}/s), {open_streams} subscribed")
+        if rss_before and rss_after:
+            self.stdout.write(f"RSS +{(rss_after - rss_before) / 1024:.1f} MB, ~{(rss_after - rss_before) / count:.1f} KB per stream")
+        self.stdout.write(f"Threads: {threads_before} before, {threads_open} with the streams open")
+        self.stdout.write(
+            f"Fan-out of one event to all {count}: "
+            f"median {sorted(latencies)[len(latencies) // 2] * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS(f"{len(broker)} streams left after disconnecting."))
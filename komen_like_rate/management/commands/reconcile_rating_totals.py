@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from highlight.models import Highlight
+from komen_like_rate.leaderboard import refresh_leaderboard
+from komen_like_rate.ratings import drifted_highlights, rebuild_daily_buckets, recompute_rating_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Finds highlights whose rating_count/rating_sum no longer match their "
+        "ratings (e.g. after deleting ratings in the admin) and recomputes them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report the drifted highlights.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--buckets', action='store_true', help="Also rebuild the daily rating buckets.")
+
+    def handle(self, *args, **options):
+        if options['buckets'] and not options['dry_run']:
+            buckets = rebuild_daily_buckets()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} daily rating buckets."))
+
+        drifted = list(drifted_highlights().values_list('pk', flat=True))
+        if options['dry_run'] or not drifted:
+            self.stdout.write(f"{len(drifted)} highlights have drifted rating totals.")
+            return
+
+        batch_size = options['batch_size']
+        for start in range(0, len(drifted), batch_size):
+            recompute_rating_totals(Highlight.objects.filter(pk__in=drifted[start:start + batch_size]))
+        refresh_leaderboard()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed rating totals of {len(drifted)} highlights."))
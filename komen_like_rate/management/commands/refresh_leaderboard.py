@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from komen_like_rate.leaderboard import refresh_leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the top rated leaderboard from the highlights' rating totals, "
+        "re-scoring every entry. Run after changing the LEADERBOARD_PRIOR_* settings."
+    )
+
+    def handle(self, *args, **options):
+        entries = refresh_leaderboard()
+        self.stdout.write(self.style.SUCCESS(f"Leaderboard rebuilt with {entries} highlights."))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0015_highlight_rating_totals'),
+        ('komen_like_rate', '0003_remove_rating_created'),
+    ]
+
+    operations = [
+        # Existing votes have no known date and stay NULL (outside every bucket).
+        migrations.AddField(
+            model_name='rating',
+            name='rated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='rating',
+            name='rated_at',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, null=True),
+        ),
+        migrations.CreateModel(
+            name='RatingDailyBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('rating_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('highlight', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_ratings', to='highlight.highlight')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'highlight'], name='rating_bucket_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('highlight', 'day'), name='unique_highlight_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from komen_like_rate.leaderboard import bayesian_score
+
+
+def populate_leaderboard(apps, schema_editor):
+    Highlight = apps.get_model('highlight', 'Highlight')
+    LeaderboardEntry = apps.get_model('komen_like_rate', 'LeaderboardEntry')
+    scored = sorted(
+        (
+            (bayesian_score(rating_count, rating_sum), highlight_id)
+            for highlight_id, rating_count, rating_sum in Highlight.objects.filter(
+                rating_count__gt=0
+            ).values_list('id', 'rating_count', 'rating_sum').iterator()
+        ),
+        reverse=True,
+    )
+    LeaderboardEntry.objects.bulk_create(
+        (
+            LeaderboardEntry(highlight_id=highlight_id, score=score, rank=rank)
+            for rank, (score, highlight_id) in enumerate(scored, start=1)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0015_highlight_rating_totals'),
+        ('komen_like_rate', '0004_rating_daily_buckets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('highlight', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard_entry', serialize=False, to='highlight.highlight')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['score', 'highlight'], name='leaderboard_score_idx'), models.Index(fields=['rank'], name='leaderboard_rank_idx')],
+            },
+        ),
+        migrations.RunPython(populate_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('highlight', '0015_highlight_rating_totals'),
+        ('komen_like_rate', '0005_leaderboard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['highlight', 'created_at', 'id'], name='comment_highlight_created_idx'),
+        ),
+    ]
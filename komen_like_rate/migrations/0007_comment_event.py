@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('komen_like_rate', '0006_comment_highlight_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('highlight_id', models.UUIDField()),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('deleted', 'Deleted')], max_length=10)),
+                ('comment', models.JSONField()),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['highlight_id', 'id'], name='comment_event_replay_idx')],
+            },
+        ),
+    ]
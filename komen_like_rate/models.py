@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Rating(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ratings')
@@ -8,6 +9,9 @@ class Rating(models.Model):
     value = models.PositiveSmallIntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(5)]
     )  
+    # When the vote was cast or last changed; decides its RatingDailyBucket.
+    # Empty for votes from before the buckets existed.
+    rated_at = models.DateTimeField(null=True, blank=True, default=timezone.now)
 
     class Meta:
         constraints = [
@@ -19,9 +23,51 @@ class Comment(models.Model):
     highlight = models.ForeignKey('highlight.Highlight', on_delete=models.CASCADE, related_name='comments')
     content = models.TextField()  
     created_at = models.DateTimeField(auto_now_add=True)
+    # Moved by every like toggle (komen_like_rate.likes).
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Reply threads (komen_like_rate.threads). `path` is the ids from the
+    # root down to this comment, each zero-padded to PATH_STEP digits, so
+    # a subtree is one indexed range and ordering by path is depth-first.
+    parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='replies', editable=False, db_index=False,
+    )
+    path = models.CharField(max_length=255, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Direct replies, moved with every reply posted or deleted.
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+
+    PATH_STEP = 12
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Top-level comment feeds of a highlight and their (created_at, id) cursor
+            models.Index(
+                fields=['highlight', 'created_at', 'id'], name='comment_root_created_idx',
+                condition=models.Q(parent__isnull=True),
+            ),
+            # The same feeds sorted by most liked
+            models.Index(
+                fields=['highlight', 'like_count', 'created_at', 'id'], name='comment_root_likes_idx',
+                condition=models.Q(parent__isnull=True),
+            ),
+            # Replies of a comment, oldest first
+            models.Index(fields=['parent', 'created_at', 'id'], name='comment_parent_created_idx'),
+            # Subtrees: path range scans, in depth-first order
+            models.Index(fields=['path'], name='comment_path_idx'),
+        ]
+
+class CommentLike(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comment_likes')
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name='likes')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "comment"], name="unique_user_comment_like")
+        ]
 
 class Favorite(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorites')
@@ -30,4 +76,62 @@ class Favorite(models.Model):
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["user", "highlight"], name="unique_user_favorite")
-        ]  
\ No newline at end of file
+        ]  
+class RatingDailyBucket(models.Model):
+    """
+    Count and sum of the votes a highlight received on one day, kept in
+    step by komen_like_rate.ratings, so a "top rated this week" ranking
+    sums a handful of buckets instead of the raw ratings.
+    """
+    highlight = models.ForeignKey('highlight.Highlight', on_delete=models.CASCADE, related_name='daily_ratings')
+    day = models.DateField()
+    rating_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["highlight", "day"], name="unique_highlight_day")
+        ]
+        indexes = [
+            models.Index(fields=["day", "highlight"], name="rating_bucket_day_idx")
+        ]
+
+
+class LeaderboardEntry(models.Model):
+    """
+    A rated highlight on the top rated leaderboard, maintained by
+    komen_like_rate.leaderboard. `score` is the Bayesian average of its
+    votes; its rank is worked out on read from the (score, highlight) order.
+    """
+    highlight = models.OneToOneField(
+        'highlight.Highlight', on_delete=models.CASCADE, primary_key=True, related_name='leaderboard_entry'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["score", "highlight"], name="leaderboard_score_idx"),
+        ]
+
+
+class CommentEvent(models.Model):
+    """
+    A comment created or deleted, for the live comment streams of the
+    other workers (komen_like_rate.comment_events.DatabaseTransport).
+    Not a foreign key to the highlight: events outlive the rows they
+    describe and are pruned after COMMENT_EVENT_RETENTION seconds.
+    """
+    CREATED = 'created'
+    DELETED = 'deleted'
+    KIND_CHOICES = [(CREATED, 'Created'), (DELETED, 'Deleted')]
+
+    highlight_id = models.UUIDField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    comment = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Replaying a highlight's events after a client's Last-Event-ID
+            models.Index(fields=["highlight_id", "id"], name="comment_event_replay_idx"),
+        ]
@@ -0,0 +1,113 @@
+"""
+Write-behind buffer for rating bursts (RATING_WRITE_MODE = 'buffered').
+
+During a live match the mobile app sends thousands of votes a minute,
+and in direct mode each one is its own transaction. Buffered, a vote is
+put in a per-process dict keyed by (user id, highlight id) (a later vote
+of the same user replaces the earlier one) and the dict is written with
+komen_like_rate.ratings.rate_highlights, one bulk upsert plus one totals
+UPDATE, when it holds RATING_BUFFER_MAX_ENTRIES votes or
+RATING_BUFFER_FLUSH_MS after its first vote, whichever comes first.
+
+The trade-offs: totals, rankings and the user's own rating lag by up to
+the flush interval, and votes still buffered when the process is killed
+(not a normal exit, which flushes) are lost. Direct mode is the default.
+"""
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .ratings import rate_highlights
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_FLUSH_MS = 1000
+
+
+class FlushFailed(Exception):
+    """Writing the buffered votes failed; already logged, and the votes are requeued."""
+
+
+def buffering_enabled():
+    return getattr(settings, 'RATING_WRITE_MODE', 'direct') == 'buffered'
+
+
+class RatingBuffer:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, flush_ms=DEFAULT_FLUSH_MS):
+        self.max_entries = max_entries
+        self.flush_ms = flush_ms
+        self._votes = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._votes)
+
+    def add(self, user_id, highlight_id, value):
+        """Queues a vote; flushes in the calling thread if the buffer is full."""
+        with self._lock:
+            self._votes[user_id, highlight_id] = (value, timezone.now())
+            full = len(self._votes) >= self.max_entries
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_ms / 1000, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            try:
+                self.flush()
+            except FlushFailed:
+                pass  # the vote itself is safe in the buffer
+
+    def flush(self):
+        """
+        Writes the queued votes. Returns the number of ratings created or
+        changed; raises FlushFailed if the write fails.
+        """
+        with self._lock:
+            votes, self._votes = self._votes, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not votes:
+            return 0
+        try:
+            return rate_highlights(votes)
+        except Exception as e:
+            logger.exception("Flushing %d buffered ratings failed; requeued", len(votes))
+            with self._lock:
+                # Votes queued since the failed flush are newer and win.
+                for key, vote in votes.items():
+                    self._votes.setdefault(key, vote)
+            raise FlushFailed(len(votes)) from e
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except FlushFailed:
+            pass  # the next vote restarts the timer
+        except Exception:
+            # Nothing up the timer thread would log it
+            logger.exception("Flushing buffered ratings from the timer failed")
+        finally:
+            # The timer thread got its own connection; don't leak it.
+            connection.close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_rating_buffer():
+    """The process-wide buffer, created from settings on first use."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = RatingBuffer(
+                max_entries=getattr(settings, 'RATING_BUFFER_MAX_ENTRIES', DEFAULT_MAX_ENTRIES),
+                flush_ms=getattr(settings, 'RATING_BUFFER_FLUSH_MS', DEFAULT_FLUSH_MS),
+            )
+            atexit.register(_buffer.flush)
+        return _buffer
@@ -0,0 +1,264 @@
+"""
+Writes to Rating that keep Highlight.rating_count/rating_sum in step.
+
+Every vote moves the highlight's totals by the difference it makes
+(+1 and +value for a new vote, value - old value for a changed one)
+with a single UPDATE ... SET rating_sum = rating_sum + %s in the same
+transaction as the Rating row, so concurrent votes can't overwrite each
+other's totals. Highlight.avg_rating is a stored generated column over
+the two totals.
+
+The same deltas go to the RatingDailyBucket of the day the vote was
+cast; changing a vote moves it out of its old day's bucket into today's.
+Rankings over a date window sum those buckets, and the highlight's
+leaderboard entry is re-scored (see komen_like_rate.leaderboard).
+
+Both rate_highlight and the bulk rate_highlights lock the highlight rows
+before touching their ratings, so votes on the same highlight (direct or
+flushed from a RatingBuffer in another worker) queue up on that lock in
+the same order and can't deadlock.
+
+Rows deleted outside these helpers (admin, raw SQL) leave the totals
+behind; `manage.py reconcile_rating_totals` recomputes them.
+"""
+from collections import Counter
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+from highlight.models import Highlight
+from kick_chronicle.caching import bump_version
+from .leaderboard import update_leaderboard_entry
+from .models import Rating, RatingDailyBucket
+
+
+def _move_totals(highlights, count, total):
+    return highlights.update(
+        rating_count=F('rating_count') + count,
+        rating_sum=F('rating_sum') + total,
+    )
+
+
+def _move_bucket(highlight_id, day, count, total):
+    buckets = RatingDailyBucket.objects.filter(highlight_id=highlight_id, day=day)
+    moved = buckets.update(rating_count=F('rating_count') + count, rating_sum=F('rating_sum') + total)
+    if moved or count <= 0:
+        return
+    # First vote of the day; a concurrent first vote may insert it first.
+    try:
+        with transaction.atomic():
+            RatingDailyBucket.objects.create(highlight_id=highlight_id, day=day, rating_count=count, rating_sum=total)
+    except IntegrityError:
+        buckets.update(rating_count=F('rating_count') + count, rating_sum=F('rating_sum') + total)
+
+
+def _lock_highlights(highlight_ids):
+    """Locks the highlight rows in primary key order; returns the ids that still exist."""
+    return set(
+        Highlight.objects.select_for_update().filter(pk__in=highlight_ids)
+        .order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def rate_highlight(user, highlight, value):
+    """
+    Creates or changes `user`'s rating of `highlight` and updates the
+    highlight's totals in the same transaction. Returns (rating, created).
+    """
+    with transaction.atomic():
+        _lock_highlights([highlight.pk])
+        # The row lock makes a concurrent change of the same vote wait, so
+        # the delta below is taken against the value actually replaced.
+        rating, created = Rating.objects.select_for_update().get_or_create(
+            user=user,
+            highlight=highlight,
+            defaults={'value': value},
+        )
+        changed = not created and rating.value != value
+        if created:
+            _move_totals(Highlight.objects.filter(pk=highlight.pk), 1, value)
+            _move_bucket(highlight.pk, timezone.localdate(rating.rated_at), 1, value)
+        elif changed:
+            _move_totals(Highlight.objects.filter(pk=highlight.pk), 0, value - rating.value)
+            if rating.rated_at is not None:
+                _move_bucket(highlight.pk, timezone.localdate(rating.rated_at), -1, -rating.value)
+            rating.value = value
+            rating.rated_at = timezone.now()
+            rating.save(update_fields=['value', 'rated_at'])
+            _move_bucket(highlight.pk, timezone.localdate(rating.rated_at), 1, value)
+        if created or changed:
+            update_leaderboard_entry(highlight.pk)
+        bump_version('rating')
+    return rating, created
+
+
+def rate_highlights(votes):
+    """
+    Writes many votes at once: `votes` maps (user id, highlight id) to
+    (value, rated_at), one vote per key (last write wins upstream).
+
+    All ratings go in with one bulk upsert on unique_user_highlight, the
+    totals of every highlight move in one UPDATE, and each touched
+    (highlight, day) bucket and leaderboard entry is updated once, however
+    many votes it got. Votes for highlights or users deleted meanwhile
+    are dropped. Returns the number of ratings created or changed.
+    """
+    if not votes:
+        return 0
+    with transaction.atomic():
+        highlight_ids = _lock_highlights({highlight_id for _, highlight_id in votes})
+        user_ids = set(User.objects.filter(pk__in={user_id for user_id, _ in votes}).values_list('pk', flat=True))
+        votes = {
+            (user_id, highlight_id): vote for (user_id, highlight_id), vote in votes.items()
+            if user_id in user_ids and highlight_id in highlight_ids
+        }
+        existing = {
+            (user_id, highlight_id): (value, rated_at)
+            for user_id, highlight_id, value, rated_at in Rating.objects.filter(
+                user_id__in=user_ids, highlight_id__in=highlight_ids,
+            ).values_list('user_id', 'highlight_id', 'value', 'rated_at')
+        }
+
+        ratings = []
+        counts, sums = Counter(), Counter()
+        bucket_counts, bucket_sums = Counter(), Counter()
+        for (user_id, highlight_id), (value, rated_at) in votes.items():
+            old_value, old_rated_at = existing.get((user_id, highlight_id), (None, None))
+            if old_value == value:
+                continue
+            if old_value is None:
+                counts[highlight_id] += 1
+                sums[highlight_id] += value
+            else:
+                sums[highlight_id] += value - old_value
+                if old_rated_at is not None:
+                    old_day = (highlight_id, timezone.localdate(old_rated_at))
+                    bucket_counts[old_day] -= 1
+                    bucket_sums[old_day] -= old_value
+            new_day = (highlight_id, timezone.localdate(rated_at))
+            bucket_counts[new_day] += 1
+            bucket_sums[new_day] += value
+            ratings.append(Rating(user_id=user_id, highlight_id=highlight_id, value=value, rated_at=rated_at))
+
+        if not ratings:
+            return 0
+        Rating.objects.bulk_create(
+            ratings,
+            update_conflicts=True,
+            unique_fields=['user', 'highlight'],
+            update_fields=['value', 'rated_at'],
+        )
+        moved = list(sums.keys() | counts.keys())
+
+        def per_highlight(deltas):
+            return Case(
+                *[When(pk=highlight_id, then=Value(deltas[highlight_id])) for highlight_id in moved],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        Highlight.objects.filter(pk__in=moved).update(
+            rating_count=F('rating_count') + per_highlight(counts),
+            rating_sum=F('rating_sum') + per_highlight(sums),
+        )
+        for (highlight_id, day), count in bucket_counts.items():
+            if count or bucket_sums[highlight_id, day]:
+                _move_bucket(highlight_id, day, count, bucket_sums[highlight_id, day])
+        for highlight_id in sorted(moved):
+            update_leaderboard_entry(highlight_id)
+        bump_version('rating')
+    return len(ratings)
+
+
+def forget_user_ratings(user):
+    """
+    Takes `user`'s votes out of the highlight totals and daily buckets,
+    before the ratings are deleted.
+    """
+    value = Subquery(Rating.objects.filter(highlight=OuterRef('pk'), user=user).values('value')[:1])
+    updated = Highlight.objects.filter(rating__user=user).update(
+        rating_count=F('rating_count') - 1,
+        rating_sum=F('rating_sum') - value,
+    )
+    ratings = Rating.objects.filter(user=user)
+    for highlight_id, rated_at, value in ratings.values_list('highlight_id', 'rated_at', 'value').iterator():
+        if rated_at is not None:
+            _move_bucket(highlight_id, timezone.localdate(rated_at), -1, -value)
+        update_leaderboard_entry(highlight_id)
+    if updated:
+        bump_version('rating')
+    return updated
+
+
+def rated_in_window(start, end):
+    """
+    Highlights voted on between the `start` and `end` days (inclusive),
+    annotated with window_count, window_sum and window_avg summed from
+    their daily buckets.
+    """
+    return Highlight.objects.filter(
+        daily_ratings__day__gte=start,
+        daily_ratings__day__lte=end,
+    ).annotate(
+        window_count=Sum('daily_ratings__rating_count'),
+        window_sum=Sum('daily_ratings__rating_sum'),
+    ).filter(window_count__gt=0).annotate(
+        window_avg=Cast('window_sum', FloatField()) / Cast('window_count', FloatField()),
+    )
+
+
+def _actual_total(function):
+    return Coalesce(Subquery(
+        Rating.objects.filter(highlight=OuterRef('pk'))
+        .order_by().values('highlight').annotate(result=function).values('result')
+    ), 0)
+
+
+def drifted_highlights(queryset=None):
+    """Highlights whose stored totals differ from their Rating rows."""
+    queryset = Highlight.objects.all() if queryset is None else queryset
+    return queryset.alias(
+        actual_count=_actual_total(Count('id')),
+        actual_sum=_actual_total(Sum('value')),
+    ).exclude(rating_count=F('actual_count'), rating_sum=F('actual_sum'))
+
+
+def recompute_rating_totals(queryset):
+    """Recomputes the totals of `queryset` from the Rating table in one UPDATE."""
+    updated = queryset.update(
+        rating_count=_actual_total(Count('id')),
+        rating_sum=_actual_total(Sum('value')),
+    )
+    if updated:
+        bump_version('rating')
+    return updated
+
+
+def rebuild_daily_buckets(highlights=None, chunk_size=2000):
+    """
+    Rebuilds the RatingDailyBucket rows of `highlights` (a queryset,
+    default all) from their dated ratings. Returns the number of buckets.
+    """
+    ratings = Rating.objects.filter(rated_at__isnull=False)
+    buckets = RatingDailyBucket.objects.all()
+    if highlights is not None:
+        ratings = ratings.filter(highlight__in=highlights)
+        buckets = buckets.filter(highlight__in=highlights)
+
+    counts, sums = Counter(), Counter()
+    for highlight_id, rated_at, value in ratings.values_list('highlight_id', 'rated_at', 'value').iterator(chunk_size=chunk_size):
+        key = (highlight_id, timezone.localdate(rated_at))
+        counts[key] += 1
+        sums[key] += value
+
+    with transaction.atomic():
+        buckets.delete()
+        RatingDailyBucket.objects.bulk_create(
+            (
+                RatingDailyBucket(highlight_id=highlight_id, day=day, rating_count=count, rating_sum=sums[highlight_id, day])
+                for (highlight_id, day), count in counts.items()
+            ),
+            batch_size=chunk_size,
+        )
+        bump_version('rating')
+    return len(counts)
@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from .favorites import forget_user_favorites
+from .likes import forget_user_likes
+from .ratings import forget_user_ratings
+from .threads import forget_user_comments
+
+
+@receiver(pre_delete, sender=User)
+def forget_ratings_of_deleted_user(sender, instance, **kwargs):
+    # Rating rows go with the user (CASCADE) but the highlight totals don't.
+    forget_user_ratings(instance)
+
+
+@receiver(pre_delete, sender=User)
+def forget_favorites_of_deleted_user(sender, instance, **kwargs):
+    forget_user_favorites(instance)
+
+
+@receiver(pre_delete, sender=User)
+def forget_likes_of_deleted_user(sender, instance, **kwargs):
+    forget_user_likes(instance)
+
+
+@receiver(pre_delete, sender=User)
+def forget_comments_of_deleted_user(sender, instance, **kwargs):
+    # Their replies go with the user; the parents' reply_count doesn't.
+    forget_user_comments(instance)
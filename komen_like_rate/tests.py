@@ -1,3 +1,352 @@
-from django.test import TestCase
+import asyncio
+import threading
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from highlight.models import Highlight
+from kick_chronicle.asgi import application
+from .comment_events import broker
+from .favorites import toggle_highlight_favorite
+from .leaderboard import ORDERING, bayesian_score, refresh_leaderboard, with_ranks
+from .likes import toggle_like
+from .models import Comment, CommentLike, Favorite, LeaderboardEntry, Rating
+from .ratings import rate_highlight, rate_highlights
+from .threads import MAX_DEPTH, post_comment, remove_comment, subtree
 
-# Create your tests here.
+
+def run_concurrently(function, calls):
+    """
+    Runs function(*args) for every args in `calls`, each in its own thread
+    and released together. Returns the exceptions raised.
+    """
+    barrier = threading.Barrier(len(calls))
+    errors = []
+
+    def run(args):
+        try:
+            barrier.wait()
+            function(*args)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(args,)) for args in calls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def make_highlights(count):
+    return [
+        Highlight.objects.create(name=f"Highlight {i}", url=f"https://example.com/{i}.mp4", description="")
+        for i in range(count)
+    ]
+
+
+class LeaderboardConcurrencyTests(TransactionTestCase):
+    def test_concurrent_votes_on_different_highlights(self):
+        highlights = make_highlights(6)
+        users = [User.objects.create_user(f"voter{i}") for i in range(4)]
+        # Every highlight overtakes or falls behind the others while they vote
+        calls = [
+            (user, highlight, 1 + (i + j) % 5)
+            for i, user in enumerate(users)
+            for j, highlight in enumerate(highlights)
+        ]
+        errors = run_concurrently(rate_highlight, calls)
+
+        self.assertEqual(errors, [])
+        entries = with_ranks(list(LeaderboardEntry.objects.order_by(*ORDERING)))
+        self.assertEqual([entry.rank for entry in entries], list(range(1, len(highlights) + 1)))
+        for entry in entries:
+            highlight = Highlight.objects.get(pk=entry.pk)
+            self.assertEqual(highlight.rating_count, len(users))
+            self.assertAlmostEqual(entry.score, bayesian_score(highlight.rating_count, highlight.rating_sum))
+
+
+class FavoriteToggleConcurrencyTests(TransactionTestCase):
+    def assert_count_matches_rows(self, highlight):
+        highlight.refresh_from_db(fields=['favorite_count'])
+        self.assertEqual(highlight.favorite_count, Favorite.objects.filter(highlight=highlight).count())
+
+    def test_parallel_toggles_by_many_users(self):
+        highlight, = make_highlights(1)
+        users = [User.objects.create_user(f"fan{i}") for i in range(8)]
+        errors = run_concurrently(toggle_highlight_favorite, [(user, highlight.pk) for user in users])
+
+        self.assertEqual(errors, [])
+        self.assert_count_matches_rows(highlight)
+        self.assertEqual(highlight.favorite_count, len(users))
+
+    def test_double_taps(self):
+        highlight, = make_highlights(1)
+        users = [User.objects.create_user(f"tapper{i}") for i in range(4)]
+        # Each user taps three times at once; whatever order they land in,
+        # the row and the count must agree
+        errors = run_concurrently(toggle_highlight_favorite, [(user, highlight.pk) for user in users * 3])
+
+        self.assertEqual(errors, [])
+        self.assert_count_matches_rows(highlight)
+        for user in users:
+            self.assertLessEqual(Favorite.objects.filter(user=user, highlight=highlight).count(), 1)
+
+
+class CommentLikeCountTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("author")
+        highlight, = make_highlights(1)
+        self.comment = Comment.objects.create(user=self.author, highlight=highlight, content="Goal!")
+        self.users = [User.objects.create_user(f"liker{i}") for i in range(3)]
+
+    def assert_count_matches_rows(self):
+        self.comment.refresh_from_db(fields=['like_count'])
+        self.assertEqual(self.comment.like_count, CommentLike.objects.filter(comment=self.comment).count())
+
+    def test_toggles(self):
+        for user in self.users:
+            self.assertEqual(toggle_like(user, self.comment.pk)[0], True)
+        self.assertEqual(toggle_like(self.users[0], self.comment.pk), (False, 2))
+        self.assertEqual(toggle_like(self.users[0], self.comment.pk), (True, 3))
+        self.assertEqual(toggle_like(self.users[1], self.comment.pk), (False, 2))
+        self.assert_count_matches_rows()
+
+    def test_unknown_comment(self):
+        with self.assertRaises(Comment.DoesNotExist):
+            toggle_like(self.users[0], self.comment.pk + 1000)
+        self.assertFalse(CommentLike.objects.exists())
+
+    def test_deleted_user_takes_their_likes_out(self):
+        for user in self.users:
+            toggle_like(user, self.comment.pk)
+        self.users[0].delete()
+        self.assert_count_matches_rows()
+        self.assertEqual(self.comment.like_count, 2)
+
+
+class CommentLikeConcurrencyTests(TransactionTestCase):
+    def test_double_taps(self):
+        highlight, = make_highlights(1)
+        author = User.objects.create_user("author")
+        comment = Comment.objects.create(user=author, highlight=highlight, content="Goal!")
+        users = [User.objects.create_user(f"tapper{i}") for i in range(4)]
+        errors = run_concurrently(toggle_like, [(user, comment.pk) for user in users * 3])
+
+        self.assertEqual(errors, [])
+        comment.refresh_from_db(fields=['like_count'])
+        self.assertEqual(comment.like_count, CommentLike.objects.filter(comment=comment).count())
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(f"fan{i}") for i in range(3)]
+        self.highlight, = make_highlights(1)
+
+    def post(self, parent=None, user=None):
+        return post_comment(user or self.users[0], self.highlight, "What a goal", parent=parent)
+
+    def assert_counts_match_rows(self):
+        for comment in Comment.objects.all():
+            self.assertEqual(comment.reply_count, Comment.objects.filter(parent=comment).count(), comment.path)
+
+    def test_replies_and_deletes(self):
+        root = self.post()
+        first, second = self.post(root), self.post(root, self.users[1])
+        self.post(first, self.users[2])
+        self.post(first)
+        self.assert_counts_match_rows()
+
+        remove_comment(first)
+        self.assert_counts_match_rows()
+        self.assertEqual(list(Comment.objects.values_list('pk', flat=True).order_by('pk')), [root.pk, second.pk])
+
+    def test_deleted_user(self):
+        root = self.post()
+        reply = self.post(root, self.users[1])
+        self.post(reply)
+        self.post(root, self.users[1])
+        self.users[1].delete()
+        self.assert_counts_match_rows()
+        self.assertEqual(list(Comment.objects.all()), [root])
+
+    def test_subtree_in_path_order(self):
+        root = self.post()
+        first = self.post(root)
+        other_root = self.post()
+        second = self.post(root)
+        first_first = self.post(first)
+        second_first = self.post(second)
+        first_second = self.post(first)
+        self.post(other_root)
+
+        self.assertEqual(
+            list(subtree(root).order_by('path')),
+            [root, first, first_first, first_second, second, second_first],
+        )
+        self.assertEqual(list(subtree(first_first)), [first_first])
+
+    def test_replies_stop_nesting_at_max_depth(self):
+        comment = self.post()
+        for _ in range(MAX_DEPTH):
+            comment = self.post(comment)
+        self.assertEqual(comment.depth, MAX_DEPTH)
+
+        sibling = self.post(comment)
+        self.assertEqual((sibling.parent_id, sibling.depth), (comment.parent_id, MAX_DEPTH))
+        self.assert_counts_match_rows()
+
+
+class LeaderboardRankTests(TestCase):
+    def setUp(self):
+        self.highlights = make_highlights(5)
+        user = User.objects.create_user("voter")
+        for value, highlight in enumerate(self.highlights, start=1):
+            rate_highlight(user, highlight, value)
+
+    def test_ranks_follow_score(self):
+        entries = with_ranks(list(LeaderboardEntry.objects.order_by(*ORDERING)))
+        self.assertEqual([entry.pk for entry in entries], [h.pk for h in reversed(self.highlights)])
+        self.assertEqual([entry.rank for entry in entries], [1, 2, 3, 4, 5])
+
+    def test_filtered_page_keeps_board_ranks(self):
+        listed = [self.highlights[0].pk, self.highlights[2].pk]
+        entries = list(LeaderboardEntry.objects.filter(pk__in=listed).order_by(*ORDERING))
+        with self.assertNumQueries(1):
+            with_ranks(entries, contiguous=False)
+        self.assertEqual([entry.rank for entry in entries], [3, 5])
+
+    def test_refresh_keeps_scores(self):
+        before = dict(LeaderboardEntry.objects.values_list('pk', 'score'))
+        self.assertEqual(refresh_leaderboard(), 5)
+        after = dict(LeaderboardEntry.objects.values_list('pk', 'score'))
+        self.assertEqual(before.keys(), after.keys())
+        for pk, score in before.items():
+            self.assertAlmostEqual(after[pk], score)
+
+
+class RatingTotalsTests(TestCase):
+    """The highlight's rating_count/rating_sum/avg_rating follow its Rating rows."""
+
+    def setUp(self):
+        self.highlights = make_highlights(2)
+        self.users = [User.objects.create_user(f"voter-{i}") for i in range(3)]
+
+    def assert_totals_match_ratings(self):
+        for highlight in self.highlights:
+            highlight.refresh_from_db()
+            actual = Rating.objects.filter(highlight=highlight).aggregate(
+                count=Count('id'), total=Coalesce(Sum('value'), 0),
+            )
+            self.assertEqual((highlight.rating_count, highlight.rating_sum), (actual['count'], actual['total']))
+            self.assertAlmostEqual(highlight.avg_rating, actual['total'] / actual['count'] if actual['count'] else 0)
+
+    def test_first_votes(self):
+        for user, value in zip(self.users, (5, 2, 4)):
+            rate_highlight(user, self.highlights[0], value)
+        self.assert_totals_match_ratings()
+
+    def test_changed_and_repeated_votes(self):
+        rate_highlight(self.users[0], self.highlights[0], 5)
+        rate_highlight(self.users[1], self.highlights[0], 3)
+        rate_highlight(self.users[0], self.highlights[0], 1)
+        rate_highlight(self.users[1], self.highlights[0], 3)
+        self.assert_totals_match_ratings()
+        self.assertEqual(self.highlights[0].rating_count, 2)
+
+    def test_bulk_votes(self):
+        rate_highlight(self.users[0], self.highlights[0], 2)
+        now = timezone.now()
+        rate_highlights({
+            (self.users[0].pk, self.highlights[0].pk): (4, now),
+            (self.users[1].pk, self.highlights[0].pk): (5, now),
+            (self.users[1].pk, self.highlights[1].pk): (1, now),
+        })
+        self.assert_totals_match_ratings()
+
+    def test_deleted_user_takes_their_votes_out(self):
+        for user in self.users:
+            rate_highlight(user, self.highlights[0], 4)
+            rate_highlight(user, self.highlights[1], 2)
+        rate_highlight(self.users[0], self.highlights[1], 5)
+        self.users[0].delete()
+        self.assert_totals_match_ratings()
+        self.assertEqual(self.highlights[1].rating_count, 2)
+        for user in self.users[1:]:
+            user.delete()
+        self.assert_totals_match_ratings()
+        self.assertEqual(self.highlights[0].rating_count, 0)
+
+
+class CommentStreamTests(TransactionTestCase):
+    def setUp(self):
+        self.path = reverse('komen_like_rate:comment_stream', args=[make_highlights(1)[0].pk])
+
+    def request(self, method='GET', host='localhost', headers=()):
+        """
+        Calls the ASGI application, disconnecting after the first body chunk.
+        Returns (status, headers, body, streams subscribed when the chunk came).
+        """
+        return asyncio.run(self._request(method, host, headers))
+
+    async def _request(self, method, host, headers):
+        response = {'status': None, 'headers': {}, 'body': b'', 'subscribed': None}
+        first_chunk = asyncio.Event()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await first_chunk.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['headers'] = {name.decode().lower(): value.decode() for name, value in message['headers']}
+            elif message.get('body'):
+                response['body'] += message['body']
+                response['subscribed'] = len(broker)
+                first_chunk.set()
+
+        await application({
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': self.path, 'raw_path': self.path.encode(),
+            'query_string': b'', 'root_path': '', 'client': ('127.0.0.1', 0), 'server': (host, 80),
+            'headers': [(b'host', host.encode())] + [(name.encode(), value.encode()) for name, value in headers],
+        }, receive, send)
+        return response['status'], response['headers'], response['body'], response['subscribed']
+
+    def test_stream_goes_through_middleware(self):
+        status, headers, body, subscribed = self.request(headers=[('origin', 'http://10.0.2.2:8000')])
+        self.assertEqual(status, 200)
+        self.assertTrue(headers['content-type'].startswith('text/event-stream'))
+        self.assertIn('access-control-allow-origin', headers)
+        self.assertEqual(headers['x-content-type-options'], 'nosniff')
+        self.assertTrue(body.startswith(b'retry:'))
+        # Subscribed while open, unsubscribed once the client went away
+        self.assertEqual(subscribed, 1)
+        self.assertEqual(len(broker), 0)
+
+    def test_disallowed_host(self):
+        status, _, _, _ = self.request(host='evil.example')
+        self.assertEqual(status, 400)
+        self.assertEqual(len(broker), 0)
+
+    def test_head_and_other_methods_do_not_stream(self):
+        status, headers, body, _ = self.request('HEAD')
+        self.assertEqual((status, body), (200, b''))
+        self.assertTrue(headers['content-type'].startswith('text/event-stream'))
+        # CSRF turns away a bare POST first; OPTIONS gets to the view
+        status, _, _, _ = self.request('POST')
+        self.assertEqual(status, 403)
+        status, _, _, _ = self.request('OPTIONS')
+        self.assertEqual(status, 405)
+        self.assertEqual(len(broker), 0)
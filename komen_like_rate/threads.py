@@ -0,0 +1,103 @@
+"""
+Reply threads of comments, stored as materialized paths.
+
+Comment.path is the ids from the thread's root down to the comment, each
+zero-padded to Comment.PATH_STEP digits (no separators), so:
+
+- a comment's subtree is the path range [path, path + 1), one scan of
+  comment_path_idx with no recursion however deep the thread is, and
+- ordering by path lists a subtree depth first, replies after their
+  parent and siblings in the order they were posted (ids grow).
+
+The path is written right after the INSERT that assigns the id, in the
+same transaction, and never changes. Replies nest at most MAX_DEPTH
+levels; a reply to a comment at that depth joins its parent's replies
+instead, which keeps paths well inside their column.
+
+Comment.reply_count counts direct replies and moves with a single
+UPDATE ... SET reply_count = reply_count +/- 1 per reply posted or
+deleted, like the like and favorite counters. Deleting a comment
+deletes its whole subtree (CASCADE on parent); only the parent of the
+deleted comment needs its count moved.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import Comment
+
+# Depth of the deepest reply (roots are depth 0)
+MAX_DEPTH = 8
+
+
+class InvalidParent(ValueError):
+    pass
+
+
+def path_segment(comment_id):
+    return str(comment_id).zfill(Comment.PATH_STEP)
+
+
+def subtree_range(path):
+    """(start, end) such that start <= p < end for `path` and every path below it."""
+    return path, str(int(path) + 1).zfill(len(path))
+
+
+def subtree(comment):
+    """`comment` and all its replies, at any depth."""
+    start, end = subtree_range(comment.path)
+    return Comment.objects.filter(path__gte=start, path__lt=end)
+
+
+def _move_reply_count(comments, delta):
+    return comments.update(reply_count=F('reply_count') + delta)
+
+
+def post_comment(user, highlight, content, parent=None):
+    """
+    Creates a comment on `highlight`, as a reply to `parent` if given.
+    Raises InvalidParent when `parent` belongs to another highlight and
+    Comment.DoesNotExist (rolling back) when it was deleted meanwhile.
+    """
+    if parent is not None:
+        if parent.highlight_id != highlight.pk:
+            raise InvalidParent("The parent comment belongs to another highlight")
+        if parent.depth >= MAX_DEPTH:
+            parent = Comment.objects.only('pk', 'path', 'depth', 'highlight_id').get(pk=parent.parent_id)
+
+    with transaction.atomic():
+        comment = Comment.objects.create(
+            user=user,
+            highlight=highlight,
+            content=content,
+            parent=parent,
+            depth=parent.depth + 1 if parent is not None else 0,
+        )
+        comment.path = (parent.path if parent is not None else '') + path_segment(comment.pk)
+        Comment.objects.filter(pk=comment.pk).update(path=comment.path)
+        # The foreign key is only checked at commit; no row to count means no parent.
+        if parent is not None and not _move_reply_count(Comment.objects.filter(pk=parent.pk), 1):
+            raise Comment.DoesNotExist(parent.pk)
+    return comment
+
+
+def remove_comment(comment):
+    """Deletes `comment` with all its replies and takes it out of its parent's reply_count."""
+    with transaction.atomic():
+        # One range instead of the collector walking the replies level by level
+        subtree(comment).delete()
+        if comment.parent_id is not None:
+            _move_reply_count(Comment.objects.filter(pk=comment.parent_id), -1)
+
+
+def forget_user_comments(user):
+    """
+    Takes `user`'s replies out of their parents' reply_count, before the
+    comments (and the threads below them) are deleted.
+    """
+    replies = Subquery(
+        Comment.objects.filter(parent=OuterRef('pk'), user=user)
+        .order_by().values('parent').annotate(total=Count('id')).values('total')
+    )
+    parents = Comment.objects.filter(user=user, parent__isnull=False).values('parent')
+    return Comment.objects.filter(pk__in=parents).update(reply_count=F('reply_count') - Coalesce(replies, 0))
+
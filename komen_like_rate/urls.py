@@ -6,10 +6,13 @@ app_name = 'komen_like_rate'
 
 urlpatterns = [
     path('highlight/<uuid:highlight_id>/comment/', views.add_comment, name='add_comment'),
+    path('highlight/<uuid:highlight_id>/comments/', views.comment_list, name='comment_list'),
+    path('highlight/<uuid:highlight_id>/comments/stream/', views.comment_stream, name='comment_stream'),
     path('highlight/<uuid:highlight_id>/favorite/', views.toggle_favorite, name='toggle_favorite'),
     path('top-rated/', views.top_rated, name='top_rated'),
     path('submit-rating/', views.submit_rating, name='submit_rating'),
     path("comments/<int:comment_id>/delete/", views.delete_comment, name="delete_comment"),
+    path("comments/<int:comment_id>/like/", views.toggle_comment_like, name="toggle_comment_like"),
     path('favorites/', views.favorite_list, name='favorite_list'),
 
     path('mobile/highlight/<uuid:highlight_id>/comment/', views.add_comment_mobile, name='mobile_add_comment'),
@@ -21,11 +24,15 @@ urlpatterns = [
     path('mobile/highlight/<uuid:highlight_id>/favorite/', views.toggle_favorite_mobile, name='mobile_toggle_favorite'),
     path('mobile/submit-rating/', views.submit_rating_mobile, name='mobile_submit_rating'),
     path('mobile/comments/<int:comment_id>/delete/', views.delete_comment_mobile, name='mobile_delete_comment'),
+    path('mobile/comments/<int:comment_id>/like/', views.toggle_comment_like_mobile, name='mobile_toggle_comment_like'),
+    path('mobile/comments/<int:comment_id>/thread/', views.get_thread_mobile, name='mobile_comment_thread'),
     path('mobile/favorites/', views.favorite_list_mobile, name='mobile_favorite_list'),
     path('mobile/top-rated/', views.top_rated_mobile, name='mobile_top_rated'),
+    path('mobile/top-rated/window/', views.top_rated_window_mobile, name='mobile_top_rated_window'),
     path(
     'mobile/rating/<uuid:highlight_id>/',
     views.get_user_rating_mobile,
     name='mobile_get_user_rating'
     ),
+    path('mobile/user-state/', views.user_state_mobile, name='mobile_user_state'),
 ]
@@ -0,0 +1,60 @@
+"""
+The logged-in user's favorite and rating of many highlights at once.
+
+The Flutter cards show a heart and a star per highlight; instead of one
+request per card, the states of a whole page come from two queries
+(the user's Favorite rows and Rating rows among the page's ids) through
+the mobile/user-state/ endpoint or highlight_json?include=user_state.
+"""
+import uuid
+from django.conf import settings
+from .models import Favorite, Rating
+
+DEFAULT_MAX_IDS = 100
+
+
+def max_ids():
+    return getattr(settings, 'USER_STATE_MAX_IDS', DEFAULT_MAX_IDS)
+
+
+def parse_highlight_ids(values):
+    """
+    Distinct highlight UUIDs from `values` (strings), in request order.
+    Raises ValueError for a malformed id or more than max_ids() of them.
+    """
+    ids = []
+    for value in values:
+        try:
+            highlight_id = uuid.UUID(str(value).strip())
+        except ValueError:
+            raise ValueError(f"Invalid highlight id '{value}'")
+        if highlight_id not in ids:
+            ids.append(highlight_id)
+    if len(ids) > max_ids():
+        raise ValueError(f"At most {max_ids()} highlight ids per request")
+    return ids
+
+
+def user_highlight_states(user, highlight_ids):
+    """
+    {str(highlight id): {'favorited': bool, 'rating': int or None}} for
+    every id in `highlight_ids`. Anonymous users get the empty state
+    without touching the database.
+    """
+    highlight_ids = list(highlight_ids)
+    favorited = set()
+    ratings = {}
+    if user.is_authenticated and highlight_ids:
+        favorited = set(Favorite.objects.filter(
+            user=user, highlight_id__in=highlight_ids,
+        ).values_list('highlight_id', flat=True))
+        ratings = dict(Rating.objects.filter(
+            user=user, highlight_id__in=highlight_ids,
+        ).values_list('highlight_id', 'value'))
+    return {
+        str(highlight_id): {
+            'favorited': highlight_id in favorited,
+            'rating': ratings.get(highlight_id),
+        }
+        for highlight_id in highlight_ids
+    }
@@ -1,23 +1,77 @@
 # komen_like_rate/views.py
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.http import Http404, HttpResponse, JsonResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
 from django.urls import reverse
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
-from django.db.models import Avg
-from django.templatetags.static import static
-from django.db.models.functions import Coalesce
-from django.db import transaction
-from .models import Rating, Comment, Favorite
+from .comment_events import publish_comment_event
+from .comment_stream import STREAM_CONTENT_TYPE, STREAM_HEADERS, comment_event_stream, parse_last_event_id
+from .comments import COMMENT_SORTS, MAX_REPLY_PREVIEW_SIZE, REPLY_PREVIEW_SIZE, comment_page, thread_page
+from .favorites import toggle_highlight_favorite
+from .likes import toggle_like
+from .leaderboard import ORDERING as LEADERBOARD_ORDERING, with_ranks
+from .models import Rating, Comment, CommentEvent, Favorite, LeaderboardEntry
+from .rating_buffer import buffering_enabled, get_rating_buffer
+from .ratings import rate_highlight, rated_in_window
+from .threads import InvalidParent, post_comment, remove_comment
+from .user_state import parse_highlight_ids, user_highlight_states
 from .forms import RatingForm, CommentForm
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_safe
+from auth_profil.avatars import absolute_avatar_url, avatar_url
 from highlight.models import Highlight
+from highlight.serializers import HIGHLIGHT_RELATIONS, highlight_attributes
+from kick_chronicle.dates import date_range_filter, parse_day
+from kick_chronicle.fieldsets import InvalidFieldset, apply_fieldset, parse_fieldset, serialize_fieldset
+from kick_chronicle.pagination import InvalidCursor, get_page_size, paginate_by_cursor
 import logging
 from django.views.decorators.csrf import csrf_exempt
 logger = logging.getLogger(__name__) 
 import json
-from datetime import date
+from datetime import date, timedelta
+from django.core.handlers.asgi import ASGIRequest
+from django.utils import timezone
 from django.utils.dateparse import parse_date
 
+# Payloads of the mobile lists, trimmed with ?fields=/?include=
+FAVORITE_ATTRIBUTES = highlight_attributes(
+    "id", "name", "url", "description", "season", "manual_thumbnail_url", "created_at",
+)
+TOP_RATED_ATTRIBUTES = {
+    **highlight_attributes("id", "name"),
+    "title": (["name"], lambda highlight: highlight.name),  # untuk mobile
+    **highlight_attributes("url", "description", "season", "manual_thumbnail_url", "created_at"),
+    "avg_rating": (["avg_rating"], lambda highlight: float(highlight.avg_rating)),
+}
+# Votes inside the window, not the highlight's all-time totals
+WINDOW_ATTRIBUTES = {
+    **highlight_attributes("id", "name", "url", "season", "manual_thumbnail_url", "thumbnail_url", "created_at"),
+    "avg_rating": ([], lambda highlight: highlight.window_avg),
+    "rating_count": ([], lambda highlight: highlight.window_count),
+}
+# ?period= shortcuts, in days ending today
+RANKING_PERIODS = {"day": 1, "week": 7, "month": 30}
+
+
+def _reply_parent(highlight, parent_id):
+    """The comment being replied to (None for a top-level comment); raises InvalidParent."""
+    if parent_id in (None, ''):
+        return None
+    try:
+        return Comment.objects.get(pk=int(parent_id), highlight=highlight)
+    except (TypeError, ValueError, Comment.DoesNotExist):
+        raise InvalidParent("Unknown parent comment")
+
+
+def _post_comment(request, highlight, content, parent_id):
+    parent = _reply_parent(highlight, parent_id)
+    try:
+        comment = post_comment(request.user, highlight, content, parent=parent)
+    except Comment.DoesNotExist:
+        # Deleted between the lookup and the reply
+        raise InvalidParent("Unknown parent comment")
+    publish_comment_event(CommentEvent.CREATED, highlight.pk, _comment_event_json(request, comment))
+    return comment
+
 @login_required
 def add_comment(request, highlight_id):
     highlight = get_object_or_404(Highlight, id=highlight_id)
@@ -29,26 +83,20 @@ def add_comment(request, highlight_id):
     if not form.is_valid():
         return JsonResponse({'error': 'Invalid form'}, status=400)
 
-    comment = form.save(commit=False)
-    comment.user = request.user
-    comment.highlight = highlight
-    comment.save()
-
-    avatar_url = ""
     try:
-        prof = getattr(request.user, "profile", None)
-        if prof and prof.image:
-            avatar_url = prof.image.url
-    except Exception:
-        avatar_url = ""
+        comment = _post_comment(request, highlight, form.cleaned_data['content'], request.POST.get('parent'))
+    except InvalidParent as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
     data = {
         'status': 'ok',
         'id': comment.id,
+        'parent_id': comment.parent_id,
+        'depth': comment.depth,
         'user': comment.user.username,
         'content': comment.content,
         'created_at': comment.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-        'avatar_url': avatar_url,
+        'avatar_url': avatar_url(request.user),
         'initial': comment.user.username[:1].upper(),
     }
     return JsonResponse(data)
@@ -58,17 +106,12 @@ def toggle_favorite(request, highlight_id):
     if request.method != "POST":
         return JsonResponse({"status": "error", "message": "Invalid method"}, status=405)
 
-    highlight = get_object_or_404(Highlight, id=highlight_id)
-    fav, created = Favorite.objects.get_or_create(user=request.user, highlight=highlight)
-
-    if created:
-        action = "added"
-        favorited = True
-    else:
-        fav.delete()
-        action = "removed"
-        favorited = False
+    try:
+        favorited = toggle_highlight_favorite(request.user, highlight_id)
+    except Highlight.DoesNotExist:
+        raise Http404("No Highlight matches the given query.")
 
+    action = "added" if favorited else "removed"
     return JsonResponse({"status": "ok", "action": action, "favorited": favorited})
 
 @login_required
@@ -92,18 +135,11 @@ def submit_rating(request):
 
     highlight = get_object_or_404(Highlight, id=highlight_id)
     try:
-        with transaction.atomic():
-            rating, created = Rating.objects.get_or_create(
-                user=request.user,
-                highlight=highlight,
-                defaults={'value': rating_value}
-            )
-            if not created:
-                rating.value = rating_value
-                rating.save(update_fields=['value'])
-                logger.info(f"SUCCESS: Rating updated for highlight {highlight_id} by user {user_id} to {rating_value}")
-            else:
-                logger.info(f"SUCCESS: Rating created for highlight {highlight_id} by user {user_id} with value {rating_value}")
+        rating, created = rate_highlight(request.user, highlight, rating_value)
+        if not created:
+            logger.info(f"SUCCESS: Rating updated for highlight {highlight_id} by user {user_id} to {rating_value}")
+        else:
+            logger.info(f"SUCCESS: Rating created for highlight {highlight_id} by user {user_id} with value {rating_value}")
 
     except Exception as e:
         logger.error(f"DATABASE ERROR for user {user_id} on highlight {highlight_id}: {e}", exc_info=True)
@@ -116,14 +152,13 @@ def top_rated(request):
     start = request.GET.get('start_date')
     end = request.GET.get('end_date')
 
-    if start:
-        highlights = highlights.filter(created_at__date__gte=start)
-    if end:
-        highlights = highlights.filter(created_at__date__lte=end)
+    # Range on created_at (not created_at__date) so the index is usable
+    try:
+        highlights = highlights.filter(**date_range_filter('created_at', start, end))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
 
-    highlights = highlights.annotate(
-        avg_rating=Coalesce(Avg('rating__value'), 0.0)
-    ).order_by('-avg_rating')[:10]
+    highlights = highlights.order_by('-avg_rating', '-id')[:10]
 
     return render(request, 'komen_like_rate/top_rated.html', {
         'highlights': highlights,
@@ -131,15 +166,45 @@ def top_rated(request):
         'end_date': end,
     })
 
+def comment_list(request, highlight_id):
+    """Next page of the detail page's comments as rendered HTML (Load more)."""
+    highlight = get_object_or_404(Highlight, id=highlight_id)
+    sort = request.GET.get('sort', 'newest')
+    if sort not in COMMENT_SORTS:
+        return JsonResponse({'status': 'error', 'message': f"sort must be one of {', '.join(COMMENT_SORTS)}"}, status=400)
+    try:
+        comments, next_cursor = comment_page(
+            highlight, cursor=request.GET.get('cursor'), user=request.user, sort=sort,
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    html = ''.join(
+        render_to_string('komen_like_rate/comment_item.html', {'comment': comment}, request=request)
+        for comment in comments
+    )
+    return JsonResponse({'status': 'ok', 'html': html, 'next_cursor': next_cursor})
+
 @login_required
 @require_POST
 def delete_comment(request, comment_id):
     comment = get_object_or_404(Comment, id=comment_id)
     if comment.user_id != request.user.id:
         return HttpResponseForbidden("Tidak boleh menghapus komentar orang lain.")
-    comment.delete()
+    highlight_id = comment.highlight_id
+    remove_comment(comment)
+    publish_comment_event(CommentEvent.DELETED, highlight_id, {"id": comment_id})
     return JsonResponse({"status": "ok", "id": comment_id})
 
+@login_required
+@require_POST
+def toggle_comment_like(request, comment_id):
+    try:
+        liked, like_count = toggle_like(request.user, comment_id)
+    except Comment.DoesNotExist:
+        raise Http404("No Comment matches the given query.")
+    return JsonResponse({"status": "ok", "liked": liked, "like_count": like_count})
+
 @login_required
 def favorite_list(request):
     favorites = Favorite.objects.filter(
@@ -158,35 +223,81 @@ def get_comments_mobile(request, highlight_id):
         return JsonResponse({"status": False, "message": "Invalid method"}, status=405)
 
     highlight = get_object_or_404(Highlight, id=highlight_id)
-    
-    comments = Comment.objects.filter(
-        highlight=highlight
-    ).select_related("user").order_by('-created_at')
+    sort = request.GET.get("sort", "newest")
+    if sort not in COMMENT_SORTS:
+        return JsonResponse({"status": False, "message": f"sort must be one of {', '.join(COMMENT_SORTS)}"}, status=400)
 
+    try:
+        replies = min(int(request.GET.get("replies", REPLY_PREVIEW_SIZE)), MAX_REPLY_PREVIEW_SIZE)
+        if replies < 0:
+            raise ValueError
+    except ValueError:
+        return JsonResponse({"status": False, "message": f"replies must be between 0 and {MAX_REPLY_PREVIEW_SIZE}"}, status=400)
+
+    # Top-level comments newest first (or ?sort=most_liked), each with its
+    # first ?replies= replies; ?cursor= continues it
+    try:
+        comments, next_cursor = comment_page(
+            highlight,
+            cursor=request.GET.get('cursor'),
+            page_size=get_page_size(request),
+            user=request.user,
+            sort=sort,
+            replies=replies,
+        )
+    except InvalidCursor as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=400)
+
+    avatars = {}
     data = []
     for c in comments:
-        profile = getattr(c.user, "profile", None)
+        item = _comment_json_mobile(request, c, avatars)
+        item["replies"] = [_comment_json_mobile(request, reply, avatars) for reply in c.preview_replies]
+        data.append(item)
 
-        if profile and profile.image:
-            avatar_url = profile.image.url
-            if not avatar_url.startswith('http'):
-                avatar_url = request.build_absolute_uri(avatar_url)
-        else:
-            avatar_url = request.build_absolute_uri(static("img/default.png"))
-
-        if avatar_url.startswith('http:'):
-            avatar_url = avatar_url.replace('http:', 'https:', 1)
-
-        data.append({
-            "id": c.id,
-            "user": c.user.username,
-            "content": c.content,
-            "created_at": c.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            "avatar": avatar_url,
-            "is_owner": c.user_id == request.user.id,
-        })
+    return JsonResponse({"status": True, "comments": data, "next_cursor": next_cursor})
 
-    return JsonResponse({"status": True, "comments": data})
+@login_required
+@csrf_exempt
+def get_thread_mobile(request, comment_id):
+    """
+    Every reply below a comment, depth first (a reply comes right after
+    its parent), one page per ?cursor=. With ?max_depth=N only N levels
+    below the comment are listed; a listed reply whose reply_count is
+    above zero but whose replies aren't listed continues with its own
+    thread request.
+    """
+    if request.method != "GET":
+        return JsonResponse({"status": False, "message": "Invalid method"}, status=405)
+
+    comment = get_object_or_404(Comment.objects.select_related('user__profile'), id=comment_id)
+    max_depth = request.GET.get("max_depth")
+    if max_depth is not None:
+        try:
+            max_depth = int(max_depth)
+            if max_depth < 1:
+                raise ValueError
+        except ValueError:
+            return JsonResponse({"status": False, "message": "max_depth must be a positive integer"}, status=400)
+
+    try:
+        replies, next_cursor = thread_page(
+            comment,
+            cursor=request.GET.get('cursor'),
+            page_size=get_page_size(request),
+            user=request.user,
+            max_depth=max_depth,
+        )
+    except InvalidCursor as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=400)
+
+    avatars = {}
+    return JsonResponse({
+        "status": True,
+        "root": _comment_json_mobile(request, comment, avatars),
+        "comments": [_comment_json_mobile(request, reply, avatars) for reply in replies],
+        "next_cursor": next_cursor,
+    })
 
 @login_required
 @csrf_exempt
@@ -201,32 +312,20 @@ def add_comment_mobile(request, highlight_id):
         return JsonResponse({"status": False, "message": "Content required"}, status=400)
 
     highlight = get_object_or_404(Highlight, id=highlight_id)
-    comment = Comment.objects.create(
-        user=request.user,
-        highlight=highlight,
-        content=content
-    )
-
-    # --- TAMBAHAN LOGIKA AVATAR (SAMA SEPERTI GET) ---
-    profile = getattr(request.user, "profile", None)
-    if profile and profile.image:
-        avatar_url = profile.image.url
-        # Pastikan absolute URL
-        if not avatar_url.startswith('http'):
-            avatar_url = request.build_absolute_uri(avatar_url)
-    else:
-        avatar_url = request.build_absolute_uri(static("img/default.png"))
-
-    if avatar_url.startswith('http:'):
-        avatar_url = avatar_url.replace('http:', 'https:', 1)
+    try:
+        comment = _post_comment(request, highlight, content, data.get('parent_id'))
+    except InvalidParent as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=400)
 
     return JsonResponse({
         "status": True,
         "id": comment.id,
+        "parent_id": comment.parent_id,
+        "depth": comment.depth,
         "content": comment.content,
         "user": request.user.username,
         "created_at": comment.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-        "avatar": avatar_url,
+        "avatar": absolute_avatar_url(request, avatar_url(request.user)),
         "is_owner": True
     })
 
@@ -236,14 +335,12 @@ def toggle_favorite_mobile(request, highlight_id):
     if request.method != "POST":
         return JsonResponse({"status": False, "message": "Invalid method"}, status=405)
 
-    highlight = get_object_or_404(Highlight, id=highlight_id)
-    fav, created = Favorite.objects.get_or_create(user=request.user, highlight=highlight)
+    try:
+        favorited = toggle_highlight_favorite(request.user, highlight_id)
+    except Highlight.DoesNotExist:
+        raise Http404("No Highlight matches the given query.")
 
-    if created:
-        return JsonResponse({"status": True, "favorited": True})
-    else:
-        fav.delete()
-        return JsonResponse({"status": True, "favorited": False})
+    return JsonResponse({"status": True, "favorited": favorited})
 
 
 @login_required
@@ -264,17 +361,19 @@ def submit_rating_mobile(request):
 
     highlight = get_object_or_404(Highlight, id=highlight_id)
 
-    try:
-        with transaction.atomic():
-            rating, created = Rating.objects.get_or_create(
-                user=request.user,
-                highlight=highlight,
-                defaults={"value": rating_value}
-            )
+    if buffering_enabled():
+        # Written with the next flush; the average shown lags until then
+        get_rating_buffer().add(request.user.pk, highlight.pk, rating_value)
+        return JsonResponse({
+            "status": True,
+            "buffered": True,
+            "rating": rating_value,
+            "avg_rating": float(highlight.avg_rating),
+            "highlight": _rated_highlight_json(highlight),
+        })
 
-            if not created:
-                rating.value = rating_value
-                rating.save(update_fields=["value"])
+    try:
+        rating, created = rate_highlight(request.user, highlight, rating_value)
 
     except Exception as e:
         return JsonResponse({
@@ -282,25 +381,27 @@ def submit_rating_mobile(request):
             "message": f"Database error: {e}"
         }, status=500)
 
-    avg_rating = Rating.objects.filter(highlight=highlight).aggregate(
-        avg=Coalesce(Avg("value"), 0.0)
-    )["avg"]
+    # Totals moved by rate_highlight; a primary key read instead of an aggregate
+    highlight.refresh_from_db(fields=["avg_rating"])
 
     return JsonResponse({
         "status": True,
         "rating": rating.value,
-        "avg_rating": float(avg_rating),
-        "highlight": {
-            "id": str(highlight.id),
-            "name": highlight.name,
-            "description": highlight.description,
-            "thumbnail": highlight.manual_thumbnail_url,
-            "url": highlight.url,
-            "season": highlight.season,
-            "created_at": highlight.created_at.isoformat(),
-        }
+        "avg_rating": float(highlight.avg_rating),
+        "highlight": _rated_highlight_json(highlight),
     })
 
+def _rated_highlight_json(highlight):
+    return {
+        "id": str(highlight.id),
+        "name": highlight.name,
+        "description": highlight.description,
+        "thumbnail": highlight.manual_thumbnail_url,
+        "url": highlight.url,
+        "season": highlight.season,
+        "created_at": highlight.created_at.isoformat(),
+    }
+
 @login_required
 @csrf_exempt
 def delete_comment_mobile(request, comment_id):
@@ -312,10 +413,25 @@ def delete_comment_mobile(request, comment_id):
     if comment.user != request.user:
         return JsonResponse({"status": False, "message": "Forbidden"}, status=403)
 
-    comment.delete()
+    highlight_id = comment.highlight_id
+    remove_comment(comment)
+    publish_comment_event(CommentEvent.DELETED, highlight_id, {"id": comment_id})
 
     return JsonResponse({"status": True, "message": "Comment deleted"})
 
+@login_required
+@csrf_exempt
+def toggle_comment_like_mobile(request, comment_id):
+    if request.method != 'POST':
+        return JsonResponse({"status": False, "message": "Invalid method"}, status=405)
+
+    try:
+        liked, like_count = toggle_like(request.user, comment_id)
+    except Comment.DoesNotExist:
+        raise Http404("No Comment matches the given query.")
+
+    return JsonResponse({"status": True, "liked": liked, "like_count": like_count})
+
 @login_required
 @csrf_exempt
 @login_required
@@ -323,48 +439,36 @@ def delete_comment_mobile(request, comment_id):
 @login_required
 @csrf_exempt
 def favorite_list_mobile(request):
-    favorites = Favorite.objects.filter(
-        user=request.user
-    ).select_related("highlight")
+    try:
+        fieldset = parse_fieldset(request.GET, FAVORITE_ATTRIBUTES, HIGHLIGHT_RELATIONS)
+    except InvalidFieldset as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=400)
+
+    favorites = apply_fieldset(
+        Favorite.objects.filter(user=request.user).select_related("highlight"),
+        fieldset, FAVORITE_ATTRIBUTES, HIGHLIGHT_RELATIONS,
+        prefix="highlight__", always=("id", "highlight"),
+    )
 
-    data = []
+    # ?cursor= pages through favorites, most recently added first
+    next_cursor = None
+    if 'cursor' in request.GET:
+        try:
+            favorites, next_cursor = paginate_by_cursor(
+                favorites,
+                ['-id'],
+                cursor=request.GET.get('cursor'),
+                page_size=get_page_size(request),
+            )
+        except InvalidCursor as e:
+            return JsonResponse({"status": False, "message": str(e)}, status=400)
 
-    for fav in favorites:
-        hl = fav.highlight
-        
-        home_standing = None
-        if hl.home:
-            home_standing = {
-                "team": hl.home.team,
-                "played": hl.home.played,
-                "won": hl.home.won,
-                "drawn": hl.home.drawn,
-                "lost": hl.home.lost,
-            }
-
-        away_standing = None
-        if hl.away:
-            away_standing = {
-                "team": hl.away.team,
-                "played": hl.away.played,
-                "won": hl.away.won,
-                "drawn": hl.away.drawn,
-                "lost": hl.away.lost,
-            }
-
-        data.append({
-            "id": hl.pk,
-            "name": hl.name,
-            "url": hl.url,
-            "description": hl.description,
-            "season": hl.season,
-            "manual_thumbnail_url": hl.manual_thumbnail_url,
-            "created_at": hl.created_at.isoformat(),
-            "home_standing": home_standing,
-            "away_standing": away_standing,
-        })
+    data = [
+        serialize_fieldset(fav.highlight, fieldset, FAVORITE_ATTRIBUTES, HIGHLIGHT_RELATIONS)
+        for fav in favorites
+    ]
 
-    return JsonResponse({"status": True, "favorites": data})
+    return JsonResponse({"status": True, "favorites": data, "next_cursor": next_cursor})
 
 
 @login_required
@@ -386,64 +490,194 @@ def get_user_rating_mobile(request, highlight_id):
 
 @csrf_exempt
 def top_rated_mobile(request):
-    highlights = Highlight.objects.all()
+    """
+    One page of the top rated leaderboard (Bayesian score, see
+    komen_like_rate.leaderboard), best first. Always paginated:
+    ?limit= is capped and ?cursor= continues from the previous page.
+    """
+    try:
+        fieldset = parse_fieldset(request.GET, TOP_RATED_ATTRIBUTES, HIGHLIGHT_RELATIONS)
+    except InvalidFieldset as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=400)
+
+    entries = apply_fieldset(
+        LeaderboardEntry.objects.select_related("highlight"),
+        fieldset, TOP_RATED_ATTRIBUTES, HIGHLIGHT_RELATIONS,
+        prefix="highlight__", always=("highlight", "score"),
+    )
 
     start = request.GET.get("start_date")
     end = request.GET.get("end_date")
 
-    if start:
-        highlights = highlights.filter(created_at__date__gte=start)
-    if end:
-        highlights = highlights.filter(created_at__date__lte=end)
-
-    highlights = highlights.annotate(
-        avg_rating=Coalesce(Avg('rating__value'), 0.0)
-    ).order_by('-avg_rating')
-
-    data = []
+    try:
+        entries = entries.filter(**date_range_filter('highlight__created_at', start, end))
+    except ValueError as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=400)
 
-    for highlight in highlights:
-
-        # HOME STANDING
-        home_standing = None
-        if highlight.home:
-            home_standing = {
-                "team": highlight.home.team,
-                "played": highlight.home.played,
-                "won": highlight.home.won,
-                "drawn": highlight.home.drawn,
-                "lost": highlight.home.lost,
-            }
-
-        # AWAY STANDING
-        away_standing = None
-        if highlight.away:
-            away_standing = {
-                "team": highlight.away.team,
-                "played": highlight.away.played,
-                "won": highlight.away.won,
-                "drawn": highlight.away.drawn,
-                "lost": highlight.away.lost,
-            }
-
-        data.append({
-            "id": highlight.pk,
-            "name": highlight.name,
-            "title": highlight.name,  # untuk mobile
-            "url": highlight.url,
-            "description": highlight.description,
-            "season": highlight.season,
-            "manual_thumbnail_url": highlight.manual_thumbnail_url,
-            "created_at": highlight.created_at.isoformat(),
-            "avg_rating": float(highlight.avg_rating),
-            "home_standing": home_standing,
-            "away_standing": away_standing,
-        })
+    try:
+        entries, next_cursor = paginate_by_cursor(
+            entries,
+            LEADERBOARD_ORDERING,
+            cursor=request.GET.get('cursor'),
+            page_size=get_page_size(request),
+        )
+    except InvalidCursor as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=400)
+
+    # Rank on the whole board; a date window skips entries between the listed ones
+    with_ranks(entries, contiguous=not (start or end))
+
+    data = [
+        {
+            **serialize_fieldset(entry.highlight, fieldset, TOP_RATED_ATTRIBUTES, HIGHLIGHT_RELATIONS),
+            "rank": entry.rank,
+            "score": entry.score,
+        }
+        for entry in entries
+    ]
 
     return JsonResponse({
         "status": True,
         "count": len(data),
         "start_date": start,
         "end_date": end,
-        "highlights": data
-    })
\ No newline at end of file
+        "highlights": data,
+        "next_cursor": next_cursor,
+    })
+
+
+def top_rated_window_mobile(request):
+    """
+    Highlights ranked by the votes cast between start_date and end_date
+    (inclusive, default today), or over ?period=day|week|month ending
+    today. Summed from the daily rating buckets; ?cursor= pages through.
+    """
+    try:
+        fieldset = parse_fieldset(request.GET, WINDOW_ATTRIBUTES, HIGHLIGHT_RELATIONS)
+    except InvalidFieldset as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=400)
+
+    today = timezone.localdate()
+    period = request.GET.get("period")
+    try:
+        if period:
+            if period not in RANKING_PERIODS:
+                raise ValueError(f"period must be one of {', '.join(RANKING_PERIODS)}")
+            end = today
+            start = end - timedelta(days=RANKING_PERIODS[period] - 1)
+        else:
+            end = parse_day(request.GET["end_date"]) if request.GET.get("end_date") else today
+            start = parse_day(request.GET["start_date"]) if request.GET.get("start_date") else end
+        if start > end:
+            raise ValueError("start_date is after end_date")
+    except ValueError as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=400)
+
+    highlights = apply_fieldset(
+        rated_in_window(start, end), fieldset, WINDOW_ATTRIBUTES, HIGHLIGHT_RELATIONS, always=("id",),
+    )
+    try:
+        highlights, next_cursor = paginate_by_cursor(
+            highlights,
+            ['-window_avg', '-id'],
+            cursor=request.GET.get('cursor'),
+            page_size=get_page_size(request),
+        )
+    except InvalidCursor as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=400)
+
+    data = [
+        serialize_fieldset(highlight, fieldset, WINDOW_ATTRIBUTES, HIGHLIGHT_RELATIONS)
+        for highlight in highlights
+    ]
+    return JsonResponse({
+        "status": True,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "highlights": data,
+        "next_cursor": next_cursor,
+    })
+
+
+@login_required
+@csrf_exempt
+def user_state_mobile(request):
+    """
+    Favorite and rating of many highlights for the cards of one screen:
+    GET ?ids=<id>,<id>,... or POST {"ids": [...]}.
+    """
+    if request.method == "POST":
+        try:
+            values = json.loads(request.body or b"{}").get("ids", [])
+        except (ValueError, AttributeError):
+            return JsonResponse({"status": False, "message": "Invalid JSON"}, status=400)
+        if not isinstance(values, list):
+            return JsonResponse({"status": False, "message": "ids must be a list"}, status=400)
+    else:
+        values = [value for value in request.GET.get("ids", "").split(",") if value.strip()]
+
+    try:
+        highlight_ids = parse_highlight_ids(values)
+    except ValueError as e:
+        return JsonResponse({"status": False, "message": str(e)}, status=400)
+
+    return JsonResponse({
+        "status": True,
+        "states": user_highlight_states(request.user, highlight_ids),
+    })
+
+
+def _comment_json_mobile(request, comment, avatars):
+    # `avatars` keeps the absolute URL of each author already on the page
+    if comment.user_id not in avatars:
+        avatars[comment.user_id] = absolute_avatar_url(request, comment.avatar_url)
+    return {
+        "id": comment.id,
+        "parent_id": comment.parent_id,
+        "depth": comment.depth,
+        "user": comment.user.username,
+        "content": comment.content,
+        "created_at": comment.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "avatar": avatars[comment.user_id],
+        "is_owner": comment.user_id == request.user.id,
+        "like_count": comment.like_count,
+        "liked": comment.liked,
+        "reply_count": comment.reply_count,
+    }
+
+
+def _comment_event_json(request, comment):
+    # Same shape as a get_comments_mobile item, minus the viewer's is_owner/liked
+    return {
+        "id": comment.id,
+        "parent_id": comment.parent_id,
+        "depth": comment.depth,
+        "user": comment.user.username,
+        "content": comment.content,
+        "created_at": comment.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "avatar": absolute_avatar_url(request, avatar_url(comment.user)),
+        "like_count": comment.like_count,
+        "reply_count": comment.reply_count,
+    }
+
+
+@require_safe
+async def comment_stream(request, highlight_id):
+    """
+    Server-sent events of the highlight's new and deleted comments
+    (komen_like_rate.comment_stream). HEAD gets the stream's headers only.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the generator would be drained into one endless response
+        return JsonResponse({"status": False, "message": "The comment stream needs the ASGI server"}, status=501)
+    if not await Highlight.objects.filter(pk=highlight_id).aexists():
+        raise Http404("No Highlight matches the given query.")
+
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=STREAM_CONTENT_TYPE)
+    else:
+        events = comment_event_stream(highlight_id, parse_last_event_id(request.headers.get("Last-Event-ID")))
+        response = StreamingHttpResponse(events, content_type=STREAM_CONTENT_TYPE)
+    for header, value in STREAM_HEADERS:
+        response[header] = value
+    return response
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TimConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tim'
+
+    def ready(self):
+        from . import signals
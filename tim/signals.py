@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from kick_chronicle.caching import bump_version
+from tim.models import Standing
+
+
+@receiver(post_save, sender=Standing)
+@receiver(post_delete, sender=Standing)
+def invalidate_standing_responses(sender, **kwargs):
+    bump_version('standing')
@@ -14,6 +14,8 @@ import io
 import json
 from .models import Standing
 from .forms import StandingUploadForm
+from highlight.models import Highlight, relink_standings
+from kick_chronicle.caching import bump_version
 
 def get_calendar_team_name(team_name: str) -> str:
     """
@@ -168,6 +170,8 @@ def upload_standings_ajax(request):
             
             # Bulk create for efficiency
             Standing.objects.bulk_create(standings_to_create)
+            bump_version('standing')  # bulk_create sends no post_save
+            relink_standings(Highlight.objects.filter(season=season))
             
             return JsonResponse({
                 'status': 'success',
@@ -359,6 +363,8 @@ def upload_standings_flutter(request):
         with transaction.atomic():
             Standing.objects.filter(season=season).delete()
             Standing.objects.bulk_create(standings_to_create)
+            bump_version('standing')  # bulk_create sends no post_save
+            relink_standings(Highlight.objects.filter(season=season))
 
         return JsonResponse(
             {
@@ -433,6 +439,7 @@ def create_standing_api(request):
     try:
         standing.full_clean()
         standing.save()
+        relink_standings(Highlight.objects.filter(season=standing.season))
     except ValidationError as e:
         return JsonResponse(
             {'status': 'error', 'message': 'Validation failed', 'errors': e.message_dict},
@@ -479,6 +486,7 @@ def edit_standing_api(request, pk):
         return JsonResponse({'status': 'error', 'message': 'Standing not found.'}, status=404)
 
     payload = _parse_payload(request)
+    previous_season = standing.season
 
     standing.season = (payload.get('season') or standing.season).strip()
     standing.position = _to_int(payload.get('position'), standing.position)
@@ -495,6 +503,7 @@ def edit_standing_api(request, pk):
     try:
         standing.full_clean()
         standing.save()
+        relink_standings(Highlight.objects.filter(season__in={previous_season, standing.season}))
     except ValidationError as e:
         return JsonResponse(
             {'status': 'error', 'message': 'Validation failed', 'errors': e.message_dict},